@@ -0,0 +1,61 @@
+"""
+Wall time of replaying a JSONL archive: `python -m interview` reading it on STDIN against
+`python -m interview backfill` with 0 (in process) to N worker processes, plain and gzip.
+
+    PYTHONPATH=. python -m benchmarks.backfill_bench [--samples N] [--stations N] [--workers N]
+"""
+import argparse
+import gzip
+import json
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import List, Optional
+
+from benchmarks.suite import Scenario, generate_events
+
+
+def timed(args: List[str], stdin_path: Optional[str] = None) -> float:
+    start = time.perf_counter()
+    with open(stdin_path or os.devnull, "rb") as stdin:
+        subprocess.run([sys.executable, "-m", "interview", "--echo", "none", *args],
+                       stdin=stdin, stdout=subprocess.DEVNULL, check=True)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--samples", type=int, default=1_000_000)
+    parser.add_argument("--stations", type=int, default=1_000)
+    parser.add_argument("--workers", type=int, default=multiprocessing.cpu_count())
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    scenario = Scenario(events=args.samples, stations=args.stations, snapshot_every=10_000,
+                        reset_every=250_000)
+    with tempfile.TemporaryDirectory() as directory:
+        plain = os.path.join(directory, "archive.jsonl")
+        with open(plain, "w", encoding="utf-8") as file:
+            for event in generate_events(scenario, args.seed):
+                file.write(json.dumps(event) + "\n")
+        compressed = plain + ".gz"
+        with open(plain, "rb") as source, gzip.open(compressed, "wb", compresslevel=1) as target:
+            target.write(source.read())
+
+        serial = timed([], plain)
+        print(f"{os.path.getsize(plain) / 1e6:.0f} MB, {args.samples:,} events, "
+              f"{multiprocessing.cpu_count()} CPUs")
+        print(f"{'stdin':<22} {serial:>7.2f}s")
+        for path in (plain, compressed):
+            for workers in sorted({0, 1, args.workers}):
+                elapsed = timed(["backfill", "--workers", str(workers), path])
+                label = f"backfill {os.path.basename(path)} x{workers}"
+                print(f"{label:<22} {elapsed:>7.2f}s ({serial / elapsed:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
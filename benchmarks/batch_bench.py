@@ -0,0 +1,53 @@
+"""
+Samples/sec of the columnar process_batch backfill path vs dict-by-dict process_events.
+
+    PYTHONPATH=. python -m benchmarks.batch_bench [--samples N] [--stations N]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from interview import weather
+
+
+def _reset() -> None:
+    weather.stations_montior.reset()
+    weather.latest_timestamp = None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--samples", type=int, default=1_000_000)
+    parser.add_argument("--stations", type=int, default=1_000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    ids = rng.integers(0, args.stations, args.samples)
+    names = [f"Station {i}" for i in range(args.stations)]
+    timestamps = 1672531200000 + np.arange(args.samples, dtype=np.int64)
+    temperatures = rng.uniform(-30.0, 110.0, args.samples)
+    controls = [(position, "snapshot") for position in range(0, args.samples, 100_000)]
+
+    _reset()
+    start = time.perf_counter()
+    weather.process_batch(ids, timestamps, temperatures, controls, names=names)
+    batch = args.samples / (time.perf_counter() - start)
+
+    events = [{"type": "sample", "stationName": names[i], "timestamp": t, "temperature": x}
+              for i, t, x in zip(ids.tolist(), timestamps.tolist(), temperatures.tolist())]
+    _reset()
+    start = time.perf_counter()
+    for _ in weather.process_events(events):
+        pass
+    streaming = args.samples / (time.perf_counter() - start)
+    _reset()
+
+    print(f"process_events: {streaming:>14,.0f} samples/sec")
+    print(f"process_batch : {batch:>14,.0f} samples/sec ({batch / streaming:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Throughput of the JSON codecs on a 1M-line stream: decoding 64 KiB chunks of lines, encoding
+the sample echoes, and both around process_events.
+
+    PYTHONPATH=. python -m benchmarks.codec_bench [--samples N] [--stations N]
+"""
+import argparse
+import json
+import random
+import time
+from typing import Any, Dict, List
+
+from interview.codec import JsonCodec, available_codecs, get_codec
+from interview.weather import WeatherEngine
+
+
+def generate_chunks(samples: int, stations: int, seed: int) -> List[bytes]:
+    rng = random.Random(seed)
+    lines = []
+    for i in range(samples):
+        lines.append(json.dumps({
+            "type"       : "sample",
+            "stationName": f"Station {rng.randrange(stations)}",
+            "timestamp"  : 1672531200000 + i,
+            "temperature": round(rng.uniform(-30.0, 110.0), 1)
+        }))
+        if i % 1000 == 999:
+            lines.append(json.dumps({"type": "control", "command": "snapshot"}))
+    chunks = []
+    chunk: List[str] = []
+    size = 0
+    for line in lines:
+        chunk.append(line + "\n")
+        size += len(line) + 1
+        if size >= 1 << 16:
+            chunks.append("".join(chunk).encode())
+            chunk, size = [], 0
+    chunks.append("".join(chunk).encode())
+    return chunks
+
+
+def bench(codec: JsonCodec, chunks: List[bytes]) -> Dict[str, float]:
+    """
+    lines/sec decoded, outputs/sec encoded and events/sec end to end
+    :param codec:
+    :param chunks: chunks of complete lines
+    :return:
+    """
+    start = time.perf_counter()
+    events: List[Any] = [obj for chunk in chunks for obj in codec.iter_lines(chunk)]
+    decoding = len(events) / (time.perf_counter() - start)
+
+    outputs = list(WeatherEngine().process_events(events))
+    encode = codec.encode
+    start = time.perf_counter()
+    for output in outputs:
+        encode(output)
+    encoding = len(outputs) / (time.perf_counter() - start)
+
+    engine = WeatherEngine()
+    iter_lines = codec.iter_lines
+    start = time.perf_counter()
+    for chunk in chunks:
+        for output in engine.process_events(iter_lines(chunk)):
+            encode(output)
+    end_to_end = len(events) / (time.perf_counter() - start)
+    return {"decoding": decoding, "encoding": encoding, "endToEnd": end_to_end}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--samples", type=int, default=1_000_000)
+    parser.add_argument("--stations", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    chunks = generate_chunks(args.samples, args.stations, args.seed)
+    results = {name: bench(get_codec(name), chunks) for name in available_codecs()}
+    stdlib = results["stdlib"]
+    for name, result in results.items():
+        print(f"{name:<7} decoding {result['decoding']:>12,.0f} lines/sec "
+              f"({result['decoding'] / stdlib['decoding']:.1f}x)  "
+              f"encoding {result['encoding']:>12,.0f} outputs/sec  "
+              f"end to end {result['endToEnd']:>12,.0f} events/sec "
+              f"({result['endToEnd'] / stdlib['endToEnd']:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
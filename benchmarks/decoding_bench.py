@@ -0,0 +1,63 @@
+"""
+Events/sec of process_events on a 1M-sample stream, fast-path decoding vs pydantic decoding.
+
+    PYTHONPATH=. python -m benchmarks.decoding_bench [--samples N] [--stations N]
+"""
+import argparse
+import random
+import time
+from typing import Any, Callable, Dict, Iterator
+
+from interview import decoding, weather
+
+
+def generate_samples(samples: int, stations: int, seed: int) -> Iterator[Dict[str, Any]]:
+    rng = random.Random(seed)
+    for i in range(samples):
+        yield {
+            "type"       : "sample",
+            "stationName": f"Station {rng.randrange(stations)}",
+            "timestamp"  : 1672531200000 + i,
+            "temperature": rng.uniform(-30.0, 110.0)
+        }
+        if i % 1000 == 999:
+            yield {"type": "control", "command": "snapshot"}
+
+
+def bench(decoder: Callable[..., Dict[str, Any]], args: argparse.Namespace) -> float:
+    """
+    events/sec of process_events with the given decoder
+    :param decoder:
+    :param args:
+    :return:
+    """
+    events = list(generate_samples(args.samples, args.stations, args.seed))
+    weather.stations_montior.reset()
+    weather.latest_timestamp = None
+    original, weather.decode_event = weather.decode_event, decoder
+    try:
+        start = time.perf_counter()
+        for _ in weather.process_events(events):
+            pass
+        elapsed = time.perf_counter() - start
+    finally:
+        weather.decode_event = original
+    return len(events) / elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--samples", type=int, default=1_000_000)
+    parser.add_argument("--stations", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    strict = bench(decoding.decode_event_strict, args)
+    fast = bench(decoding.decode_event, args)
+    print(f"pydantic decoding : {strict:>12,.0f} events/sec")
+    print(f"fast-path decoding: {fast:>12,.0f} events/sec ({fast / strict:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
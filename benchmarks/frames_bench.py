@@ -0,0 +1,66 @@
+"""
+Binary frames against JSON lines as the input of process_events: bytes per sample and
+events/sec decoding 64 KiB chunks and feeding the engine, outputs left unserialized.
+
+    PYTHONPATH=. python -m benchmarks.frames_bench [--samples N] [--stations N]
+"""
+import argparse
+import io
+import json
+import time
+from typing import Any, Callable, Dict, Iterator, List
+
+from benchmarks.codec_bench import generate_chunks
+from interview.codec import JsonCodec, available_codecs, get_codec
+from interview.frames import encode_frames, read_frames
+from interview.streamio import read_chunks
+from interview.weather import WeatherEngine
+
+
+def bench(events: Callable[[], Iterator[Dict[str, Any]]]) -> float:
+    """
+    events/sec of process_events fed by a decoder
+    :param events: returns the decoded input stream
+    :return:
+    """
+    engine = WeatherEngine(echo="none")
+    start = time.perf_counter()
+    for _ in engine.process_events(events()):
+        pass
+    elapsed = time.perf_counter() - start
+    return engine.metrics.events / elapsed
+
+
+def json_events(lines: bytes, codec: JsonCodec) -> Callable[[], Iterator[Dict[str, Any]]]:
+    def events() -> Iterator[Dict[str, Any]]:
+        for chunk in read_chunks(io.BytesIO(lines)):
+            yield from codec.iter_lines(chunk)
+    return events
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--samples", type=int, default=1_000_000)
+    parser.add_argument("--stations", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    lines = b"".join(generate_chunks(args.samples, args.stations, args.seed))
+    messages: List[Dict[str, Any]] = [json.loads(line) for line in lines.splitlines()]
+    frames = b"".join(encode_frames(messages))
+    print(f"input: {len(lines) / len(messages):.1f} bytes/event as JSON lines, "
+          f"{len(frames) / len(messages):.1f} bytes/event as frames")
+
+    results = {}
+    for name in available_codecs():
+        results[f"json ({name})"] = bench(json_events(lines, get_codec(name)))
+    results["binary frames"] = bench(lambda: read_frames(io.BytesIO(frames)))
+    reference = results["json (stdlib)"]
+    for label, events_per_second in results.items():
+        print(f"{label:<14} {events_per_second:>12,.0f} events/sec "
+              f"({events_per_second / reference:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Memory per station and update cost of StationsMonitor against the original layout,
+a Dict[str, Dict[str, float]] of boxed floats under "high"/"low" keys.
+
+    PYTHONPATH=. python -m benchmarks.memory_bench [--stations N] [--samples N]
+
+Memory is traced with tracemalloc after filling every station; the station name strings
+are allocated beforehand and reported apart, both layouts keep one reference to them.
+"""
+import argparse
+import gc
+import random
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Tuple
+
+from interview.models.stations import StationsMonitor
+
+
+class DictOfDicts:
+    """
+    The original state layout, for reference
+    """
+
+    def __init__(self) -> None:
+        self.stations: Dict[str, Dict[str, float]] = {}
+
+    def update(self, station_name: str, temperature: float) -> None:
+        station = self.stations.get(station_name)
+        if station is None:
+            self.stations[station_name] = {"high": temperature, "low": temperature}
+        elif temperature > station["high"]:
+            station["high"] = temperature
+        elif temperature < station["low"]:
+            station["low"] = temperature
+
+
+def measure_memory(factory: Callable[[], Any], names: List[str]) -> Tuple[float, Any]:
+    gc.collect()
+    tracemalloc.start()
+    state = factory()
+    for i, name in enumerate(names):
+        # distinct, non cached floats
+        state.update(name, i * 0.5 + 0.25)
+    # steady state: the changes were collected, as by a snapshot_delta
+    getattr(state, "clear_dirty", lambda: None)()
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current / len(names), state
+
+
+def measure_updates(state: Any, pairs: List[Tuple[str, float]]) -> float:
+    update = state.update
+    start = time.perf_counter_ns()
+    for name, temperature in pairs:
+        update(name, temperature)
+    return (time.perf_counter_ns() - start) / len(pairs)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--stations", type=int, default=1_000_000)
+    parser.add_argument("--samples", type=int, default=2_000_000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    names = [f"Station {i}" for i in range(args.stations)]
+    # copies, as decoded from the input: each sample carries its own name string
+    rng = random.Random(args.seed)
+    pairs = [(f"Station {rng.randrange(args.stations)}", rng.uniform(-30.0, 110.0))
+             for _ in range(args.samples)]
+    name_bytes = sum(map(len, names)) / args.stations + 49  # compact ASCII str header
+
+    results = {}
+    for label, factory in (("Dict[str, Dict[str, float]]", DictOfDicts),
+                           ("StationsMonitor", StationsMonitor)):
+        per_station, state = measure_memory(factory, names)
+        results[label] = (per_station, measure_updates(state, pairs))
+        del state
+
+    print(f"{args.stations:,} stations, names ~{name_bytes:.0f} B each (excluded)")
+    reference = results["Dict[str, Dict[str, float]]"]
+    for label, (per_station, update_ns) in results.items():
+        print(f"{label:<28} {per_station:>7.1f} B/station ({reference[0] / per_station:.1f}x) "
+              f"{update_ns:>7.0f} ns/update ({reference[1] / update_ns:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Cold start latency of `python -m interview`: a fresh interpreter per run, median wall time.
+Well-formed input never loads pydantic; --strict and a malformed message do, which is the
+cost every run paid when the models were imported up front.
+
+    PYTHONPATH=. python -m benchmarks.startup_bench [--runs N]
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from typing import List
+
+SAMPLE = json.dumps({"type": "sample", "stationName": "Foster Weather Station",
+                     "timestamp": 1672531200000, "temperature": 37.1}) + "\n"
+SNAPSHOT = json.dumps({"type": "control", "command": "snapshot"}) + "\n"
+MALFORMED = json.dumps({"type": "sample", "stationName": "Foster Weather Station",
+                        "timestamp": 1672531200000, "temperature": 37}) + "\n"
+
+
+def median_ms(args: List[str], stdin: str, runs: int) -> float:
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, *args], input=stdin.encode(),
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1e3
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    cases = [
+        ("python -c pass", ["-c", "pass"], ""),
+        ("empty input", ["-m", "interview"], ""),
+        ("sample + snapshot", ["-m", "interview"], SAMPLE + SNAPSHOT),
+        ("--strict", ["-m", "interview", "--strict"], SAMPLE + SNAPSHOT),
+        ("malformed sample", ["-m", "interview"], MALFORMED),
+        ("import pydantic models", ["-c", "import interview.models.inputEvent"], ""),
+    ]
+    for label, command, stdin in cases:
+        print(f"{label:<24} {median_ms(command, stdin, args.runs):>7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Per-sample ingest cost as a function of the number of distinct stations.
+
+    PYTHONPATH=. python -m benchmarks.stations_bench [--samples N] [--max-stations N]
+
+The station table is filled first, then a fixed number of samples spread over all stations
+is timed, so the reported ns/sample should stay flat from 10 to 1,000,000 stations.
+"""
+import argparse
+import random
+import time
+from typing import Any, Dict, List
+
+from interview import weather
+from interview.models.stations import StationsMonitor
+
+STATION_COUNTS = [10, 100, 1_000, 10_000, 100_000, 1_000_000]
+
+
+def _make_events(names: List[str], samples: int, seed: int) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    return [
+        {
+            "type"       : "sample",
+            "stationName": names[rng.randrange(len(names))],
+            "timestamp"  : 1672531200000 + i,
+            "temperature": rng.uniform(-30.0, 110.0)
+        }
+        for i in range(samples)
+    ]
+
+
+def bench_monitor(names: List[str], events: List[Dict[str, Any]]) -> float:
+    """
+    ns/sample of StationsMonitor.update on a monitor already holding every station
+    :param names:
+    :param events:
+    :return:
+    """
+    stations = StationsMonitor()
+    for name in names:
+        stations.update(name, 0.0)
+    pairs = [(event["stationName"], event["temperature"]) for event in events]
+    update = stations.update
+    start = time.perf_counter_ns()
+    for name, temperature in pairs:
+        update(name, temperature)
+    return (time.perf_counter_ns() - start) / len(pairs)
+
+
+def bench_process_events(names: List[str], events: List[Dict[str, Any]]) -> float:
+    """
+    ns/sample of weather.process_events on a monitor already holding every station
+    :param names:
+    :param events:
+    :return:
+    """
+    weather.stations_montior.reset()
+    weather.latest_timestamp = None
+    for name in names:
+        weather.stations_montior.update(name, 0.0)
+    start = time.perf_counter_ns()
+    for _ in weather.process_events(events):
+        pass
+    elapsed = time.perf_counter_ns() - start
+    weather.stations_montior.reset()
+    weather.latest_timestamp = None
+    return elapsed / len(events)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--samples", type=int, default=200_000, help="timed samples per run")
+    parser.add_argument("--max-stations", type=int, default=STATION_COUNTS[-1])
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    print(f"{'stations':>10} {'monitor ns/sample':>18} {'process_events ns/sample':>25}")
+    for count in (c for c in STATION_COUNTS if c <= args.max_stations):
+        names = [f"Station {i}" for i in range(count)]
+        events = _make_events(names, args.samples, args.seed)
+        monitor_ns = bench_monitor(names, events)
+        process_ns = bench_process_events(names, events)
+        print(f"{count:>10} {monitor_ns:>18.1f} {process_ns:>25.1f}")
+
+
+if __name__ == "__main__":
+    main()
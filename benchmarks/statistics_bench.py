@@ -0,0 +1,79 @@
+"""
+Per-sample overhead of the optional per-station statistics (Welford mean/variance and the
+P-square percentile sketch), and their memory per station.
+
+    PYTHONPATH=. python -m benchmarks.statistics_bench [--samples N] [--stations N]
+"""
+import argparse
+import random
+import time
+import tracemalloc
+from typing import Any, Dict, List
+
+from interview.weather import WeatherEngine
+
+
+def _make_events(samples: int, stations: int, seed: int) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    return [
+        {
+            "type"       : "sample",
+            "stationName": f"Station {rng.randrange(stations)}",
+            "timestamp"  : 1672531200000 + i,
+            "temperature": rng.uniform(-30.0, 110.0)
+        }
+        for i in range(samples)
+    ]
+
+
+def bench(events: List[Dict[str, Any]], statistics: bool) -> float:
+    """
+    ns/sample of WeatherEngine.process_events, samples not echoed
+    :param events:
+    :param statistics: with the per-station statistics
+    :return:
+    """
+    best = float("inf")
+    for _ in range(3):
+        engine = WeatherEngine(echo="none", statistics=statistics)
+        start = time.perf_counter_ns()
+        for _ in engine.process_events(events):
+            pass
+        best = min(best, (time.perf_counter_ns() - start) / len(events))
+    return best
+
+
+def memory_per_station(stations: int, statistics: bool) -> float:
+    events = _make_events(stations * 20, stations, seed=1)
+    tracemalloc.start()
+    engine = WeatherEngine(echo="none", statistics=statistics)
+    for _ in engine.process_events(events):
+        pass
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current / stations
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--samples", type=int, default=300_000)
+    parser.add_argument("--stations", type=int, default=1_000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    events = _make_events(args.samples, args.stations, args.seed)
+    plain = bench(events, statistics=False)
+    with_statistics = bench(events, statistics=True)
+    print(f"high/low only   : {plain:>8.0f} ns/sample")
+    print(f"with statistics : {with_statistics:>8.0f} ns/sample "
+          f"(+{with_statistics - plain:.0f} ns, {with_statistics / plain:.1f}x)")
+    stations = 10_000
+    plain_memory = memory_per_station(stations, statistics=False)
+    statistics_memory = memory_per_station(stations, statistics=True)
+    print(f"memory/station  : {plain_memory:>8.0f} B high/low only, "
+          f"{statistics_memory:.0f} B with statistics")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,301 @@
+"""
+Benchmark suite: events/sec, per-event latency and peak RSS of process_events and of the
+`python -m interview` pipe, over seeded synthetic streams.
+
+    PYTHONPATH=. python -m benchmarks.suite run [--scenarios a,b] [--scale X] [--output PATH]
+    PYTHONPATH=. python -m benchmarks.suite compare RESULTS BASELINE [--tolerance X]
+
+Scenarios vary the station cardinality (1 to 1M), the ratio of control to sample messages,
+the snapshot frequency and the reset frequency. Every scenario runs in a fresh process and
+generates its stream as it is consumed, so peak RSS is its own. process_events latency is
+measured per event, from the event being pulled from the input to its output being yielded;
+the pipe path reports the sampled ingest-to-emit histogram of a trailing stats command
+(log2 buckets, within 2x).
+Results are JSON; compare exits with status 1 on a regression beyond the tolerance.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from array import array
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional
+
+from interview.weather import WeatherEngine
+
+
+PROCESS_EVENTS = "process_events"
+PIPE = "pipe"
+
+
+class Scenario(NamedTuple):
+    events: int
+    stations: int
+    control_ratio: float = 0.0  # share of snapshot_delta control messages
+    snapshot_every: int = 0  # a snapshot every N events, 0 for none
+    reset_every: int = 0  # a reset every N events, 0 for none
+
+
+SCENARIOS = {
+    "stations-1"       : Scenario(events=300_000, stations=1),
+    "stations-1k"      : Scenario(events=300_000, stations=1_000),
+    "stations-100k"    : Scenario(events=300_000, stations=100_000),
+    "stations-1m"      : Scenario(events=2_000_000, stations=1_000_000),
+    "controls-10pct"   : Scenario(events=300_000, stations=1_000, control_ratio=0.1),
+    "snapshot-every-1k": Scenario(events=300_000, stations=10_000, snapshot_every=1_000),
+    "reset-every-10k"  : Scenario(events=300_000, stations=10_000, snapshot_every=5_000,
+                                  reset_every=10_000),
+}
+
+
+def generate_events(scenario: Scenario, seed: int) -> Iterator[Dict[str, Any]]:
+    """
+    Seeded synthetic stream of a scenario
+    :param scenario:
+    :param seed:
+    :return: input dicts {str: Any} messages
+    """
+    rng = random.Random(seed)
+    for i in range(scenario.events):
+        if scenario.reset_every and i % scenario.reset_every == scenario.reset_every - 1:
+            yield {"type": "control", "command": "reset"}
+        elif scenario.snapshot_every and i % scenario.snapshot_every == scenario.snapshot_every - 1:
+            yield {"type": "control", "command": "snapshot"}
+        elif scenario.control_ratio and rng.random() < scenario.control_ratio:
+            yield {"type": "control", "command": "snapshot_delta"}
+        else:
+            yield {
+                "type"       : "sample",
+                "stationName": f"Station {rng.randrange(scenario.stations)}",
+                "timestamp"  : 1672531200000 + i,
+                "temperature": round(rng.uniform(-30.0, 110.0), 1)
+            }
+
+
+def _scaled(scenario: Scenario, scale: float) -> Scenario:
+    return scenario._replace(events=max(1, int(scenario.events * scale)))
+
+
+def _percentile(ordered: array, q: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] / 1000
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux, in bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1 << 20 if sys.platform == "darwin" else 1 << 10), 1)
+
+
+def run_process_events(scenario: Scenario, seed: int) -> Dict[str, Any]:
+    """
+    Time process_events in this process, on a stream generated as it is consumed so peak
+    RSS is the engine's; generating the events is left out of the elapsed time
+    :param scenario:
+    :param seed:
+    :return: result dict
+    """
+    clock = time.perf_counter_ns
+    latencies = array("q")
+    pulled = 0
+    generating = 0
+
+    def source() -> Iterator[Dict[str, Any]]:
+        nonlocal pulled, generating
+        events = generate_events(scenario, seed)
+        while True:
+            started = clock()
+            event = next(events, None)
+            pulled = clock()
+            generating += pulled - started
+            if event is None:
+                return
+            yield event
+
+    record = latencies.append
+    start = clock()
+    for _ in WeatherEngine().process_events(source()):
+        record(clock() - pulled)
+    elapsed = (clock() - start - generating) / 1e9
+    ordered = array("q", sorted(latencies))
+    return {
+        "eventsPerSecond": round(scenario.events / elapsed),
+        "p50Us"          : round(_percentile(ordered, 0.50), 3),
+        "p99Us"          : round(_percentile(ordered, 0.99), 3),
+        "peakRssMb"      : _peak_rss_mb(),
+    }
+
+
+def _write_input(path: str, scenario: Scenario, seed: int) -> None:
+    # the stream as JSON lines, with a trailing stats command reporting the latencies
+    with open(path, "w", encoding="utf-8") as file:
+        for event in generate_events(scenario, seed):
+            file.write(json.dumps(event) + "\n")
+        file.write(json.dumps({"type": "control", "command": "stats"}) + "\n")
+
+
+def run_pipe(scenario: Scenario, seed: int) -> Dict[str, Any]:
+    """
+    Time `python -m interview` reading the stream from a file, output to a file
+    :param scenario:
+    :param seed:
+    :return: result dict
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        input_path = os.path.join(directory, "input.jsonl")
+        output_path = os.path.join(directory, "output.jsonl")
+        _write_input(input_path, scenario, seed)
+        with open(input_path, "rb") as stdin, open(output_path, "wb") as stdout:
+            start = time.perf_counter()
+            # waited with wait4 rather than wait, for the child's own resource usage
+            # pylint: disable-next=consider-using-with
+            process = subprocess.Popen([sys.executable, "-m", "interview"],
+                                       stdin=stdin, stdout=stdout)
+            _, status, usage = os.wait4(process.pid, 0)
+            elapsed = time.perf_counter() - start
+            process.returncode = os.waitstatus_to_exitcode(status)
+        if process.returncode:
+            raise RuntimeError(f"python -m interview exited with {process.returncode}")
+        with open(output_path, "rb") as file:
+            file.seek(max(0, os.path.getsize(output_path) - (1 << 16)))
+            stats = json.loads(file.read().splitlines()[-1])
+    latency = stats["metrics"]["latencies"]["ingestToEmit"]
+    return {
+        "eventsPerSecond": round(scenario.events / elapsed),
+        "p50Us"          : latency["p50Us"],
+        "p99Us"          : latency["p99Us"],
+        "peakRssMb"      : round(usage.ru_maxrss / (1 << 20 if sys.platform == "darwin"
+                                                    else 1 << 10), 1),
+    }
+
+
+def _run_child(name: str, mode: str, scale: float, seed: int) -> Dict[str, Any]:
+    # a fresh interpreter per scenario keeps peak RSS per scenario
+    child = subprocess.run([sys.executable, "-m", "benchmarks.suite", "_child", name, mode,
+                            "--scale", str(scale), "--seed", str(seed)],
+                           check=True, capture_output=True)
+    return json.loads(child.stdout)
+
+
+def run(names: List[str], scale: float, seed: int) -> Dict[str, Any]:
+    results = []
+    for name in names:
+        scenario = _scaled(SCENARIOS[name], scale)
+        for mode in (PROCESS_EVENTS, PIPE):
+            result = {"scenario": name, "mode": mode, "events": scenario.events,
+                      **_run_child(name, mode, scale, seed)}
+            print(f"{name:<18} {mode:<15} {result['eventsPerSecond']:>12,} ev/s "
+                  f"p50 {result['p50Us']:>9.3f}us p99 {result['p99Us']:>9.3f}us "
+                  f"rss {result['peakRssMb']:>8.1f}MB", file=sys.stderr)
+            results.append(result)
+    return {
+        "python" : platform.python_version(),
+        "machine": platform.machine(),
+        "scale"  : scale,
+        "seed"   : seed,
+        "results": results,
+    }
+
+
+def compare(current: Dict[str, Any],
+            baseline: Dict[str, Any],
+            tolerance: float,
+            latency_tolerance: float) -> List[str]:
+    """
+    Regressions of current against baseline, scenarios missing from either are skipped
+    :param current: results of run
+    :param baseline: results of run
+    :param tolerance: allowed relative throughput drop and peak RSS growth
+    :param latency_tolerance: allowed relative p99 latency growth
+    :return: one message per regression
+    :raises ValueError: when the runs used a different scale or seed, their streams differ
+    """
+    for key in ("scale", "seed"):
+        if current.get(key) != baseline.get(key):
+            raise ValueError(f"results of {key} {current.get(key)} are not comparable to "
+                             f"a baseline of {key} {baseline.get(key)}")
+    known = {(result["scenario"], result["mode"]): result for result in baseline["results"]}
+    regressions = []
+    for result in current["results"]:
+        base = known.get((result["scenario"], result["mode"]))
+        if base is None:
+            continue
+        label = f"{result['scenario']} {result['mode']}"
+        if result["eventsPerSecond"] < base["eventsPerSecond"] * (1 - tolerance):
+            regressions.append(f"{label}: {result['eventsPerSecond']:,} events/sec, "
+                               f"baseline {base['eventsPerSecond']:,}")
+        if result["peakRssMb"] > base["peakRssMb"] * (1 + tolerance):
+            regressions.append(f"{label}: peak RSS {result['peakRssMb']}MB, "
+                               f"baseline {base['peakRssMb']}MB")
+        if result["p99Us"] > base["p99Us"] * (1 + latency_tolerance):
+            regressions.append(f"{label}: p99 {result['p99Us']}us, baseline {base['p99Us']}us")
+    return regressions
+
+
+def _parse_args(argv: Optional[List[str]]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    run_parser = commands.add_parser("run", help="run the scenarios, write JSON results")
+    run_parser.add_argument("--scenarios", default=",".join(SCENARIOS),
+                            help="comma separated scenario names (default: all)")
+    run_parser.add_argument("--scale", type=float, default=1.0,
+                            help="multiply the events of every scenario, e.g. 0.1 for a quick run")
+    run_parser.add_argument("--seed", type=int, default=42)
+    run_parser.add_argument("--output", metavar="PATH", help="results file (default: STDOUT)")
+    compare_parser = commands.add_parser("compare", help="compare results against a baseline")
+    compare_parser.add_argument("results")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("--tolerance", type=float, default=0.25,
+                                help="allowed throughput drop and RSS growth (default: 0.25)")
+    compare_parser.add_argument("--latency-tolerance", type=float, default=1.0,
+                                help="allowed p99 latency growth (default: 1.0)")
+    child_parser = commands.add_parser("_child")
+    child_parser.add_argument("scenario", choices=SCENARIOS)
+    child_parser.add_argument("mode", choices=(PROCESS_EVENTS, PIPE))
+    child_parser.add_argument("--scale", type=float, default=1.0)
+    child_parser.add_argument("--seed", type=int, default=42)
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = _parse_args(argv)
+    if args.command == "_child":
+        scenario = _scaled(SCENARIOS[args.scenario], args.scale)
+        runner = run_process_events if args.mode == PROCESS_EVENTS else run_pipe
+        print(json.dumps(runner(scenario, args.seed)))
+    elif args.command == "run":
+        names = args.scenarios.split(",")
+        unknown = set(names) - set(SCENARIOS)
+        if unknown:
+            sys.exit(f"unknown scenarios: {', '.join(sorted(unknown))}")
+        results = json.dumps(run(names, args.scale, args.seed), indent=2)
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as file:
+                file.write(results + "\n")
+        else:
+            print(results)
+    else:
+        with open(args.results, encoding="utf-8") as file:
+            current = json.load(file)
+        with open(args.baseline, encoding="utf-8") as file:
+            baseline = json.load(file)
+        try:
+            regressions = compare(current, baseline, args.tolerance, args.latency_tolerance)
+        except ValueError as exc:
+            sys.exit(str(exc))
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+        print(f"no regression against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
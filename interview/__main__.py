@@ -1,10 +1,307 @@
+import argparse
+import contextlib
+import itertools
 import json
+import signal
 import sys
-from . import weather
+from typing import Any, BinaryIO, Callable, Dict, Generator, Iterable, Iterator, List, Optional
 
-def generate_input():
-    for line in sys.stdin:
-        yield json.loads(line)
+from . import codec as codecs, weather
+from .checkpoint import CHECKPOINT_INTERVAL, Checkpointer, read_checkpoint
+from .eviction import StationEviction
+from .feeds import merge_feeds
+from .frames import encode_frames, read_frames
+from .metrics import Metrics
+from .partials import dump_partial, load_partial, merge_partials
+from .streamio import BACKFILL_CHUNK_SIZE, OutputBuffer, read_chunks, skip_lines
 
-for output in weather.process_events(generate_input()):
-    print(json.dumps(output))
+Processor = Callable[[Iterable[Dict[str, Any]]], Generator[Dict[str, Any], None, None]]
+
+
+def generate_input(skip: int = 0,
+                   codec: Optional[codecs.JsonCodec] = None) -> Iterator[Dict[str, Any]]:
+    loads = (codec or codecs.JsonCodec()).loads
+    for line in itertools.islice(sys.stdin, skip, None):
+        yield loads(line)
+
+
+def generate_buffered_input(output: OutputBuffer,
+                            skip: int = 0,
+                            codec: Optional[codecs.JsonCodec] = None) -> Iterator[Dict[str, Any]]:
+    iter_lines = (codec or codecs.JsonCodec()).iter_lines
+    # pending outputs are flushed before blocking on the next read
+    for chunk in skip_lines(read_chunks(sys.stdin.buffer, before_read=output.flush), skip):
+        yield from iter_lines(chunk)
+
+
+def generate_feed(stream: BinaryIO,
+                  output: OutputBuffer,
+                  input_format: str = "json",
+                  codec: Optional[codecs.JsonCodec] = None) -> Iterator[Dict[str, Any]]:
+    if input_format == "binary":
+        return read_frames(stream, before_read=output.flush)
+    iter_lines = (codec or codecs.JsonCodec()).iter_lines
+    return (event for chunk in read_chunks(stream, before_read=output.flush)
+            for event in iter_lines(chunk))
+
+
+def _parse_args(argv: Optional[List[str]]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m interview",
+                                     description="Aggregate weather samples from STDIN "
+                                                 "into JSON lines on STDOUT")
+    parser.add_argument("--io", choices=("buffered", "line", "pipelined"), default="buffered",
+                        help="buffered: chunked reads and batched writes (default), "
+                             "line: one read, print and flush per line, "
+                             "pipelined: asyncio reader/decoder/aggregator/writer stages")
+    parser.add_argument("--input-format", choices=("json", "binary"), default="json",
+                        help="json: one JSON message per line (default), binary: length "
+                             "prefixed frames, see interview.frames; outputs are JSON lines")
+    parser.add_argument("--input", action="append", dest="inputs", metavar="PATH",
+                        help="read PATH instead of STDIN, - for STDIN; repeated, the inputs "
+                             "are merged by sample timestamp, see interview.feeds")
+    parser.add_argument("--codec", choices=codecs.CODECS, default=codecs.AUTO,
+                        help="JSON codec, auto: orjson when installed, stdlib otherwise "
+                             "(default: %(default)s); outputs are the same bytes either way")
+    parser.add_argument("--strict", action="store_true",
+                        help="validate every input message with the pydantic models; by "
+                             "default pydantic is only loaded for a message failing the fast "
+                             "checks, which keeps startup short")
+    parser.add_argument("--queue-stats", action="store_true",
+                        help="pipelined: report the stage queue depths on STDERR at exit")
+    parser.add_argument("--echo", choices=weather.ECHO_MODES, default=weather.ECHO,
+                        help="sample output, echo: the decoded sample (default), none: nothing, "
+                             "heartbeat: a sample count every --heartbeat-every samples, "
+                             "passthrough: the input object as is")
+    parser.add_argument("--heartbeat-every", type=int, default=weather.HEARTBEAT_EVERY,
+                        metavar="N", help="samples per heartbeat (default: %(default)s)")
+    parser.add_argument("--stats-file", metavar="PATH",
+                        help="append the engine metrics to PATH as JSON lines, periodically")
+    parser.add_argument("--stats-interval", type=float, default=10.0, metavar="SECONDS",
+                        help="seconds between two --stats-file dumps (default: %(default)s)")
+    parser.add_argument("--checkpoint", metavar="PATH",
+                        help="checkpoint the aggregates to PATH periodically and at end of input; "
+                             "an existing checkpoint is restored and its input lines skipped")
+    parser.add_argument("--checkpoint-interval", type=float, default=CHECKPOINT_INTERVAL,
+                        metavar="SECONDS",
+                        help="seconds between two checkpoints (default: %(default)s)")
+    parser.add_argument("--statistics", action="store_true",
+                        help="add count, mean, stddev, p5, p50 and p95 per station to snapshots")
+    parser.add_argument("--topk", action="store_true",
+                        help="rank the hottest and coldest stations as samples arrive, queried "
+                             "with {\"type\": \"control\", \"command\": \"topk\", \"k\": K}")
+    parser.add_argument("--max-stations", type=int, metavar="N",
+                        help="track at most N stations, evicting the least recently reported")
+    parser.add_argument("--idle-ttl", type=int, metavar="MS",
+                        help="evict the stations without a sample in the last MS milliseconds "
+                             "of sample time")
+    parser.add_argument("--emit-evictions", action="store_true",
+                        help="output an eviction message with the stations evicted")
+    parser.add_argument("--profile-dir", metavar="DIR",
+                        help="enable the profile_start and profile_stop control commands, and "
+                             "SIGUSR1 as a toggle, writing cProfile stats and the top "
+                             "tracemalloc allocation sites of each session to DIR")
+    parser.add_argument("--window-retention", type=int, metavar="MS",
+                        help="keep rolling window high/low over the last MS milliseconds, "
+                             "queried with {\"type\": \"control\", \"command\": "
+                             "\"snapshot_window\", \"window\": MS}")
+    parser.add_argument("--shards", type=int, default=0,
+                        help="aggregate in N worker processes, by station name hash")
+    parser.add_argument("--export-state", metavar="PATH",
+                        help="write the partial aggregation state to PATH at end of input")
+    commands = parser.add_subparsers(dest="command")
+    merge = commands.add_parser("merge", help="merge exported partial states into a snapshot")
+    merge.add_argument("files", nargs="+", metavar="PATH", help="exported partial state files")
+    backfill = commands.add_parser("backfill", help="replay JSONL archives, plain or gzip, bz2 "
+                                                    "or xz compressed, decoded in parallel")
+    backfill.add_argument("files", nargs="+", metavar="PATH", help="archives, in order")
+    backfill.add_argument("--workers", type=int, default=None,
+                          help="worker processes (default: CPU count, 0 for none)")
+    backfill.add_argument("--chunk-size", type=int, default=BACKFILL_CHUNK_SIZE, metavar="BYTES",
+                          help="input bytes per task (default: %(default)s)")
+    commands.add_parser("frames", help="convert JSON messages on STDIN into binary frames "
+                                       "on STDOUT, for --input-format binary")
+    serve = commands.add_parser("serve", help="serve independent streams over sockets, "
+                                              "one per connection")
+    serve.add_argument("--unix", metavar="PATH", help="listen on a Unix domain socket")
+    serve.add_argument("--host", default="127.0.0.1", help="TCP host (default: 127.0.0.1)")
+    serve.add_argument("--port", type=int, default=8765, help="TCP port (default: 8765)")
+    args = parser.parse_args(argv)
+    _check_args(parser, args)
+    return args
+
+
+def _check_args(parser: argparse.ArgumentParser, args: argparse.Namespace) -> None:
+    if args.shards > 0 and args.echo != weather.ECHO:
+        parser.error("--echo is not supported with --shards")
+    evicting = args.max_stations is not None or args.idle_ttl is not None
+    if args.shards > 0 and any((args.checkpoint, args.window_retention, args.statistics,
+                                args.topk, args.strict, evicting, args.profile_dir)):
+        parser.error("--checkpoint, --window-retention, --statistics, --topk, --strict, "
+                     "--max-stations, --idle-ttl and --profile-dir are not supported with "
+                     "--shards")
+    if args.command == "backfill" and any((args.shards > 0, args.checkpoint, args.strict,
+                                           args.window_retention, args.statistics, evicting)):
+        parser.error("--shards, --checkpoint, --strict, --window-retention, --statistics, "
+                     "--max-stations and --idle-ttl are not supported by backfill")
+    if args.checkpoint and (args.statistics or args.window_retention is not None):
+        # a checkpoint holds the high/low aggregates only
+        parser.error("--statistics and --window-retention are not supported with --checkpoint")
+    if args.max_stations is not None and args.max_stations < 1:
+        parser.error("--max-stations must be positive")
+    if args.idle_ttl is not None and args.idle_ttl < 1:
+        parser.error("--idle-ttl must be positive")
+    if args.emit_evictions and not evicting:
+        parser.error("--emit-evictions requires --max-stations or --idle-ttl")
+    if args.window_retention is not None and args.window_retention < 1:
+        parser.error("--window-retention must be positive")
+    if args.heartbeat_every < 1:
+        parser.error("--heartbeat-every must be positive")
+    if args.input_format == "binary" and args.io != "buffered":
+        parser.error("--input-format binary is read with --io buffered")
+    if args.inputs and (args.io != "buffered" or args.command is not None):
+        parser.error("--input is read with --io buffered, without a command")
+    if args.codec not in (codecs.AUTO, *codecs.available_codecs()):
+        parser.error(f"--codec {args.codec} is not installed")
+
+
+def _merge(paths: List[str]) -> None:
+    partials = []
+    for path in paths:
+        with open(path, "rb") as file:
+            partials.append(load_partial(file.read()))
+    stations, as_of = merge_partials(partials)
+    if as_of is not None:
+        print(json.dumps(weather.snapshot_output(stations, as_of)))
+
+
+def _run(args: argparse.Namespace,
+         process: Processor,
+         skip: int = 0,
+         metrics: Optional[Metrics] = None) -> None:
+    codec = codecs.get_codec(args.codec)
+    if args.io == "line":
+        for output in process(generate_input(skip, codec)):
+            print(codec.encode(output).decode())
+        return
+    if args.io == "pipelined":
+        # asyncio is only imported by the pipelined and serve modes
+        from .pipeline import PipelinedRunner  # pylint: disable=import-outside-toplevel
+        runner = PipelinedRunner(process, skip=skip, codec=codec)
+        try:
+            runner.run(sys.stdin.buffer, sys.stdout.buffer)
+        finally:
+            if args.queue_stats:
+                print(json.dumps(runner.stats_dict()), file=sys.stderr)
+        return
+
+    output_buffer = OutputBuffer(sys.stdout.buffer, encode=codec.encode, metrics=metrics)
+    events: Iterable[Dict[str, Any]]
+    with contextlib.ExitStack() as files:
+        if args.inputs:
+            feeds = [generate_feed(sys.stdin.buffer if path == "-"
+                                   else files.enter_context(open(path, "rb")),
+                                   output_buffer, args.input_format, codec)
+                     for path in args.inputs]
+            # a checkpoint counts the merged events
+            events = itertools.islice(merge_feeds(feeds), skip, None)
+        elif args.input_format == "binary":
+            events = read_frames(sys.stdin.buffer, before_read=output_buffer.flush, skip=skip)
+        else:
+            events = generate_buffered_input(output_buffer, skip, codec)
+        try:
+            for output in process(events):
+                output_buffer.write(output)
+        finally:
+            output_buffer.flush()
+
+
+def _backfill(args: argparse.Namespace, engine: weather.WeatherEngine) -> None:
+    # multiprocessing is only imported by the backfill and sharded modes
+    from .backfill import Backfill  # pylint: disable=import-outside-toplevel
+    runner = Backfill(engine, args.workers, args.chunk_size, codecs.get_codec(args.codec))
+    output = sys.stdout.buffer
+    try:
+        for data in runner.run(args.files):
+            output.write(data)
+    finally:
+        output.flush()
+
+
+def _export(path: str, data: bytes) -> None:
+    with open(path, "wb") as file:
+        file.write(data)
+
+
+def _engine(args: argparse.Namespace) -> weather.WeatherEngine:
+    checkpointer = None
+    if args.checkpoint:
+        checkpointer = Checkpointer(args.checkpoint, args.checkpoint_interval)
+    eviction = None
+    if args.max_stations is not None or args.idle_ttl is not None:
+        eviction = StationEviction(args.max_stations, args.idle_ttl)
+    profiler = None
+    if args.profile_dir:
+        # cProfile is only imported when profiling is enabled
+        from .profiling import Profiler  # pylint: disable=import-outside-toplevel
+        profiler = Profiler(args.profile_dir)
+        if hasattr(signal, "SIGUSR1"):
+            toggle = profiler.toggle
+            signal.signal(signal.SIGUSR1, lambda _signum, _frame: toggle())
+    return weather.WeatherEngine(echo=args.echo, heartbeat_every=args.heartbeat_every,
+                                  metrics=Metrics(dump_path=args.stats_file,
+                                                  dump_interval=args.stats_interval),
+                                  checkpointer=checkpointer,
+                                  window_retention=args.window_retention,
+                                  statistics=args.statistics,
+                                  topk=args.topk,
+                                  strict=args.strict,
+                                  eviction=eviction,
+                                  emit_evictions=args.emit_evictions,
+                                  profiler=profiler)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = _parse_args(argv)
+    if args.command == "merge":
+        _merge(args.files)
+        return
+    if args.command == "frames":
+        codec = codecs.get_codec(args.codec)
+        for frames in encode_frames(generate_input(codec=codec)):
+            sys.stdout.buffer.write(frames)
+        return
+    if args.command == "serve":
+        from . import server  # pylint: disable=import-outside-toplevel
+        server.serve(args.unix, args.host, args.port, codecs.get_codec(args.codec))
+        return
+
+    if args.shards > 0:
+        from .sharding import ShardedRunner  # pylint: disable=import-outside-toplevel
+        with ShardedRunner(args.shards) as runner:
+            _run(args, runner.process_events)
+            if args.export_state:
+                stations, as_of = merge_partials(runner.partials())
+                _export(args.export_state, dump_partial(stations, as_of))
+        return
+
+    engine = _engine(args)
+    if args.command == "backfill":
+        _backfill(args, engine)
+        if args.export_state:
+            _export(args.export_state, dump_partial(engine.stations, engine.latest_timestamp))
+        return
+
+    skip = 0
+    checkpoint = read_checkpoint(args.checkpoint) if args.checkpoint else None
+    if checkpoint is not None:
+        engine.restore(checkpoint)
+        skip = checkpoint.lines
+    _run(args, engine.process_events, skip, engine.metrics)
+    if engine.checkpointer is not None:
+        engine.write_checkpoint()
+    if args.export_state:
+        _export(args.export_state, dump_partial(engine.stations, engine.latest_timestamp))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,331 @@
+import bz2
+import gzip
+import lzma
+import math
+import mmap
+import multiprocessing
+from array import array
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from itertools import accumulate, chain
+from typing import (Any, BinaryIO, Callable, Deque, Dict, Iterable, Iterator, List, NamedTuple,
+                    Optional, Tuple)
+
+from interview.codec import JsonCodec, get_codec
+from interview.decoding import CONTROL, SAMPLE, decode_event
+from interview.streamio import BACKFILL_CHUNK_SIZE
+from interview.weather import (ECHO, ECHO_HEARTBEAT, ECHO_PASSTHROUGH, WeatherEngine,
+                               heartbeat_output)
+
+
+_COMPRESSED: Tuple[Tuple[bytes, Callable[..., Any]], ...] = (
+    # magic bytes, opener of the decompressed stream
+    (b"\x1f\x8b", gzip.open),
+    (b"BZh", bz2.open),
+    (b"\xfd7zXZ\x00", lzma.open),
+)
+
+# A chunk of input: the (path, start, end) byte range of a plain file, mapped by the worker,
+# or the decompressed bytes themselves
+Source = Any
+
+
+class Segment(NamedTuple):
+    """
+    Pre-aggregated run of samples of a chunk, up to the control message ending it.
+    Per station, in order of first appearance in the run: the position of its first sample
+    in the run, whether that sample is NaN, and the records of the run's high and low, the
+    (position, temperature) of each sample raising the high (or lowering the low) so far,
+    NaN samples left out. The station's records i are [ends[i - 1], ends[i]) of the arrays.
+    The first record beyond the station's high before the run is the first sample the
+    serial engine would change the station on, which orders the stations of snapshot deltas.
+    """
+    outputs: bytes  # encoded sample echoes, JSON lines
+    names: List[str]
+    firsts: array  # q
+    nan_first: bytes
+    high_ends: array  # q
+    high_positions: array  # q
+    high_values: array  # d
+    low_ends: array  # q
+    low_positions: array  # q
+    low_values: array  # d
+    samples: int
+    as_of: Optional[int]  # timestamp of the last sample of the run
+    control: Optional[Dict[str, Any]]  # input object of the control message ending the run
+    error: Optional[str]  # message of the error ending the chunk
+
+
+def _segment(outputs: bytearray,  # pylint: disable=too-many-arguments
+             stations: Dict[str, List[Any]],
+             samples: int,
+             as_of: Optional[int],
+             control: Optional[Dict[str, Any]] = None,
+             error: Optional[str] = None) -> Segment:
+    # station runs are [first position, NaN first, high positions, high values,
+    # low positions, low values], flattened into arrays: pickled as a copy of their buffer
+    runs = list(stations.values())
+    return Segment(
+        bytes(outputs), list(stations), array("q", (run[0] for run in runs)),
+        bytes(run[1] for run in runs),
+        array("q", accumulate(len(run[2]) for run in runs)),
+        array("q", chain.from_iterable(run[2] for run in runs)),
+        array("d", chain.from_iterable(run[3] for run in runs)),
+        array("q", accumulate(len(run[4]) for run in runs)),
+        array("q", chain.from_iterable(run[4] for run in runs)),
+        array("d", chain.from_iterable(run[5] for run in runs)),
+        samples, as_of, control, error,
+    )
+
+
+def open_archive(path: str) -> BinaryIO:
+    """
+    Open a JSONL file, transparently decompressing gzip, bz2 and xz by their magic bytes
+    :param path:
+    :return: binary stream of the JSON lines
+    """
+    with open(path, "rb") as file:
+        head = file.read(6)
+    for magic, opener in _COMPRESSED:
+        if head.startswith(magic):
+            return opener(path, "rb")
+    return open(path, "rb")  # pylint: disable=consider-using-with
+
+
+def plan_chunks(path: str, chunk_size: int = BACKFILL_CHUNK_SIZE) -> Iterator[Source]:
+    """
+    Split a file into chunks of complete lines, in order. A plain file is split into byte
+    ranges the workers map themselves; a compressed one is decompressed here, in sequence.
+    :param path:
+    :param chunk_size: approximate bytes per chunk
+    :return: chunk sources for process_chunk
+    """
+    with open_archive(path) as stream:
+        if isinstance(stream, (gzip.GzipFile, bz2.BZ2File, lzma.LZMAFile)):
+            pending = b""
+            while block := stream.read(chunk_size):
+                data = pending + block
+                cut = data.rfind(b"\n") + 1
+                if cut:
+                    yield data[:cut]
+                pending = data[cut:]
+            if pending:
+                yield pending
+            return
+        size = stream.seek(0, 2)
+        if not size:
+            return
+        with mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            start = 0
+            while start < size:
+                end = mapped.find(b"\n", min(start + chunk_size, size) - 1) + 1 or size
+                yield path, start, end
+                start = end
+
+
+def _read_source(source: Source) -> bytes:
+    if isinstance(source, bytes):
+        return source
+    path, start, end = source
+    with open(path, "rb") as file, \
+            mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        return mapped[start:end]
+
+
+def process_chunk(source: Source, echo: str = ECHO, codec: Optional[str] = None) -> List[Segment]:
+    """
+    Decode a chunk of JSON lines and pre-aggregate its samples, run by run between control
+    messages. Control messages are left to the merging process, which applies them in order.
+    :param source: chunk from plan_chunks
+    :param echo: echo mode of the engine, echo and passthrough outputs are encoded here
+    :param codec: JSON codec name
+    :return: the runs of the chunk, the last one ends with the chunk or an error
+    """
+    # pylint: disable=too-many-locals
+    json_codec = get_codec(codec)
+    encode = json_codec.encode
+    echo_decoded = echo == ECHO
+    echo_input = echo == ECHO_PASSTHROUGH
+    segments: List[Segment] = []
+    outputs = bytearray()
+    stations: Dict[str, List[Any]] = {}
+    samples = 0
+    as_of: Optional[int] = None
+    try:
+        for line in json_codec.iter_lines(_read_source(source)):
+            msg = decode_event(line)
+            if msg["type"] == SAMPLE:
+                temperature = msg["temperature"]
+                run = stations.get(msg["stationName"])
+                if run is None:
+                    run = stations[msg["stationName"]] = [samples, math.isnan(temperature),
+                                                          [], [], [], []]
+                if temperature == temperature:  # pylint: disable=comparison-with-itself
+                    if not run[3] or temperature > run[3][-1]:
+                        run[2].append(samples)
+                        run[3].append(temperature)
+                    if not run[5] or temperature < run[5][-1]:
+                        run[4].append(samples)
+                        run[5].append(temperature)
+                samples += 1
+                as_of = msg["timestamp"]
+                if echo_decoded:
+                    outputs += encode(msg)
+                    outputs += b"\n"
+                elif echo_input:
+                    outputs += encode(line)
+                    outputs += b"\n"
+            elif msg["type"] == CONTROL:
+                segments.append(_segment(outputs, stations, samples, as_of, control=line))
+                outputs.clear()
+                stations.clear()
+                samples = 0
+                as_of = None
+    except ValueError as exc:
+        # pydantic ValidationError and json decoding errors are ValueErrors
+        segments.append(_segment(outputs, stations, samples, as_of, error=str(exc)))
+        return segments
+    segments.append(_segment(outputs, stations, samples, as_of))
+    return segments
+
+
+def _first_change(segment: Segment, station: int, current: Optional[Tuple[float, float]],
+                  ) -> Optional[int]:
+    """
+    Position of the first sample of the run the serial engine would change a station on
+    :param segment:
+    :param station: index of the station in the segment
+    :param current: high and low of the station before the run, None for a new station
+    :return: None when the run leaves the station unchanged
+    """
+    if current is None:
+        return segment.firsts[station]
+    high, low = current
+    change = None
+    start = segment.high_ends[station - 1] if station else 0
+    end = segment.high_ends[station]
+    # records increase, only a run raising the high is searched
+    if end > start and segment.high_values[end - 1] > high:
+        values = segment.high_values
+        change = next(segment.high_positions[record] for record in range(start, end)
+                      if values[record] > high)
+    start = segment.low_ends[station - 1] if station else 0
+    end = segment.low_ends[station]
+    if end > start and segment.low_values[end - 1] < low:
+        values = segment.low_values
+        lowered = next(segment.low_positions[record] for record in range(start, end)
+                       if values[record] < low)
+        change = lowered if change is None else min(change, lowered)
+    return change
+
+
+class Backfill:
+    """
+    Replay archived JSONL files through a WeatherEngine with the chunks decoded and
+    pre-aggregated in a process pool. Runs of samples are merged in input order, stations in
+    the order the serial engine would have changed them (which orders snapshot deltas), and
+    each control message is applied at its position: the outputs are the ones the serial
+    process_events produces. Statistics, rolling windows and station eviction need every
+    sample and are not supported.
+    """
+
+    def __init__(self,
+                 engine: WeatherEngine,
+                 workers: Optional[int] = None,
+                 chunk_size: int = BACKFILL_CHUNK_SIZE,
+                 codec: Optional[JsonCodec] = None) -> None:
+        if engine.statistics is not None or engine.windows is not None:
+            raise ValueError("backfill does not support statistics or rolling windows")
+        if engine.eviction is not None:
+            raise ValueError("backfill does not support station eviction")
+        self.engine = engine
+        self.workers = multiprocessing.cpu_count() if workers is None else workers
+        self.chunk_size = chunk_size
+        self.codec = codec or JsonCodec()
+
+    def run(self, paths: Iterable[str]) -> Iterator[bytes]:
+        """
+        Process the files in order
+        :param paths: plain, gzip, bz2 or xz JSONL files
+        :return: encoded outputs, JSON lines
+        """
+        sources = (source for path in paths for source in plan_chunks(path, self.chunk_size))
+        if self.workers <= 0:
+            # in this process, e.g. for debugging
+            for source in sources:
+                yield from self._merge(process_chunk(source, self.engine.echo, self.codec.name))
+            return
+        with ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context()) as pool:
+            for segments in self._ordered(pool, sources):
+                yield from self._merge(segments)
+
+    def _ordered(self, pool: Executor, sources: Iterator[Source]) -> Iterator[List[Segment]]:
+        # a bounded window of chunks in flight, results in input order
+        pending: Deque[Future] = deque()
+        echo = self.engine.echo
+        try:
+            for source in sources:
+                pending.append(pool.submit(process_chunk, source, echo, self.codec.name))
+                if len(pending) >= 2 * self.workers:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+    def _merge(self, segments: List[Segment]) -> Iterator[bytes]:
+        engine = self.engine
+        stations = engine.stations
+        encode = self.codec.encode
+        for segment in segments:
+            if segment.outputs:
+                yield segment.outputs
+            changes = []
+            for station, name in enumerate(segment.names):
+                position = _first_change(segment, station, stations.get(name))
+                if position is not None:
+                    changes.append((position, station))
+            changes.sort()
+            for _, station in changes:
+                name = segment.names[station]
+                if segment.nan_first[station] and stations.get(name) is None:
+                    # a NaN first sample sticks, as in StationsMonitor.update
+                    stations.merge(name, math.nan, math.nan)
+                else:
+                    stations.merge(name, segment.high_values[segment.high_ends[station] - 1],
+                                   segment.low_values[segment.low_ends[station] - 1])
+            if segment.samples:
+                yield from self._heartbeats(segment.samples)
+                engine.samples += segment.samples
+                engine.metrics.events += segment.samples
+                engine.latest_timestamp = segment.as_of
+            if segment.error is not None:
+                raise ValueError(segment.error)
+            if segment.control is not None:
+                for output in engine.process_events([segment.control]):
+                    yield encode(output) + b"\n"
+
+    def _heartbeats(self, samples: int) -> Iterator[bytes]:
+        engine = self.engine
+        if engine.echo != ECHO_HEARTBEAT:
+            return
+        every = engine.heartbeat_every
+        for count in range((engine.samples // every + 1) * every, engine.samples + samples + 1,
+                           every):
+            yield self.codec.encode(heartbeat_output(count)) + b"\n"
+
+
+def backfill(paths: Iterable[str],
+             engine: Optional[WeatherEngine] = None,
+             workers: Optional[int] = None,
+             chunk_size: int = BACKFILL_CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    Replay archived JSONL files, see Backfill
+    :param paths: plain, gzip, bz2 or xz JSONL files
+    :param engine: engine to replay into, a new one by default
+    :param workers: worker processes, the CPU count by default, 0 for none
+    :param chunk_size: approximate input bytes per task
+    :return: encoded outputs, JSON lines
+    """
+    return Backfill(engine or WeatherEngine(), workers, chunk_size).run(paths)
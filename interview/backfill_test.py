@@ -0,0 +1,108 @@
+import bz2
+import gzip
+import json
+import lzma
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from .backfill import backfill, plan_chunks
+from .codec import JsonCodec
+from .weather import ECHO_MODES, WeatherEngine
+
+
+def generate_archive(samples: int, stations: int, seed: int):
+    rng = random.Random(seed)
+    for i in range(samples):
+        if rng.random() < 0.01:
+            yield {"type": "control",
+                   "command": rng.choice(["snapshot", "snapshot_delta", "reset", "stats", "nope"])}
+        # NaN first samples stick, later ones are ignored
+        temperature = float("nan") if rng.random() < 0.01 else round(rng.uniform(-30.0, 110.0), 1)
+        yield {
+            "type"       : "sample",
+            "stationName": f"Station {rng.randrange(stations)}",
+            "timestamp"  : 1672531200000 + i,
+            "temperature": temperature
+        }
+    yield {"type": "control", "command": "snapshot"}
+
+
+def serial_outputs(data: bytes, echo: str) -> bytes:
+    engine = WeatherEngine(echo=echo, heartbeat_every=333)
+    encode = JsonCodec().encode
+    return b"".join(encode(output) + b"\n"
+                    for output in engine.process_events(map(json.loads, data.splitlines())))
+
+
+def without_stats(outputs: bytes) -> bytes:
+    # stats outputs carry timings
+    return b"\n".join(line for line in outputs.split(b"\n") if b'"type": "stats"' not in line)
+
+
+class TestBackfill(unittest.TestCase):
+
+    data = "".join(json.dumps(event) + "\n"
+                   for event in generate_archive(10_000, 200, seed=3)).encode()
+
+    def setUp(self):
+        self._directory = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.paths = {}
+        for name, opener in (("plain", open), ("gzip", gzip.open), ("bz2", bz2.open),
+                             ("xz", lzma.open)):
+            self.paths[name] = os.path.join(self._directory.name, f"archive.{name}")
+            with opener(self.paths[name], "wb") as file:
+                file.write(self.data)
+
+    def tearDown(self):
+        self._directory.cleanup()
+
+    def test_chunks_end_on_line_boundaries(self):
+        for path in self.paths.values():
+            chunks = []
+            for source in plan_chunks(path, chunk_size=5_000):
+                if isinstance(source, bytes):
+                    chunks.append(source)
+                else:
+                    with open(path, "rb") as file:
+                        file.seek(source[1])
+                        chunks.append(file.read(source[2] - source[1]))
+            self.assertGreater(len(chunks), 10)
+            self.assertEqual(b"".join(chunks), self.data, msg=path)
+            self.assertTrue(all(chunk.endswith(b"\n") for chunk in chunks), msg=path)
+
+    def test_matches_serial_process_events(self):
+        runs = [(echo, "plain", 0) for echo in ECHO_MODES]
+        runs += [("echo", name, 2) for name in self.paths]
+        for echo, name, workers in runs:
+            expected = without_stats(serial_outputs(self.data, echo))
+            engine = WeatherEngine(echo=echo, heartbeat_every=333)
+            outputs = b"".join(backfill([self.paths[name]], engine, workers, chunk_size=7_000))
+            self.assertEqual(without_stats(outputs), expected,
+                             msg=f"echo={echo} {name} workers={workers}")
+
+    def test_outputs_before_a_malformed_line(self):
+        lines = self.data.splitlines(keepends=True)
+        data = b"".join(lines[:5_000]) + b'{"type": "sample"}\n' + b"".join(lines[5_000:])
+        path = os.path.join(self._directory.name, "malformed")
+        with open(path, "wb") as file:
+            file.write(data)
+        outputs = []
+        with self.assertRaises(ValueError):
+            for output in backfill([path], workers=2, chunk_size=7_000):
+                outputs.append(output)
+        expected = serial_outputs(b"".join(lines[:5_000]), "echo")
+        self.assertEqual(without_stats(b"".join(outputs)), without_stats(expected))
+
+    def test_entry_point(self):
+        # two archives replay into one engine
+        expected = subprocess.run([sys.executable, "-m", "interview", "--echo", "none"],
+                                  input=self.data * 2, capture_output=True, check=True).stdout
+        actual = subprocess.run([sys.executable, "-m", "interview", "--echo", "none", "backfill",
+                                 "--workers", "2", "--chunk-size", "20000",
+                                 self.paths["plain"], self.paths["gzip"]],
+                                capture_output=True, check=True).stdout
+        self.assertEqual(without_stats(actual), without_stats(expected))
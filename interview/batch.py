@@ -0,0 +1,79 @@
+from typing import Any, List, Tuple
+
+import numpy as np
+from numpy.typing import ArrayLike, NDArray
+
+
+Columns = Tuple[NDArray[Any], NDArray[np.int64], NDArray[np.float64]]
+
+
+def as_columns(stations: ArrayLike, timestamps: ArrayLike, temperatures: ArrayLike) -> Columns:
+    """
+    Convert columnar sample data to 1-d arrays of equal length
+    :param stations: station names or integer station ids
+    :param timestamps: UTC millisecond timestamps
+    :param temperatures: Fahrenheit temperatures
+    :return: stations, int64 timestamps, float64 temperatures
+    """
+    station_column = np.asarray(stations)
+    timestamp_column = np.asarray(timestamps, dtype=np.int64)
+    temperature_column = np.asarray(temperatures, dtype=np.float64)
+    columns = (station_column, timestamp_column, temperature_column)
+    if any(column.ndim != 1 for column in columns):
+        raise ValueError("stations, timestamps and temperatures must be 1-d arrays")
+    if not len(station_column) == len(timestamp_column) == len(temperature_column):
+        raise ValueError("stations, timestamps and temperatures must have the same length")
+    return columns
+
+
+def _group(stations: NDArray[Any],
+           temperatures: NDArray[np.float64]) -> Tuple[NDArray[Any], NDArray[np.float64],
+                                                       NDArray[np.float64], NDArray[np.bool_]]:
+    # keys, NaN ignoring highs and lows, NaN first sample flags, in order of first appearance
+    keys, inverse = np.unique(stations, return_inverse=True)
+    order = np.argsort(inverse.ravel(), kind="stable")
+    grouped = temperatures[order]
+    starts = np.flatnonzero(np.diff(inverse.ravel()[order], prepend=-1))
+    highs = np.fmax.reduceat(grouped, starts)
+    lows = np.fmin.reduceat(grouped, starts)
+
+    first = order[starts]  # index of the first sample of each station
+    first_nan = np.isnan(temperatures[first])
+
+    seen = np.argsort(first)
+    return keys[seen], highs[seen], lows[seen], first_nan[seen]
+
+
+def group_high_low(stations: NDArray[Any],
+                   temperatures: NDArray[np.float64]) -> Tuple[List[Any], List[float], List[float]]:
+    """
+    Vectorized group-by high/low of a run of samples, stations in order of first appearance.
+    A station whose first sample is NaN gets a NaN high/low, later NaN samples are ignored,
+    which is how the streaming max/min comparisons treat NaN for a new station.
+    :param stations: station key per sample
+    :param temperatures: temperature per sample
+    :return: station keys, highs, lows
+    """
+    if len(stations) == 0:
+        return [], [], []
+    keys, highs, lows, first_nan = _group(stations, temperatures)
+    highs[first_nan] = np.nan
+    lows[first_nan] = np.nan
+    return keys.tolist(), highs.tolist(), lows.tolist()
+
+
+def group_high_low_nan_first(stations: NDArray[Any],
+                             temperatures: NDArray[np.float64]) -> Tuple[List[Any], List[float],
+                                                                         List[float], List[bool]]:
+    """
+    Vectorized group-by high/low of a run of samples ignoring NaN, stations in order of first
+    appearance, with whether the first sample of each station is NaN. A NaN first sample only
+    sticks for a station not tracked before the run, the caller applies it.
+    :param stations: station key per sample
+    :param temperatures: temperature per sample
+    :return: station keys, highs, lows, NaN first sample flags
+    """
+    if len(stations) == 0:
+        return [], [], [], []
+    keys, highs, lows, first_nan = _group(stations, temperatures)
+    return keys.tolist(), highs.tolist(), lows.tolist(), first_nan.tolist()
@@ -0,0 +1,103 @@
+import json
+import random
+import unittest
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from . import weather
+from .batch import group_high_low
+
+
+class TestBatch(unittest.TestCase):
+
+    def setUp(self):
+        weather.stations_montior.reset()
+        weather.latest_timestamp = None
+
+    tearDown = setUp
+
+    @staticmethod
+    def stream(samples: int, stations: int, seed: int):
+        rng = random.Random(seed)
+        names: List[str] = []
+        timestamps: List[int] = []
+        temperatures: List[float] = []
+        controls: List[Tuple[int, str]] = []
+        events: List[Dict[str, Any]] = []
+        for i in range(samples):
+            if rng.random() < 0.02:
+                command = rng.choice(["snapshot", "reset", "snapshot"])
+                controls.append((i, command))
+                events.append({"type": "control", "command": command})
+            name = f"Station {rng.randrange(stations)}"
+            temperature = round(rng.uniform(-30.0, 110.0), 1)
+            names.append(name)
+            timestamps.append(1672531200000 + i)
+            temperatures.append(temperature)
+            events.append({"type": "sample", "stationName": name,
+                           "timestamp": 1672531200000 + i, "temperature": temperature})
+        controls.append((samples, "snapshot"))
+        events.append({"type": "control", "command": "snapshot"})
+        return names, timestamps, temperatures, controls, events
+
+    def test_group_high_low(self):
+        stations = np.array(["b", "a", "b", "c", "a"], dtype=object)
+        temperatures = np.array([1.0, 5.0, 3.0, np.nan, np.nan])
+        keys, highs, lows = group_high_low(stations, temperatures)
+        self.assertEqual(keys, ["b", "a", "c"], msg="first appearance order")
+        self.assertEqual(highs[:2], [3.0, 5.0])
+        self.assertEqual(lows[:2], [1.0, 5.0])
+        self.assertTrue(np.isnan(highs[2]) and np.isnan(lows[2]))
+        self.assertEqual(group_high_low(stations[:0], temperatures[:0]), ([], [], []))
+
+    def test_process_batch_matches_process_events(self):
+        names, timestamps, temperatures, controls, events = self.stream(5_000, 50, seed=7)
+        expected = [output for output in weather.process_events(events)
+                    if output["type"] != "sample"]
+        expected_state = weather.stations_montior.stations, weather.latest_timestamp
+        self.setUp()
+
+        actual = weather.process_batch(np.array(names, dtype=object),
+                                       np.array(timestamps, dtype=np.int64),
+                                       np.array(temperatures), controls)
+        self.assertEqual(json.dumps(actual), json.dumps(expected))
+        self.assertEqual((weather.stations_montior.stations, weather.latest_timestamp),
+                         expected_state)
+
+    def test_process_batch_station_ids_share_streaming_state(self):
+        station_names = ["Foster Weather Station", "Oak Street Weather Station"]
+        weather.process_batch([0, 1, 0], [1, 2, 3], [37.1, 50.0, 40.0], names=station_names)
+        actual = list(weather.process_events([
+            {"type": "sample", "stationName": "Oak Street Weather Station",
+             "timestamp": 4, "temperature": 20.0},
+            {"type": "control", "command": "snapshot"},
+        ]))[-1]
+        expected = {
+            "type"    : "snapshot",
+            "asOf"    : 4,
+            "stations": {"Foster Weather Station"    : {"high": 40.0, "low": 37.1},
+                         "Oak Street Weather Station": {"high": 50.0, "low": 20.0}}
+        }
+        self.assertEqual(actual, expected)
+
+    def test_process_batch_nan_first_sample_of_a_known_station(self):
+        columns = (["a", "a", "b", "b"], [2, 3, 4, 5], [np.nan, 10.0, np.nan, 3.0])
+        streamed = weather.WeatherEngine(echo=weather.ECHO_NONE)
+        batched = weather.WeatherEngine(echo=weather.ECHO_NONE)
+        first = {"type": "sample", "stationName": "a", "timestamp": 1, "temperature": 5.0}
+        list(streamed.process_events([first] + [
+            {"type": "sample", "stationName": name, "timestamp": timestamp,
+             "temperature": temperature} for name, timestamp, temperature in zip(*columns)]))
+        list(batched.process_events([first]))
+        batched.process_batch(*columns)
+        # the NaN only sticks for the new station b
+        self.assertEqual(batched.stations.get("a"), (10.0, 5.0))
+        self.assertEqual(json.dumps(batched.stations.stations),
+                         json.dumps(streamed.stations.stations))
+
+    def test_process_batch_invalid_input(self):
+        with self.assertRaises(ValueError):
+            weather.process_batch(["a", "b"], [1], [1.0, 2.0])
+        with self.assertRaises(ValueError):
+            weather.process_batch(["a"], [1], [1.0], controls=[(2, "snapshot")])
@@ -0,0 +1,108 @@
+import mmap
+import os
+import struct
+import time
+import zlib
+from typing import NamedTuple, Optional
+
+from interview.models.stations import StationsMonitor
+from interview.partials import Partial, dump_partial, load_partial
+
+
+# Checkpoint file layout, little-endian:
+#   header (magic, version, input lines consumed, crc32 of the partial) | partial state
+# The partial state is the interview.partials format of the station aggregates and asOf.
+MAGIC = b"WXCK"
+VERSION = 1
+_HEADER = struct.Struct("<4sB3xQI")
+CHECKPOINT_INTERVAL = 60.0  # seconds between two periodic checkpoints
+
+
+class Checkpoint(NamedTuple):
+    partial: Partial  # station aggregates and asOf
+    lines: int  # input lines consumed into the aggregates
+
+
+def dump_checkpoint(stations: StationsMonitor, as_of: Optional[int], lines: int) -> bytes:
+    """
+    Serialize the station aggregates, asOf and the input lines consumed
+    :param stations:
+    :param as_of: most recent sample timestamp, None when no sample was received
+    :param lines: input lines consumed
+    :return: serialized checkpoint
+    """
+    partial = dump_partial(stations, as_of)
+    return _HEADER.pack(MAGIC, VERSION, lines, zlib.crc32(partial)) + partial
+
+
+def parse_checkpoint(data: bytes) -> Checkpoint:
+    """
+    Deserialize a checkpoint produced by dump_checkpoint
+    :param data: serialized checkpoint, any bytes-like object (e.g. an mmap)
+    :return:
+    """
+    with memoryview(data) as view:
+        if len(view) < _HEADER.size:
+            raise ValueError("truncated checkpoint")
+        magic, version, lines, crc = _HEADER.unpack_from(view)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("not a checkpoint (bad magic or version)")
+        with view[_HEADER.size:] as payload:
+            if zlib.crc32(payload) != crc:
+                raise ValueError("corrupted checkpoint (crc mismatch)")
+            return Checkpoint(load_partial(payload), lines)
+
+
+def write_checkpoint(path: str, data: bytes) -> None:
+    """
+    Crash-safe write: the data goes to a temporary file in the same directory, is fsynced,
+    then atomically renamed over path, so path always holds a complete checkpoint
+    :param path:
+    :param data: serialized checkpoint
+    :return:
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    temporary = f"{path}.tmp"
+    with open(temporary, "wb") as file:
+        file.write(data)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporary, path)
+    descriptor = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(descriptor)
+    finally:
+        os.close(descriptor)
+
+
+def read_checkpoint(path: str) -> Optional[Checkpoint]:
+    """
+    Load the checkpoint at path through mmap, the pages are read once while decoding
+    :param path:
+    :return: None when there is no checkpoint at path
+    """
+    try:
+        file = open(path, "rb")  # pylint: disable=consider-using-with
+    except FileNotFoundError:
+        return None
+    with file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        with memoryview(mapped) as view:
+            return parse_checkpoint(view)
+
+
+class Checkpointer:
+    """
+    Periodic checkpoints of an engine to path, every interval seconds
+    """
+    __slots__ = ("path", "interval", "next_due", "written")
+
+    def __init__(self, path: str, interval: float = CHECKPOINT_INTERVAL) -> None:
+        self.path = path
+        self.interval = interval
+        self.next_due = time.perf_counter_ns() + int(interval * 1e9)
+        self.written = 0  # checkpoints written
+
+    def write(self, stations: StationsMonitor, as_of: Optional[int], lines: int) -> None:
+        write_checkpoint(self.path, dump_checkpoint(stations, as_of, lines))
+        self.written += 1
+        self.next_due = time.perf_counter_ns() + int(self.interval * 1e9)
@@ -0,0 +1,111 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from interview.models.stations import StationsMonitor
+from .checkpoint import (Checkpointer, dump_checkpoint, parse_checkpoint, read_checkpoint,
+                         write_checkpoint)
+from .sharding_test import generate_stream
+from .weather import WeatherEngine
+
+
+class TestCheckpoint(unittest.TestCase):
+
+    def test_round_trip_and_corruption(self):
+        stations = StationsMonitor(stations={"Foster Weather Station": {"high": 37.1, "low": -2.5},
+                                             "Ünicode Station": {"high": 50.0, "low": 50.0}})
+        data = dump_checkpoint(stations, 1672531200000, lines=42)
+        checkpoint = parse_checkpoint(data)
+        self.assertEqual(checkpoint.lines, 42)
+        self.assertEqual(checkpoint.partial.as_of, 1672531200000)
+        restored = StationsMonitor()
+        restored.restore(checkpoint.partial.names, checkpoint.partial.highs,
+                         checkpoint.partial.lows)
+        self.assertEqual(restored, stations)
+        self.assertEqual(restored.pop_dirty(), {}, msg="restored stations are not dirty")
+
+        corrupted = bytearray(data)
+        corrupted[-1] ^= 0xFF
+        for bad in (bytes(corrupted), data[:10], b"WXPS" + data[4:]):
+            with self.assertRaises(ValueError):
+                parse_checkpoint(bad)
+
+    def test_write_and_restore(self):
+        events = list(generate_stream(1_000, 20, seed=11))
+        expected = list(WeatherEngine().process_events(events))
+        cut = 600
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "state.ckpt")
+            self.assertIsNone(read_checkpoint(path))
+            first = WeatherEngine(checkpointer=Checkpointer(path))
+            head = list(first.process_events(events[:cut]))
+            first.write_checkpoint()
+            self.assertEqual(os.listdir(directory), ["state.ckpt"], msg="no temporary left")
+
+            checkpoint = read_checkpoint(path)
+            self.assertIsNotNone(checkpoint)
+            second = WeatherEngine()
+            second.restore(checkpoint)
+            self.assertEqual(second.lines_consumed, cut)
+            tail = list(second.process_events(events[checkpoint.lines:]))
+        # the first delta after a restart reports every station, see below
+        self.assertEqual([o for o in head + tail if o["type"] != "snapshot_delta"],
+                         [o for o in expected if o["type"] != "snapshot_delta"])
+
+    def test_first_delta_after_restore(self):
+        def sample(station, timestamp):
+            return {"type": "sample", "stationName": station, "timestamp": timestamp,
+                    "temperature": 1.0}
+        delta = {"type": "control", "command": "snapshot_delta"}
+        head = [sample("a", 1), delta, sample("b", 2)]
+        tail = [sample("a", 3), delta]
+        expected = list(WeatherEngine(echo="none").process_events(head + tail))[-1]
+        self.assertEqual(list(expected["stations"]), ["b"])
+
+        first = WeatherEngine(echo="none")
+        list(first.process_events(head))
+        second = WeatherEngine(echo="none")
+        second.restore(parse_checkpoint(dump_checkpoint(first.stations, 2, lines=len(head))))
+        actual = list(second.process_events(tail))[-1]
+        # b changed after the last delta but before the checkpoint, every station is reported
+        self.assertEqual(actual["asOf"], expected["asOf"])
+        self.assertEqual(actual["stations"], {"a": {"high": 1.0, "low": 1.0},
+                                              "b": {"high": 1.0, "low": 1.0}})
+
+    def test_periodic_checkpoints(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "state.ckpt")
+            checkpointer = Checkpointer(path, interval=0.0)
+            engine = WeatherEngine(checkpointer=checkpointer)
+            engine.metrics.sample_mask = 0  # every event is timed
+            list(engine.process_events(generate_stream(10, 2, seed=1)))
+            self.assertGreater(checkpointer.written, 0)
+            self.assertEqual(read_checkpoint(path).lines, engine.lines_consumed - 1,
+                             msg="last written before the trailing snapshot")
+            write_checkpoint(path, b"")
+            with self.assertRaises(ValueError):
+                read_checkpoint(path)
+
+    def test_entry_point_restart(self):
+        events = list(generate_stream(500, 10, seed=12))
+        data = [json.dumps(event).encode() + b"\n" for event in events]
+        cut = 300
+        for io_mode in ("line", "buffered", "pipelined"):
+            run = [sys.executable, "-m", "interview", "--io", io_mode, "--checkpoint"]
+            with tempfile.TemporaryDirectory() as directory:
+                path = os.path.join(directory, "state.ckpt")
+                full = subprocess.run(run[:-1], input=b"".join(data), check=True,
+                                      capture_output=True).stdout
+                head = subprocess.run(run + [path], input=b"".join(data[:cut]), check=True,
+                                      capture_output=True).stdout
+                # the producer replays the whole input, the checkpointed lines are skipped
+                tail = subprocess.run(run + [path], input=b"".join(data), check=True,
+                                      capture_output=True).stdout
+                self.assertEqual(read_checkpoint(path).lines, len(events))
+            outputs = [json.loads(line) for line in (head + tail).splitlines()]
+            expected = [json.loads(line) for line in full.splitlines()]
+            self.assertEqual([o for o in outputs if o["type"] != "snapshot_delta"],
+                             [o for o in expected if o["type"] != "snapshot_delta"], msg=io_mode)
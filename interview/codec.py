@@ -0,0 +1,121 @@
+import json
+from functools import lru_cache
+from importlib.util import find_spec
+from typing import Any, Dict, Iterator, Optional, Tuple, Union
+
+from interview.streamio import Chunk, encode_output, iter_json_lines
+
+
+AUTO = "auto"
+STDLIB = "stdlib"
+ORJSON = "orjson"
+CODECS = (AUTO, STDLIB, ORJSON)
+
+# orjson reads integers beyond 64 bits as floats: input with a run of 20 digits goes to the
+# stdlib. Digits are mapped to "0" and anything else to " ", then the run is a substring search
+# (a regular expression scan costs more than the orjson decoding itself).
+_DIGITS = bytes(ord("0") if ord("0") <= byte <= ord("9") else ord(" ") for byte in range(256))
+_LONG_DIGITS = b"0" * 20
+
+
+def _has_long_digits(data: bytes) -> bool:
+    return _LONG_DIGITS in data.translate(_DIGITS)
+
+
+@lru_cache(maxsize=None)
+def _has_orjson() -> bool:
+    # the optional accelerated decoder is looked up without importing it
+    return find_spec("orjson") is not None
+
+
+@lru_cache(maxsize=None)
+def _orjson() -> Any:
+    # imported on the first decoding, a run that decodes nothing does not pay for it
+    import orjson  # pylint: disable=import-outside-toplevel
+    return orjson
+
+
+class JsonCodec:
+    """
+    Decoding of input lines and encoding of outputs, stdlib json.
+    Any codec decodes to the same objects, raises the same errors as json.loads on malformed
+    lines, and encodes to the same bytes as json.dumps, floats included.
+    """
+    name = STDLIB
+
+    def loads(self, line: Union[str, bytes]) -> Any:
+        return json.loads(line)
+
+    def iter_lines(self, chunk: Chunk) -> Iterator[Any]:
+        """
+        Parse the JSON object on each line of a chunk
+        :param chunk: complete lines of JSON
+        :return: one parsed object per line
+        """
+        return iter_json_lines(chunk)
+
+    def encode(self, output: Dict[str, Any]) -> bytes:
+        return encode_output(output)
+
+
+class OrjsonCodec(JsonCodec):
+    """
+    orjson decoding. A line orjson rejects (NaN and Infinity literals, lone surrogates,
+    malformed JSON) is decoded again by the stdlib, and so is a chunk holding a number of 20
+    digits or more, which orjson could turn from an integer into a float: results and errors
+    are unchanged. Outputs keep the stdlib encoder: orjson writes compact separators
+    and its own float exponents ("1e-5" where json.dumps writes "1e-05"), not the same bytes.
+    """
+    name = ORJSON
+
+    def loads(self, line: Union[str, bytes]) -> Any:
+        data = line.encode() if isinstance(line, str) else line
+        if _has_long_digits(data):
+            return json.loads(line)
+        orjson = _orjson()
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            return json.loads(line)
+
+    def iter_lines(self, chunk: Chunk) -> Iterator[Any]:
+        data = bytes(chunk)
+        if _has_long_digits(data):
+            yield from iter_json_lines(data)
+            return
+        orjson = _orjson()
+        loads = orjson.loads
+        lines = data.split(b"\n")
+        last = lines.pop()  # empty, unless the last line has no newline
+        for line in lines:
+            try:
+                yield loads(line)
+            except orjson.JSONDecodeError:
+                # the stdlib result, or error, of the line with its newline
+                yield from iter_json_lines(line + b"\n")
+        if last:
+            try:
+                yield loads(last)
+            except orjson.JSONDecodeError:
+                yield from iter_json_lines(last)
+
+
+def available_codecs() -> Tuple[str, ...]:
+    return (STDLIB, ORJSON) if _has_orjson() else (STDLIB,)
+
+
+def get_codec(name: Optional[str] = AUTO) -> JsonCodec:
+    """
+    Codec by name; auto (or None) picks orjson when installed, the stdlib otherwise
+    :param name: one of CODECS
+    :return:
+    """
+    if name in (AUTO, None):
+        name = ORJSON if _has_orjson() else STDLIB
+    if name == STDLIB:
+        return JsonCodec()
+    if name == ORJSON:
+        if not _has_orjson():
+            raise ValueError("the orjson codec requires the orjson package")
+        return OrjsonCodec()
+    raise ValueError(f"unknown codec {name!r}, expected one of {', '.join(CODECS)}")
@@ -0,0 +1,99 @@
+import json
+import subprocess
+import sys
+import unittest
+
+from .codec import AUTO, ORJSON, STDLIB, JsonCodec, available_codecs, get_codec
+
+
+HAS_ORJSON = ORJSON in available_codecs()
+
+
+class TestCodec(unittest.TestCase):
+
+    lines = [
+        b'{"type": "sample", "stationName": "Foster", "timestamp": 1672531200000, '
+        b'"temperature": 37.1}\n',
+        '{"type": "sample", "stationName": "Ünicode", "timestamp": 1, "temperature": -0.0}\r\n'
+        .encode(),
+        b'  {"type": "control", "command": "snapshot"}  \n',
+        b'{"temperature": NaN, "high": Infinity, "low": -Infinity}\n',
+        b'{"timestamp": 123456789012345678901234567890}\n',
+        b'{"timestamp": 18446744073709551616, "temperature": 1.0000000000000002}\n',
+        b'{"a": 1, "a": 2, "s": "\\ud800"}\n',
+        b'{"temperature": 1e400, "low": 1e-05, "high": 12345678901234567890.5}\n',
+        b'[1, "two", null, true]\n',
+    ]
+    malformed = [b'\n', b'  \n', b'{"a": 1} {"b": 2}\n', b'{"a":\n', b'nope\n',
+                 '\ufeff{"a": 1}\n'.encode(), b'\xff\n', b'{"a": 1']
+
+    def assert_same_decoding(self, codec: JsonCodec) -> None:
+        stdlib = JsonCodec()
+        data = b"".join(self.lines)
+        self.assertEqual(repr(list(codec.iter_lines(data))), repr(list(stdlib.iter_lines(data))))
+        self.assertEqual(repr(list(codec.iter_lines(memoryview(data)[:-1]))),
+                         repr(list(stdlib.iter_lines(data[:-1]))), msg="no trailing newline")
+        for line in self.lines:
+            # repr tells -0.0 from 0.0, int from float and compares NaN
+            self.assertEqual(repr(codec.loads(line)), repr(stdlib.loads(line)), msg=line)
+            self.assertEqual(repr(codec.loads(line.decode())), repr(stdlib.loads(line)), msg=line)
+        for line in self.malformed:
+            with self.assertRaises(ValueError) as expected:
+                list(stdlib.iter_lines(line))
+            with self.assertRaises(ValueError) as actual:
+                list(codec.iter_lines(self.lines[0] + line))
+            self.assertEqual(type(actual.exception), type(expected.exception), msg=line)
+            self.assertEqual(str(actual.exception), str(expected.exception), msg=line)
+
+    @unittest.skipUnless(HAS_ORJSON, "orjson is not installed")
+    def test_orjson_decodes_as_stdlib(self):
+        self.assert_same_decoding(get_codec(ORJSON))
+
+    @unittest.skipUnless(HAS_ORJSON, "orjson is not installed")
+    def test_orjson_is_imported_on_first_decoding(self):
+        script = ("import sys\n"
+                  "from interview.codec import get_codec\n"
+                  "codec = get_codec()\n"
+                  "print('orjson' in sys.modules)\n"
+                  "codec.loads(b'{}')\n"
+                  "print('orjson' in sys.modules)\n")
+        actual = subprocess.run([sys.executable, "-c", script],
+                                capture_output=True, check=True, text=True).stdout
+        self.assertEqual(actual.split(), ["False", "True"])
+
+    def test_encoding_matches_json_dumps(self):
+        outputs = [
+            {"type": "snapshot", "asOf": 1672531200000, "stations": {
+                "Ünicode \"quoted\"": {"high": 1e16, "low": 1e-05},
+                "Foster": {"high": 0.1 + 0.2, "low": -0.0},
+                "Edge": {"high": float("inf"), "low": float("nan")},
+            }},
+            {"type": "sample", "stationName": "Foster", "timestamp": 1, "temperature": 37.1},
+        ]
+        for name in available_codecs():
+            for output in outputs:
+                self.assertEqual(get_codec(name).encode(output), json.dumps(output).encode(),
+                                 msg=name)
+
+    def test_get_codec(self):
+        self.assertEqual(get_codec(STDLIB).name, STDLIB)
+        self.assertEqual(get_codec(AUTO).name, ORJSON if HAS_ORJSON else STDLIB)
+        self.assertEqual(get_codec(None).name, get_codec(AUTO).name)
+        with self.assertRaises(ValueError):
+            get_codec("simdjson")
+        if not HAS_ORJSON:
+            with self.assertRaises(ValueError):
+                get_codec(ORJSON)
+
+    def test_entry_point_codecs_match(self):
+        data = b"".join(self.lines[:3]) + b'{"type": "control", "command": "snapshot"}\n'
+        for io_mode in ("line", "buffered", "pipelined"):
+            outputs = [
+                subprocess.run([sys.executable, "-m", "interview", "--io", io_mode,
+                                "--codec", name],
+                               input=data, capture_output=True, check=True).stdout
+                for name in available_codecs()
+            ]
+            self.assertEqual(len(outputs[0].splitlines()), 4, msg=io_mode)
+            for output in outputs[1:]:
+                self.assertEqual(output, outputs[0], msg=io_mode)
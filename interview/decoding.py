@@ -0,0 +1,66 @@
+from typing import Any, Dict
+from logging import getLogger
+
+from interview.models.eventTypes import EventTypes
+
+
+logger = getLogger(__name__)
+
+SAMPLE = EventTypes.sample.name
+CONTROL = EventTypes.control.name
+
+
+def decode_event(line: Any) -> Dict[str, Any]:
+    """
+    Validate an input message into its canonical dict, the same dict the pydantic models dump.
+    Well-formed sample and control messages are checked directly on the dict; anything else
+    goes through the pydantic models so malformed input raises the same ValidationError.
+    :param line: input message dict
+    :return: canonical event dict
+    """
+    # pylint: disable=unidiomatic-typecheck
+    if type(line) is dict:
+        event_type = line.get("type")
+        if event_type == SAMPLE:
+            station_name = line.get("stationName")
+            timestamp = line.get("timestamp")
+            temperature = line.get("temperature")
+            # exact types only: bool, int temperatures and subclasses are left to pydantic
+            if (type(station_name) is str
+                    and type(timestamp) is int
+                    and type(temperature) is float):
+                return {
+                    "type"       : SAMPLE,
+                    "stationName": station_name,
+                    "timestamp"  : timestamp,
+                    "temperature": temperature
+                }
+        elif event_type == CONTROL:
+            command = line.get("command")
+            if type(command) is str:
+                return {"type": CONTROL, "command": command}
+    return decode_event_strict(line)
+
+
+def decode_event_strict(line: Any) -> Dict[str, Any]:
+    """
+    Validate an input message through the pydantic models
+    :param line: input message dict
+    :return: canonical event dict
+    """
+    # pydantic and the models are imported on the first message needing them, well-formed
+    # input never does; the import and schema build dominate a short run
+    # pylint: disable=import-outside-toplevel
+    from pydantic import ValidationError
+    from interview.models.inputEvent import InputEvent
+    try:
+        # Validate Model
+        line_event = InputEvent.model_validate({"event": line})
+    except ValidationError as ve:
+        err_msg = f"Validation Error: {ve}"
+        logger.critical(err_msg)
+        # Covers Unknown Event Types and Unknown Control Types w/ Literal reqs,
+        # Covers required missing values.
+        # Raise Error -- very informative as Pydantic Validation Error for all fields.
+        raise ve
+    return line_event.event.model_dump()
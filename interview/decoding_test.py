@@ -0,0 +1,97 @@
+import json
+import subprocess
+import sys
+import unittest
+from pydantic import ValidationError
+
+from interview.models.inputEvent import InputEvent
+from .decoding import decode_event, decode_event_strict
+
+
+class StrSubclass(str):
+    pass
+
+
+class TestDecoding(unittest.TestCase):
+
+    @staticmethod
+    def data():
+        return {
+            "type"       : "sample",
+            "stationName": "Foster Weather Station",
+            "timestamp"  : 1672531200000,
+            "temperature": 37.1
+        }
+
+    def test_decode_event_matches_pydantic(self):
+        sample = self.data()
+        valid = [
+            sample,
+            {**sample, "temperature": 37},  # int coerced to float by pydantic
+            {**sample, "extra": "ignored"},
+            {"temperature": 37.1, "timestamp": 1672531200000,
+             "stationName": "Foster Weather Station", "type": "sample"},  # key order
+            {**sample, "stationName": StrSubclass("Foster Weather Station")},
+            {"type": "control", "command": "snapshot"},
+            {"type": "control", "command": "reset", "extra": "ignored"},
+            {"type": "control", "command": "unknown"},
+        ]
+        for event in valid:
+            expected = InputEvent.model_validate({"event": event}).event.model_dump()
+            actual = decode_event(event)
+            self.assertEqual(actual, expected)
+            self.assertEqual(list(actual), list(expected), msg="key order")
+            self.assertEqual(type(actual["type"]), type(expected["type"]))
+            self.assertEqual(actual, decode_event_strict(event))
+
+    def test_decode_event_does_not_alias_input(self):
+        sample = self.data()
+        actual = decode_event(sample)
+        self.assertIsNot(actual, sample)
+
+    def test_decode_event_validation_errors(self):
+        sample = self.data()
+        invalid = [
+            {**sample, "type": "asd"},
+            {**sample, "stationName": 1000},
+            {**sample, "timestamp": "None"},
+            {**sample, "timestamp": True},
+            {**sample, "timestamp": 1.0},
+            {**sample, "temperature": "None"},
+            {**sample, "temperature": True},
+            {"type": "sample", "stationName": "Foster Weather Station"},
+            {"type": "control"},
+            {"type": "control", "command": 123},
+            {"type": None},
+            "not a dict",
+            None,
+        ]
+        for event in invalid:
+            with self.assertRaises(ValidationError) as strict_error:
+                InputEvent.model_validate({"event": event})
+            with self.assertRaises(ValidationError) as fast_error:
+                decode_event(event)
+            self.assertEqual(fast_error.exception.errors(), strict_error.exception.errors())
+
+    def test_pydantic_is_loaded_on_demand(self):
+        # well-formed input and every output never need pydantic, a malformed message does
+        script = ("import sys, json\n"
+                  "from interview.weather import WeatherEngine\n"
+                  "engine = WeatherEngine(topk=True)\n"
+                  "list(engine.process_events(json.loads(sys.argv[1])))\n"
+                  "print('pydantic' in sys.modules)\n")
+        control = {"type": "control", "command": "snapshot"}
+        for events, loaded in (([self.data(), control, {**control, "command": "stats"}], "False"),
+                               ([{**self.data(), "temperature": 37}], "True")):
+            actual = subprocess.run([sys.executable, "-c", script, json.dumps(events)],
+                                    capture_output=True, check=True, text=True).stdout
+            self.assertEqual(actual.strip(), loaded)
+
+    def test_entry_point_loads_process_pools_on_demand(self):
+        # only the --shards and backfill modes need multiprocessing
+        script = ("import sys\n"
+                  "import interview.__main__\n"
+                  "print('multiprocessing' in sys.modules)\n")
+        actual = subprocess.run([sys.executable, "-c", script],
+                                capture_output=True, check=True, text=True).stdout
+        self.assertEqual(actual.strip(), "False")
@@ -0,0 +1,81 @@
+import math
+from collections import OrderedDict
+from typing import List, Optional, Sequence, Tuple
+
+from interview.models.stations import StationsMonitor
+
+
+class StationEviction:
+    """
+    Bound the tracked stations: at most max_stations, least recently reported evicted first,
+    and/or none idle for longer than idle_ttl milliseconds of sample time. Stations are kept
+    in order of their last sample, so each sample costs O(1) and an eviction pops the front.
+    An evicted station that reports again starts over from its new samples.
+    """
+    __slots__ = ("max_stations", "idle_ttl", "evictions", "_last_seen", "_next_expiry")
+
+    def __init__(self, max_stations: Optional[int] = None, idle_ttl: Optional[int] = None) -> None:
+        if max_stations is None and idle_ttl is None:
+            raise ValueError("max_stations or idle_ttl is required")
+        if max_stations is not None and max_stations < 1:
+            raise ValueError("max_stations must be positive")
+        if idle_ttl is not None and idle_ttl < 1:
+            raise ValueError("idle_ttl must be positive")
+        self.max_stations = max_stations
+        self.idle_ttl = idle_ttl
+        self.evictions = 0  # stations evicted so far, resets excluded
+        # station name -> timestamp of its last sample, least recent first
+        self._last_seen: "OrderedDict[str, int]" = OrderedDict()
+        # no station idles out before this sample time
+        self._next_expiry = math.inf if idle_ttl is None else -math.inf
+
+    def update(self, stations: StationsMonitor, station_name: str,
+               timestamp: int) -> List[Tuple[str, float, float]]:
+        """
+        Record a sample already folded into stations and evict the stations over the limits
+        :param stations: the monitor to evict from
+        :param station_name:
+        :param timestamp: sample timestamp, the current time of the TTL
+        :return: (stationName, high, low) of the evicted stations, oldest first
+        """
+        last_seen = self._last_seen
+        if station_name in last_seen:
+            last_seen.move_to_end(station_name)
+        last_seen[station_name] = timestamp
+        evicted: List[Tuple[str, float, float]] = []
+        if self.max_stations is not None:
+            while len(last_seen) > self.max_stations:
+                self._evict(stations, evicted)
+        if timestamp > self._next_expiry:
+            # the front station was seen at _next_expiry - idle_ttl at the earliest
+            idle_ttl = self.idle_ttl or 0
+            while (oldest := next(iter(last_seen.values()))) < timestamp - idle_ttl:
+                self._evict(stations, evicted)
+            self._next_expiry = oldest + idle_ttl
+        return evicted
+
+    def _evict(self, stations: StationsMonitor, evicted: List[Tuple[str, float, float]]) -> None:
+        name, _ = self._last_seen.popitem(last=False)
+        high_low = stations.remove(name)
+        if high_low is not None:
+            evicted.append((name, *high_low))
+        self.evictions += 1
+
+    def restore(self, names: Sequence[str], as_of: Optional[int]) -> None:
+        """
+        Track restored stations, e.g. from a checkpoint, as last seen at its asOf
+        :param names:
+        :param as_of:
+        :return:
+        """
+        self._last_seen = OrderedDict.fromkeys(names, 0 if as_of is None else as_of)
+        if self.idle_ttl is not None:
+            self._next_expiry = -math.inf
+
+    def __len__(self) -> int:
+        return len(self._last_seen)
+
+    def reset(self) -> None:
+        self._last_seen.clear()
+        if self.idle_ttl is not None:
+            self._next_expiry = -math.inf
@@ -0,0 +1,96 @@
+import tracemalloc
+import unittest
+from collections import deque
+
+from interview.models.evictionOutput import EvictionOutput
+from interview.models.stations import StationsMonitor
+from .checkpoint import Checkpoint
+from .eviction import StationEviction
+from .partials import load_partial, dump_partial
+from .weather import ECHO_NONE, WeatherEngine
+
+
+def sample(station: str, timestamp: int, temperature: float = 50.0) -> dict:
+    return {"type": "sample", "stationName": station, "timestamp": timestamp,
+            "temperature": temperature}
+
+
+SNAPSHOT = {"type": "control", "command": "snapshot"}
+STATS = {"type": "control", "command": "stats"}
+
+
+class TestStationEviction(unittest.TestCase):
+
+    def test_max_stations_evicts_least_recently_reported(self):
+        engine = WeatherEngine(echo=ECHO_NONE, eviction=StationEviction(max_stations=2),
+                               emit_evictions=True)
+        outputs = list(engine.process_events([sample("a", 1, 10.0), sample("b", 2),
+                                              sample("a", 3, 20.0), sample("c", 4),
+                                              sample("d", 5), SNAPSHOT]))
+        self.assertEqual(outputs[:2], [
+            {"type": "eviction", "asOf": 4, "stations": {"b": {"high": 50.0, "low": 50.0}}},
+            {"type": "eviction", "asOf": 5, "stations": {"a": {"high": 20.0, "low": 10.0}}},
+        ])
+        for output in outputs[:2]:
+            self.assertEqual(EvictionOutput.model_validate(output).model_dump(), output)
+        self.assertEqual(outputs[2]["stations"], {"d": {"high": 50.0, "low": 50.0},
+                                                  "c": {"high": 50.0, "low": 50.0}})
+        # an evicted station starts over
+        outputs = list(engine.process_events([sample("a", 6, 30.0), SNAPSHOT, STATS]))
+        self.assertEqual(outputs[1]["stations"]["a"], {"high": 30.0, "low": 30.0})
+        self.assertEqual(outputs[2]["metrics"]["evictions"], 3)
+
+    def test_idle_ttl_in_sample_time(self):
+        engine = WeatherEngine(echo=ECHO_NONE, eviction=StationEviction(idle_ttl=10),
+                               statistics=True)
+        outputs = list(engine.process_events([sample("a", 0), sample("b", 5), sample("a", 10),
+                                              sample("a", 15), SNAPSHOT, sample("a", 16),
+                                              SNAPSHOT]))
+        # b is idle for 10 ms at 15 and evicted past that, silently by default
+        self.assertEqual(list(outputs[0]["stations"]), ["a", "b"])
+        self.assertEqual(list(outputs[1]["stations"]), ["a"])
+        self.assertEqual(len(engine.statistics or ()), 1)
+        # a reset forgets the stations, a restore tracks them as of the checkpoint
+        list(engine.process_events([{"type": "control", "command": "reset"}]))
+        self.assertEqual(len(engine.eviction or ()), 0)
+        restored = StationsMonitor({"x": {"high": 1.0, "low": 0.0}, "y": {"high": 2.0, "low": 1.0}})
+        engine.restore(Checkpoint(load_partial(dump_partial(restored, 20)), 7))
+        self.assertEqual(len(engine.eviction or ()), 2)
+        outputs = list(engine.process_events([sample("x", 31), SNAPSHOT]))
+        self.assertEqual(list(outputs[0]["stations"]), ["x"])
+
+    def test_memory_is_bounded_under_station_churn(self):
+        engine = WeatherEngine(echo=ECHO_NONE, eviction=StationEviction(max_stations=100),
+                               topk=True, statistics=True)
+        prefix = {"type": "control", "command": "snapshot", "prefix": "Station 1"}
+        topk = {"type": "control", "command": "topk", "k": 3}
+
+        def churn(start: int, stop: int):
+            for i in range(start, stop):
+                yield sample(f"Station {i}", i, float(i % 97))
+                if i % 1_000 == 0:
+                    yield prefix
+                    yield topk
+
+        list(engine.process_events(churn(0, 20_000)))
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        outputs = deque(engine.process_events(churn(20_000, 60_000)), maxlen=2)
+        grown = tracemalloc.get_traced_memory()[0] - before
+        tracemalloc.stop()
+        self.assertEqual(len(engine.stations), 100)
+        self.assertEqual(len(engine.eviction or ()), 100)
+        self.assertEqual(len(engine.statistics or ()), 100)
+        self.assertLess(grown, 100_000)
+        # the indexes follow the stations moved by evictions
+        self.assertEqual(list(outputs[-2]["stations"]),
+                         sorted(name for name in engine.stations.stations
+                                if name.startswith("Station 1")))
+        self.assertEqual(outputs[-1]["hottest"][0]["high"],
+                         max(high for _, high, _ in engine.stations.items()))
+
+    def test_batch_ingest_is_rejected(self):
+        engine = WeatherEngine(echo=ECHO_NONE, eviction=StationEviction(max_stations=1))
+        with self.assertRaises(ValueError):
+            engine.process_batch(["a", "b"], [1, 2], [1.0, 2.0])
+        self.assertEqual(len(engine.stations), 0)
@@ -0,0 +1,53 @@
+import math
+from heapq import heappop, heappush, heapreplace
+from typing import Any, Dict, Iterable, Iterator, List, Sequence, Tuple
+
+from interview.decoding import SAMPLE
+
+
+_SAMPLE_RANK = 0  # samples sort before controls of the same timestamp
+_CONTROL_RANK = 1
+
+
+def merge_feeds(feeds: Sequence[Iterable[Dict[str, Any]]]) -> Iterator[Dict[str, Any]]:
+    """
+    Merge several input feeds, each in timestamp order, into one stream in timestamp order.
+    The merge is lazy: a heap holds the next event of each feed, and a feed is read again
+    only once its pending event was yielded, so each feed buffers a single event.
+
+    Samples are ordered by timestamp; on equal timestamps, by feed position in feeds.
+    A control message (and any message that is not a sample) keeps its place in its own
+    feed and is ordered at the timestamp of the sample before it in that feed, after every
+    sample of every feed with that timestamp or an earlier one. A snapshot requested by a
+    feed right after its sample at t therefore covers all the samples up to t, whichever
+    feed they arrive on, and none after. A control before the first sample of its feed is
+    ordered before any sample.
+    :param feeds: input dicts {str: Any} messages, one iterable per feed
+    :return: input dicts {str: Any} messages
+    """
+    iterators = [iter(feed) for feed in feeds]
+    latest: List[float] = [-math.inf] * len(iterators)  # last sample timestamp of each feed
+    heap: List[Tuple[float, int, int, Any]] = []
+
+    def entry(index: int, event: Any) -> Tuple[float, int, int, Any]:
+        # the feed index is unique in the heap, events are never compared
+        # pylint: disable=unidiomatic-typecheck
+        if type(event) is dict and event.get("type") == SAMPLE:
+            timestamp = event.get("timestamp")
+            if type(timestamp) is int:
+                latest[index] = timestamp
+                return timestamp, _SAMPLE_RANK, index, event
+        return latest[index], _CONTROL_RANK, index, event
+
+    for index, iterator in enumerate(iterators):
+        for event in iterator:
+            heappush(heap, entry(index, event))
+            break
+    while heap:
+        _, _, index, event = heap[0]
+        yield event
+        for following in iterators[index]:
+            heapreplace(heap, entry(index, following))
+            break
+        else:
+            heappop(heap)
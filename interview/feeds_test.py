@@ -0,0 +1,74 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from .feeds import merge_feeds
+
+
+def sample(station: str, timestamp: int) -> dict:
+    return {"type": "sample", "stationName": station, "timestamp": timestamp, "temperature": 1.0}
+
+
+def snapshot() -> dict:
+    return {"type": "control", "command": "snapshot"}
+
+
+class TestMergeFeeds(unittest.TestCase):
+
+    def test_samples_in_timestamp_order(self):
+        feeds = [[sample("a", 1), sample("a", 4), sample("a", 5)],
+                 [sample("b", 2), sample("b", 4)],
+                 [],
+                 [sample("c", 0), sample("c", 6)]]
+        merged = [(event["stationName"], event["timestamp"]) for event in merge_feeds(feeds)]
+        # equal timestamps follow the feed order
+        self.assertEqual(merged, [("c", 0), ("a", 1), ("b", 2), ("a", 4), ("b", 4), ("a", 5),
+                                  ("c", 6)])
+
+    def test_control_after_every_sample_up_to_its_timestamp(self):
+        first = snapshot()
+        second = {"type": "control", "command": "reset"}
+        feeds = [[first, sample("a", 3), second, sample("a", 9)],
+                 [sample("b", 2), sample("b", 3), sample("b", 3), sample("b", 4)]]
+        merged = list(merge_feeds(feeds))
+        self.assertIs(merged[0], first)
+        self.assertEqual([event.get("timestamp") for event in merged],
+                         [None, 2, 3, 3, 3, None, 4, 9])
+        self.assertIs(merged[5], second)
+
+    def test_one_pending_event_per_feed(self):
+        pulled = []
+
+        def feed(name, timestamps):
+            for timestamp in timestamps:
+                pulled.append(name)
+                yield sample(name, timestamp)
+
+        merged = merge_feeds([feed("a", range(0, 100, 2)), feed("b", range(1, 100, 2))])
+        for count in range(1, 50):
+            next(merged)
+            # the feed of the event yielded is read again on the next step only
+            self.assertEqual(len(pulled), count + 1)
+
+    def test_entry_point(self):
+        events = [sample(f"Station {i % 7}", i) for i in range(30)] + [snapshot()]
+        expected = subprocess.run([sys.executable, "-m", "interview"],
+                                  input="".join(json.dumps(event) + "\n" for event in events),
+                                  capture_output=True, check=True, text=True).stdout
+        with tempfile.TemporaryDirectory() as directory:
+            # the snapshot follows the last sample, on the third feed
+            feeds = ["".join(json.dumps(event) + "\n" for event in events[shard:-1:3])
+                     for shard in range(3)]
+            feeds[2] += json.dumps(events[-1]) + "\n"
+            paths = [os.path.join(directory, f"feed{shard}.jsonl") for shard in range(2)]
+            for path, feed in zip(paths, feeds):
+                with open(path, "w", encoding="utf-8") as file:
+                    file.write(feed)
+            actual = subprocess.run([sys.executable, "-m", "interview", "--input", paths[0],
+                                     "--input", paths[1], "--input", "-"],
+                                    input=feeds[2], capture_output=True, check=True,
+                                    text=True).stdout
+        self.assertEqual(actual, expected)
@@ -0,0 +1,228 @@
+import json
+import struct
+from typing import Any, BinaryIO, Callable, Dict, Iterable, Iterator, Optional
+
+from interview.decoding import CONTROL, SAMPLE
+from interview.streamio import CHUNK_SIZE
+
+
+# Binary input framing, little-endian. Every frame is
+#   length (u32, bytes after the length field) | frame type (u8) | body
+# with bodies
+#   SAMPLE_ID      station id (u32) | timestamp (i64) | temperature (f64)
+#   SAMPLE_NAME    timestamp (i64) | temperature (f64) | utf-8 station name
+#   STATION_NAMES  repeated: station id (u32) | name length (u16) | utf-8 name
+#   CONTROL        utf-8 command [| NUL | JSON object of the command parameters]
+# A STATION_NAMES frame binds station ids to names for the SAMPLE_ID frames that follow,
+# so a name crosses the wire once. Samples and controls decode to the same dicts as their
+# JSON messages; STATION_NAMES frames are not events.
+SAMPLE_ID = 1
+SAMPLE_NAME = 2
+STATION_NAMES = 3
+CONTROL_COMMAND = 4
+
+MAX_FRAME = 1 << 20  # larger lengths are taken for garbage, e.g. JSON piped in by mistake
+
+_LENGTH = struct.Struct("<I")
+_TYPE = struct.Struct("<IB")
+_SAMPLE_ID = struct.Struct("<Iqd")
+_SAMPLE_NAME = struct.Struct("<qd")
+_NAME_ENTRY = struct.Struct("<IH")
+_SAMPLE_ID_LENGTH = 1 + _SAMPLE_ID.size
+_SAMPLE_ID_FRAME = struct.Struct("<IBIqd")  # length, type and body of a SAMPLE_ID frame
+
+
+def sample_frame(station_id: int, timestamp: int, temperature: float) -> bytes:
+    return _TYPE.pack(_SAMPLE_ID_LENGTH, SAMPLE_ID) + _SAMPLE_ID.pack(station_id, timestamp,
+                                                                     temperature)
+
+
+def sample_name_frame(station_name: str, timestamp: int, temperature: float) -> bytes:
+    name = station_name.encode()
+    return (_TYPE.pack(1 + _SAMPLE_NAME.size + len(name), SAMPLE_NAME)
+            + _SAMPLE_NAME.pack(timestamp, temperature) + name)
+
+
+def station_names_frame(names: Dict[int, str]) -> bytes:
+    body = b"".join(_NAME_ENTRY.pack(station_id, len(encoded)) + encoded
+                    for station_id, encoded in ((station_id, name.encode())
+                                                for station_id, name in names.items()))
+    return _TYPE.pack(1 + len(body), STATION_NAMES) + body
+
+
+def control_frame(command: str, parameters: Optional[Dict[str, Any]] = None) -> bytes:
+    body = command.encode()
+    if parameters:
+        body += b"\0" + json.dumps(parameters).encode()
+    return _TYPE.pack(1 + len(body), CONTROL_COMMAND) + body
+
+
+class FrameEncoder:
+    """
+    Encode input messages into frames. A station gets an id on its first sample, announced
+    in a STATION_NAMES frame just before it; later samples carry the id only.
+    """
+
+    def __init__(self) -> None:
+        self._ids: Dict[str, int] = {}
+
+    def encode(self, event: Dict[str, Any]) -> bytes:
+        """
+        Frames of an input message
+        :param event: sample or control input dict
+        :return:
+        """
+        event_type = event.get("type")
+        if event_type == SAMPLE:
+            name = event["stationName"]
+            station_id = self._ids.get(name)
+            frames = b""
+            if station_id is None:
+                station_id = self._ids[name] = len(self._ids)
+                frames = station_names_frame({station_id: name})
+            return frames + sample_frame(station_id, event["timestamp"], event["temperature"])
+        if event_type == CONTROL:
+            parameters = {key: value for key, value in event.items()
+                          if key not in ("type", "command")}
+            return control_frame(event["command"], parameters)
+        raise ValueError(f"no frame for message type {event_type!r}")
+
+
+class FrameDecoder:
+    """
+    Decode a byte stream of frames arriving in arbitrary pieces into input message dicts.
+    Frames are unpacked in place with struct.unpack_from on a memoryview of the piece,
+    prefixed with the incomplete frame the previous piece ended with, if any.
+    """
+
+    def __init__(self, skip: int = 0) -> None:
+        self._names: Dict[int, str] = {}  # station id -> name
+        self._pending = b""
+        self.skip = skip  # events to drop, e.g. the ones a checkpoint consumed
+
+    def feed(self, chunk: bytes) -> Iterator[Dict[str, Any]]:
+        """
+        Events of the frames completed by chunk
+        :param chunk: the next piece of the stream
+        :return: input dicts {str: Any} messages
+        """
+        # pylint: disable=too-many-locals
+        data = self._pending + chunk if self._pending else chunk
+        names = self._names
+        unpack_length = _LENGTH.unpack_from
+        unpack_sample = _SAMPLE_ID_FRAME.unpack_from
+        size = len(data)
+        sample_end = size - _SAMPLE_ID_FRAME.size
+        offset = 0
+        with memoryview(data) as view:
+            while offset + 5 <= size:
+                if offset <= sample_end:
+                    # the hot path, inline: a whole SAMPLE_ID frame in one unpack
+                    length, frame_type, station_id, timestamp, temperature = unpack_sample(
+                        view, offset)
+                    if length == _SAMPLE_ID_LENGTH and frame_type == SAMPLE_ID:
+                        offset += _SAMPLE_ID_FRAME.size
+                        station_name = names.get(station_id)
+                        if station_name is None:
+                            raise ValueError(f"unknown station id {station_id}, "
+                                             "no STATION_NAMES frame declared it")
+                        if self.skip:
+                            self.skip -= 1
+                            continue
+                        yield {
+                            "type"       : SAMPLE,
+                            "stationName": station_name,
+                            "timestamp"  : timestamp,
+                            "temperature": temperature
+                        }
+                        continue
+                length, = unpack_length(view, offset)
+                end = offset + 4 + length
+                if not 0 < length <= MAX_FRAME:
+                    raise ValueError(f"invalid frame length {length} at byte {offset}")
+                if end > size:
+                    break
+                event = self._decode(view[offset + 4], view[offset + 5:end])
+                offset = end
+                if event is not None:
+                    if self.skip:
+                        self.skip -= 1
+                        continue
+                    yield event
+            self._pending = bytes(view[offset:])
+
+    def close(self) -> None:
+        """
+        End of the stream, which must not stop within a frame
+        :return:
+        """
+        if self._pending:
+            raise ValueError(f"truncated frame at end of input ({len(self._pending)} bytes)")
+
+    def _decode(self, frame_type: int, body: memoryview) -> Optional[Dict[str, Any]]:
+        if frame_type == SAMPLE_NAME and len(body) >= _SAMPLE_NAME.size:
+            timestamp, temperature = _SAMPLE_NAME.unpack_from(body)
+            return {
+                "type"       : SAMPLE,
+                "stationName": str(body[_SAMPLE_NAME.size:], "utf-8"),
+                "timestamp"  : timestamp,
+                "temperature": temperature
+            }
+        if frame_type == STATION_NAMES:
+            self._read_names(body)
+            return None
+        if frame_type == CONTROL_COMMAND:
+            command, _, encoded = bytes(body).partition(b"\0")
+            parameters = json.loads(encoded) if encoded else {}
+            if not isinstance(parameters, dict) or "type" in parameters or "command" in parameters:
+                raise ValueError("control frame parameters must be a JSON object "
+                                 "without type or command")
+            return {"type": CONTROL, "command": str(command, "utf-8"), **parameters}
+        raise ValueError(f"invalid frame type {frame_type} of {len(body)} bytes")
+
+    def _read_names(self, body: memoryview) -> None:
+        offset = 0
+        while offset < len(body):
+            if offset + _NAME_ENTRY.size > len(body):
+                raise ValueError("truncated STATION_NAMES frame")
+            station_id, length = _NAME_ENTRY.unpack_from(body, offset)
+            offset += _NAME_ENTRY.size
+            if offset + length > len(body):
+                raise ValueError("truncated STATION_NAMES frame")
+            self._names[station_id] = str(body[offset:offset + length], "utf-8")
+            offset += length
+
+
+def read_frames(stream: BinaryIO,
+                chunk_size: int = CHUNK_SIZE,
+                before_read: Optional[Callable[[], None]] = None,
+                skip: int = 0) -> Iterator[Dict[str, Any]]:
+    """
+    Read a binary stream of frames into input messages
+    :param stream: binary input stream, e.g. sys.stdin.buffer
+    :param chunk_size: maximum bytes per read
+    :param before_read: called before blocking on the next read, e.g. to flush outputs
+    :param skip: sample and control events to drop, station names still apply
+    :return: input dicts {str: Any} messages
+    """
+    read = getattr(stream, "read1", stream.read)
+    decoder = FrameDecoder(skip)
+    while True:
+        if before_read is not None:
+            before_read()
+        chunk = read(chunk_size)
+        if not chunk:
+            break
+        yield from decoder.feed(chunk)
+    decoder.close()
+
+
+def encode_frames(events: Iterable[Dict[str, Any]]) -> Iterator[bytes]:
+    """
+    Frames of a stream of input messages, see FrameEncoder
+    :param events: input dicts {str: Any} messages
+    :return:
+    """
+    encoder = FrameEncoder()
+    for event in events:
+        yield encoder.encode(event)
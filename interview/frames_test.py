@@ -0,0 +1,91 @@
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from .frames import (FrameDecoder, control_frame, encode_frames, read_frames, sample_frame,
+                     sample_name_frame, station_names_frame)
+from .sharding_test import generate_stream
+
+
+class TestFrames(unittest.TestCase):
+
+    events = [
+        {"type": "sample", "stationName": "Foster Weather Station",
+         "timestamp": 1672531200000, "temperature": 37.1},
+        {"type": "sample", "stationName": "Ünicode Wéather Station",
+         "timestamp": 1672531200001, "temperature": -2.5},
+        {"type": "sample", "stationName": "Foster Weather Station",
+         "timestamp": 1672531200002, "temperature": float("-inf")},
+        {"type": "control", "command": "snapshot"},
+        {"type": "control", "command": "snapshot_window", "window": 5},
+    ]
+
+    def test_round_trip(self):
+        data = b"".join(encode_frames(self.events))
+        self.assertEqual(data.count(b"Foster"), 1, msg="a station name is sent once")
+        for chunk_size in (1, 2, 7, 64, 1 << 16):
+            decoded = list(read_frames(io.BytesIO(data), chunk_size=chunk_size))
+            self.assertEqual(decoded, self.events, msg=f"chunk_size={chunk_size}")
+        self.assertEqual(list(read_frames(io.BytesIO(data), skip=2)), self.events[2:],
+                         msg="skipped events, names still apply")
+
+    def test_frame_kinds(self):
+        data = (station_names_frame({7: "Seven", 9: "Nine"})
+                + sample_frame(9, 1, 2.5)
+                + sample_name_frame("Named", 2, -1.0)
+                + station_names_frame({9: "Renamed"})
+                + sample_frame(9, 3, 0.0)
+                + control_frame("reset"))
+        self.assertEqual(list(read_frames(io.BytesIO(data))), [
+            {"type": "sample", "stationName": "Nine", "timestamp": 1, "temperature": 2.5},
+            {"type": "sample", "stationName": "Named", "timestamp": 2, "temperature": -1.0},
+            {"type": "sample", "stationName": "Renamed", "timestamp": 3, "temperature": 0.0},
+            {"type": "control", "command": "reset"},
+        ])
+
+    def test_malformed_frames(self):
+        valid = sample_name_frame("Named", 2, -1.0)
+        for data in (sample_frame(1, 1, 1.0),  # undeclared station id
+                     valid[:-1],  # truncated
+                     b"\x01\x00\x00\x00\x09",  # unknown frame type
+                     b"\x00\x00\x00\x00",  # empty frame
+                     b'{"type": "control", "command": "snapshot"}\n',  # JSON
+                     control_frame("snapshot") + b"\0[1]",  # parameters not an object
+                     control_frame("snapshot", {"command": "reset"})):
+            decoder = FrameDecoder()
+            with self.assertRaises(ValueError, msg=data):
+                list(decoder.feed(valid + data))
+                decoder.close()
+
+    def test_entry_point_binary_input_matches_json(self):
+        events = list(generate_stream(2_000, 50, seed=5))
+        data = "".join(json.dumps(event) + "\n" for event in events).encode()
+        frames = subprocess.run([sys.executable, "-m", "interview", "frames"],
+                                input=data, capture_output=True, check=True).stdout
+        self.assertLess(len(frames), len(data) / 3)
+        for args in ([], ["--echo", "none"]):
+            expected = subprocess.run([sys.executable, "-m", "interview", *args],
+                                      input=data, capture_output=True, check=True).stdout
+            actual = subprocess.run([sys.executable, "-m", "interview", "--input-format",
+                                     "binary", *args],
+                                    input=frames, capture_output=True, check=True).stdout
+            self.assertEqual(actual, expected, msg=args)
+
+    def test_entry_point_binary_checkpoint_resume(self):
+        events = list(generate_stream(1_000, 20, seed=9))
+        frames = b"".join(encode_frames(events))
+        expected = subprocess.run([sys.executable, "-m", "interview", "--input-format", "binary"],
+                                  input=frames, capture_output=True, check=True).stdout
+        cut = b"".join(encode_frames(events[:400]))
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "checkpoint")
+            args = [sys.executable, "-m", "interview", "--input-format", "binary",
+                    "--checkpoint", path]
+            first = subprocess.run(args, input=cut, capture_output=True, check=True).stdout
+            # the whole stream again, the checkpointed events are skipped
+            second = subprocess.run(args, input=frames, capture_output=True, check=True).stdout
+        self.assertEqual(first + second, expected)
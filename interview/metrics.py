@@ -0,0 +1,128 @@
+import json
+import time
+from typing import Any, Dict, List, Optional
+
+
+SAMPLE_EVERY = 64  # one sample event in SAMPLE_EVERY is timed, a power of two
+HISTOGRAM_BUCKETS = 64  # log2 buckets of nanoseconds
+
+
+class LatencyHistogram:
+    """
+    Latency histogram in log2 nanosecond buckets: recording is a bit_length and an increment,
+    quantiles are reported as the upper bound of their bucket (within a factor of 2).
+    """
+    __slots__ = ("buckets", "count", "total", "max")
+
+    def __init__(self) -> None:
+        self.buckets: List[int] = [0] * HISTOGRAM_BUCKETS
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def record(self, nanoseconds: int) -> None:
+        self.buckets[nanoseconds.bit_length()] += 1
+        self.count += 1
+        self.total += nanoseconds
+        if nanoseconds > self.max:
+            self.max = nanoseconds
+
+    def quantile(self, q: float) -> int:
+        """
+        Upper bound, in nanoseconds, of the bucket holding the q quantile
+        :param q: in [0, 1]
+        :return: 0 when nothing was recorded
+        """
+        if not self.count:
+            return 0
+        rank = q * self.count
+        seen = 0
+        for bucket, count in enumerate(self.buckets):
+            seen += count
+            if seen >= rank and count:
+                return min(1 << bucket, self.max)
+        return self.max
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "count" : self.count,
+            "meanUs": round(self.total / self.count / 1000, 3) if self.count else 0.0,
+            "p50Us" : round(self.quantile(0.50) / 1000, 3),
+            "p99Us" : round(self.quantile(0.99) / 1000, 3),
+            "maxUs" : round(self.max / 1000, 3),
+        }
+
+
+class Metrics:  # pylint: disable=too-many-instance-attributes
+    """
+    Counters and latency histograms of a WeatherEngine. Events are always counted;
+    one event in sample_every is timed, other control messages are timed from decoding on.
+    - validation: decoding an input message
+    - aggregation: folding a sample into the stations
+    - generation: building the output message of a control message
+    - serialization: encoding an output message to JSON, one in sample_every, timed by the
+      writer it is passed to (see streamio.OutputBuffer)
+    - ingest_to_emit: from receiving an event to its output message being handed to the
+      writer, serialization excluded
+    With a dump path, the metrics are appended as a JSON line every dump_interval seconds.
+    """
+    __slots__ = ("events", "controls", "sample_mask", "started", "validation", "aggregation",
+                 "generation", "serialization", "ingest_to_emit", "dump_path", "dump_interval",
+                 "_next_dump")
+
+    def __init__(self,
+                 sample_every: int = SAMPLE_EVERY,
+                 dump_path: Optional[str] = None,
+                 dump_interval: float = 10.0) -> None:
+        if sample_every < 1 or sample_every & (sample_every - 1):
+            raise ValueError("sample_every must be a power of two")
+        self.events = 0
+        self.controls = 0
+        self.sample_mask = sample_every - 1
+        self.started = time.perf_counter_ns()
+        self.validation = LatencyHistogram()
+        self.aggregation = LatencyHistogram()
+        self.generation = LatencyHistogram()
+        self.serialization = LatencyHistogram()
+        self.ingest_to_emit = LatencyHistogram()
+        self.dump_path = dump_path
+        self.dump_interval = dump_interval
+        self._next_dump = self.started + int(dump_interval * 1e9)
+
+    def as_dict(self, samples: int, stations: int) -> Dict[str, Any]:
+        """
+        Metrics snapshot
+        :param samples: sample events processed
+        :param stations: stations tracked
+        :return:
+        """
+        elapsed = (time.perf_counter_ns() - self.started) / 1e9
+        return {
+            "events"         : self.events,
+            "samples"        : samples,
+            "controls"       : self.controls,
+            "stations"       : stations,
+            "uptimeSeconds"  : round(elapsed, 3),
+            "eventsPerSecond": round(self.events / elapsed, 1) if elapsed else 0.0,
+            "latencies"      : {
+                "validation"   : self.validation.as_dict(),
+                "aggregation"  : self.aggregation.as_dict(),
+                "generation"   : self.generation.as_dict(),
+                "serialization": self.serialization.as_dict(),
+                "ingestToEmit" : self.ingest_to_emit.as_dict(),
+            },
+        }
+
+    def maybe_dump(self, now: int, samples: int, stations: int) -> None:
+        """
+        Append the metrics to the dump file, when configured and the interval elapsed
+        :param now: time.perf_counter_ns()
+        :param samples:
+        :param stations:
+        :return:
+        """
+        if self.dump_path is None or now < self._next_dump:
+            return
+        self._next_dump = now + int(self.dump_interval * 1e9)
+        with open(self.dump_path, "a", encoding="utf-8") as file:
+            file.write(json.dumps(self.as_dict(samples, stations)) + "\n")
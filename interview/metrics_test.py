@@ -0,0 +1,57 @@
+import json
+import os
+import tempfile
+import unittest
+
+from .metrics import LatencyHistogram, Metrics
+from .weather import WeatherEngine
+
+
+class TestMetrics(unittest.TestCase):
+
+    def test_histogram_quantiles(self):
+        histogram = LatencyHistogram()
+        self.assertEqual(histogram.quantile(0.5), 0)
+        for nanoseconds in [1_000] * 98 + [1_000_000, 2_000_000]:
+            histogram.record(nanoseconds)
+        self.assertEqual(histogram.count, 100)
+        # within a factor of two of the exact quantile
+        self.assertTrue(1_000 <= histogram.quantile(0.5) < 2_000)
+        self.assertTrue(1_000 <= histogram.quantile(0.98) < 2_000)
+        self.assertTrue(1_000_000 <= histogram.quantile(0.99) <= 2_000_000)
+        self.assertEqual(histogram.quantile(1.0), 2_000_000)
+        self.assertEqual(histogram.as_dict()["maxUs"], 2_000.0)
+
+    def test_stats_command(self):
+        engine = WeatherEngine(metrics=Metrics(sample_every=2))
+        samples = [{"type": "sample", "stationName": f"Station {i % 3}",
+                    "timestamp": 1672531200000 + i, "temperature": float(i)} for i in range(10)]
+        cmd_stats = {"type": "control", "command": "stats"}
+        cmd_snapshot = {"type": "control", "command": "snapshot"}
+        outputs = list(engine.process_events([cmd_stats] + samples + [cmd_snapshot, cmd_stats]))
+        self.assertEqual([output["type"] for output in outputs].count("stats"), 1,
+                         msg="no data yet")
+        stats = outputs[-1]
+        self.assertEqual(stats["asOf"], 1672531200009)
+        metrics = stats["metrics"]
+        self.assertEqual((metrics["events"], metrics["samples"], metrics["controls"],
+                          metrics["stations"]), (13, 10, 3, 3))
+        self.assertEqual(metrics["latencies"]["aggregation"]["count"], 5)
+        self.assertEqual(metrics["latencies"]["generation"]["count"], 1)
+        self.assertEqual(metrics["latencies"]["serialization"]["count"], 0,
+                         msg="timed by the writer")
+        json.dumps(stats)
+
+    def test_periodic_dump(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "stats.jsonl")
+            engine = WeatherEngine(echo="none",
+                                   metrics=Metrics(sample_every=1, dump_path=path,
+                                                   dump_interval=0.0))
+            list(engine.process_events({"type": "sample", "stationName": "a",
+                                        "timestamp": i, "temperature": 1.0} for i in range(3)))
+            with open(path, encoding="utf-8") as file:
+                dumps = [json.loads(line) for line in file]
+        self.assertEqual([dump["samples"] for dump in dumps], [1, 2, 3])
+        with self.assertRaises(ValueError):
+            Metrics(sample_every=3)
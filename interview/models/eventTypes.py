@@ -9,3 +9,9 @@ class EventTypes(Enum):
 class CommandTypes(Enum):
     snapshot = auto()
     reset = auto()
+    snapshot_delta = auto()
+    stats = auto()
+    snapshot_window = auto()
+    topk = auto()
+    profile_start = auto()
+    profile_stop = auto()
@@ -0,0 +1,9 @@
+from typing import Literal
+from pydantic import BaseModel, StrictInt
+
+
+class EvictionOutput(BaseModel):
+    type: Literal["eviction"]  # The output type ("eviction" in this instance)
+    asOf: StrictInt  # Timestamp of the sample whose arrival evicted the stations
+    stations: dict[str, dict]  # The evicted stations, least recently reported first, with
+    # their high and low temperature values; they start over if they report again
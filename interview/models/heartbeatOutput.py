@@ -0,0 +1,8 @@
+from typing import Literal
+from pydantic import BaseModel, StrictInt
+
+
+class HeartbeatOutput(BaseModel):
+    type: Literal["heartbeat"]  # The output type ("heartbeat" in this instance)
+    samples: StrictInt  # Number of sample events processed so far, emitted every N samples
+    # in place of the sample echoes.
@@ -0,0 +1,9 @@
+from typing import Literal
+from pydantic import BaseModel, StrictInt, StrictStr
+
+
+class ProfileOutput(BaseModel):
+    type: Literal["profile"]  # The output type ("profile" in this instance)
+    asOf: StrictInt  # The most recent weather sample timestamp received
+    profile: StrictStr  # Path of the cProfile stats of the session, see pstats
+    allocations: StrictStr  # Path of the report of the session's top allocation sites
@@ -0,0 +1,11 @@
+from typing import Literal
+from pydantic import BaseModel, StrictInt
+
+
+class SnapshotDeltaOutput(BaseModel):
+    type: Literal["snapshot_delta"]  # The output type ("snapshot_delta" in this instance)
+    asOf: StrictInt  # The most recent weather sample timestamp received at the point when
+    # the delta snapshot was taken.
+    stations: dict[str, dict]  # Only the stations whose high or low temperature changed
+    # since the previous snapshot (full or delta), with their current high and low values.
+    # Applying it over the previous snapshot gives the current full snapshot.
@@ -0,0 +1,11 @@
+from typing import List, Literal, Optional
+from pydantic import StrictStr
+
+from interview.models.baseEvent import BaseEvent
+
+
+class SnapshotEvent(BaseEvent):
+    type: Literal["control"]
+    command: Literal["snapshot"]
+    stations: Optional[List[StrictStr]] = None  # Only these stations, when given
+    prefix: Optional[StrictStr] = None  # Only the stations whose name starts with prefix
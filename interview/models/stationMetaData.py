@@ -0,0 +1,15 @@
+from pydantic import BaseModel, StrictStr, StrictInt, StrictFloat
+
+
+class StationMetaData(BaseModel):
+    stationName: StrictStr  # A human-readable string identifying the weather station
+    timestamp: StrictInt  # A UTC millisecond precision timestamp representing when the sample
+    # was taken,
+    # as an integer number. This timestamp is guaranteed to increase in subsequent samples.
+    temperature: StrictFloat  # The floating point Fahrenheit temperature
+
+
+class StationOutputMetaData(BaseModel):
+    stationName: StrictStr
+    high: StrictFloat
+    low: StrictFloat
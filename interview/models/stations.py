@@ -1,36 +1,382 @@
-from typing import Dict
-from pydantic import BaseModel, StrictStr, StrictInt, StrictFloat
+from array import array
+from bisect import bisect_left, insort
+from heapq import heapify, heappop, heappush
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 
+if TYPE_CHECKING:
+    from interview.models.stationMetaData import StationMetaData
 
-class StationMetaData(BaseModel):
-    stationName: StrictStr  # A human-readable string identifying the weather station
-    timestamp: StrictInt  # A UTC millisecond precision timestamp representing when the sample
-    # was taken,
-    # as an integer number. This timestamp is guaranteed to increase in subsequent samples.
-    temperature: StrictFloat  # The floating point Fahrenheit temperature
 
+def __getattr__(name: str) -> Any:
+    # the pydantic models are imported on first use, the monitor does not need pydantic
+    if name in ("StationMetaData", "StationOutputMetaData"):
+        from interview.models import stationMetaData  # pylint: disable=import-outside-toplevel
+        return getattr(stationMetaData, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-class StationOutputMetaData(BaseModel):
-    stationName: StrictStr
-    high: StrictFloat
-    low: StrictFloat
 
+class StationsMonitor:  # pylint: disable=too-many-instance-attributes
+    """
+    Mutable aggregation engine of the high/low temperature per station.
+    Station names are interned into dense integer ids; highs and lows live in contiguous
+    array('d') buffers indexed by id, so a station costs a dict entry, a list slot and two
+    unboxed doubles. Names are only paired with their values when outputs are materialized.
+    Samples are folded in place, so an update costs O(1) regardless of the number of stations.
+    Stations whose high or low changed are tracked as dirty until the changes are collected,
+    and version is bumped on every change so derived outputs can be cached.
+    A sorted index of the names serves prefix queries; it catches up on the stations added
+    since the previous query, so ingest does not pay for it, and is kept in step on removal.
+    Once track_ranking is called, every raised high (lowered low) is also pushed onto a heap,
+    which ranks the hottest (coldest) stations without a scan; highs only rise and lows only
+    fall until reset, so an entry goes stale only when its station moves further.
+    """
+    __slots__ = ("_ids", "_names", "_highs", "_lows", "_dirty", "_sorted", "_hottest", "_coldest",
+                 "version")
 
-class StationsMonitor(BaseModel):
-    stations: Dict[str, Dict[str, float]] = {}
-    
-    def __add__(self, other: StationMetaData) -> "StationsMonitor":
-        updated = self.stations.copy()
-        if other.stationName in updated:
-            current = updated[other.stationName]
-            current['high'] = max(current['high'], other.temperature)
-            current['low'] = min(current['low'], other.temperature)
+    def __init__(self, stations: Optional[Dict[str, Dict[str, float]]] = None) -> None:
+        self._ids: Dict[str, int] = {}  # station name -> station id
+        self._names: List[str] = []  # station id -> station name, in order of first appearance
+        self._highs = array("d")  # station id -> high
+        self._lows = array("d")  # station id -> low
+        self._dirty: Dict[int, None] = {}  # insertion ordered set of changed station ids
+        self._sorted: List[str] = []  # sorted names of the first len(_sorted) station ids
+        # (-high, station id) and (low, station id) heaps, stale entries included, when ranked
+        self._hottest: Optional[List[Tuple[float, int]]] = None
+        self._coldest: Optional[List[Tuple[float, int]]] = None
+        self.version = 0  # bumped whenever a high/low changes, a station is added or on reset
+        for name, values in (stations or {}).items():
+            self.merge(name, values['high'], values['low'])
+
+    @property
+    def stations(self) -> Dict[str, Dict[str, float]]:
+        """
+        Materialize the aggregates as {stationName: {"high": float, "low": float}}
+        :return:
+        """
+        return {name: {'high': high, 'low': low}
+                for name, high, low in zip(self._names, self._highs, self._lows)}
+
+    def items(self) -> Iterator[Tuple[str, float, float]]:
+        """
+        Iterate (stationName, high, low) in order of first appearance
+        :return:
+        """
+        return zip(self._names, self._highs, self._lows)
+
+    def columns(self) -> Tuple[Sequence[str], array, array]:
+        """
+        Names, highs and lows indexed by station id, in order of first appearance.
+        The buffers are the monitor's own and must not be modified.
+        :return:
+        """
+        return self._names, self._highs, self._lows
+
+    def get(self, station_name: str) -> Optional[Tuple[float, float]]:
+        """
+        High and low of a station
+        :param station_name:
+        :return: None for an unknown station
+        """
+        station_id = self._ids.get(station_name)
+        if station_id is None:
+            return None
+        return self._highs[station_id], self._lows[station_id]
+
+    def select(self, station_names: Iterable[str]) -> Dict[str, Dict[str, float]]:
+        """
+        Materialize the given stations as {stationName: {"high": float, "low": float}},
+        in the order given; unknown stations are left out
+        :param station_names:
+        :return:
+        """
+        ids = self._ids
+        highs = self._highs
+        lows = self._lows
+        selected = {}
+        for name in station_names:
+            station_id = ids.get(name)
+            if station_id is not None:
+                selected[name] = {'high': highs[station_id], 'low': lows[station_id]}
+        return selected
+
+    def with_prefix(self, prefix: str) -> List[str]:
+        """
+        Names of the stations starting with prefix, sorted, from the sorted name index
+        :param prefix:
+        :return:
+        """
+        names = self._sorted
+        indexed = len(names)
+        if indexed < len(self._names):
+            added = self._names[indexed:]
+            if len(added) * 8 < indexed:
+                for name in added:
+                    insort(names, name)
+            else:
+                names += added
+                names.sort()
+        matches = []
+        for position in range(bisect_left(names, prefix), len(names)):
+            name = names[position]
+            if not name.startswith(prefix):
+                break
+            matches.append(name)
+        return matches
+
+    def track_ranking(self) -> None:
+        """
+        Maintain the hottest and coldest station heaps from now on, see top
+        :return:
+        """
+        self._hottest = []
+        self._coldest = []
+        self._rebuild_ranking()
+
+    def top(self, k: int) -> Tuple[List[Tuple[str, float, float]], List[Tuple[str, float, float]]]:
+        """
+        The k stations with the highest high and the k with the lowest low, as
+        (stationName, high, low), in O(k log k) plus the stale heap entries skipped.
+        Ties go to the station seen first; stations with NaN aggregates are not ranked.
+        :param k:
+        :return: hottest first, coldest first
+        """
+        if self._hottest is None or self._coldest is None:
+            raise ValueError("ranking is not tracked, see track_ranking")
+        return (self._top(self._hottest, self._highs, -1.0, k),
+                self._top(self._coldest, self._lows, 1.0, k))
+
+    def _top(self, heap: List[Tuple[float, int]], values: array, sign: float,
+             k: int) -> List[Tuple[str, float, float]]:
+        # best first walk of the heap: a node is only visited once its parent was
+        # entries of removed ids are out of range or describe the station now holding the id,
+        # which is then ranked correctly, at most once
+        ranked: List[Tuple[str, float, float]] = []
+        seen = set()
+        stations = len(values)
+        frontier = [(heap[0], 0)] if heap and k > 0 else []
+        while frontier and len(ranked) < k:
+            (key, station_id), position = heappop(frontier)
+            if (station_id < stations and values[station_id] * sign == key
+                    and station_id not in seen):
+                seen.add(station_id)
+                ranked.append((self._names[station_id], self._highs[station_id],
+                               self._lows[station_id]))
+            for child in (2 * position + 1, 2 * position + 2):
+                if child < len(heap):
+                    heappush(frontier, (heap[child], child))
+        return ranked
+
+    def _rebuild_ranking(self) -> None:
+        # current entries only, NaN aggregates are left out as they do not order
+        if self._hottest is None or self._coldest is None:
+            return
+        hottest = self._hottest
+        coldest = self._coldest
+        hottest[:] = [(-high, station_id) for station_id, high in enumerate(self._highs)
+                      if high == high]  # pylint: disable=comparison-with-itself
+        coldest[:] = [(low, station_id) for station_id, low in enumerate(self._lows)
+                      if low == low]  # pylint: disable=comparison-with-itself
+        heapify(hottest)
+        heapify(coldest)
+
+    def _rank(self, station_id: int, high: Optional[float], low: Optional[float]) -> None:
+        # called on change only, stale entries are dropped once they outnumber the stations
+        if self._hottest is None or self._coldest is None:
+            return
+        if high is not None and high == high:  # pylint: disable=comparison-with-itself
+            heappush(self._hottest, (-high, station_id))
+        if low is not None and low == low:  # pylint: disable=comparison-with-itself
+            heappush(self._coldest, (low, station_id))
+        if len(self._hottest) + len(self._coldest) > 4 * len(self._names) + 64:
+            self._rebuild_ranking()
+
+    def _add(self, station_name: str, high: float, low: float) -> None:
+        station_id = self._ids[station_name] = len(self._names)
+        self._names.append(station_name)
+        self._highs.append(high)
+        self._lows.append(low)
+        self._dirty[station_id] = None
+        self.version += 1
+        if self._hottest is not None:
+            self._rank(station_id, high, low)
+
+    def update(self, station_name: str, temperature: float) -> None:
+        """
+        Fold a temperature sample into the station aggregate, in place
+        :param station_name:
+        :param temperature:
+        :return:
+        """
+        station_id = self._ids.get(station_name)
+        if station_id is None:
+            self._add(station_name, temperature, temperature)
+            return
+        highs = self._highs
+        if temperature > highs[station_id]:
+            highs[station_id] = temperature
+            if self._hottest is not None:
+                self._rank(station_id, temperature, None)
         else:
-            updated[other.stationName] = {
-                'high': other.temperature,
-                'low' : other.temperature
-            }
-        return StationsMonitor(stations=updated)
-        
+            lows = self._lows
+            if temperature < lows[station_id]:
+                lows[station_id] = temperature
+                if self._hottest is not None:
+                    self._rank(station_id, None, temperature)
+            else:
+                return
+        self._dirty[station_id] = None
+        self.version += 1
+
+    def merge(self, station_name: str, high: float, low: float) -> None:
+        """
+        Fold a pre-aggregated high/low of a station into its aggregate, in place
+        :param station_name:
+        :param high:
+        :param low:
+        :return:
+        """
+        station_id = self._ids.get(station_name)
+        if station_id is None:
+            self._add(station_name, high, low)
+            return
+        highs = self._highs
+        lows = self._lows
+        raised = high > highs[station_id]
+        lowered = low < lows[station_id]
+        if raised or lowered:
+            highs[station_id] = max(highs[station_id], high)
+            lows[station_id] = min(lows[station_id], low)
+            if self._hottest is not None:
+                self._rank(station_id, highs[station_id] if raised else None,
+                           lows[station_id] if lowered else None)
+        else:
+            return
+        self._dirty[station_id] = None
+        self.version += 1
+
+    def remove(self, station_name: str) -> Optional[Tuple[float, float]]:
+        """
+        Drop a station, e.g. on eviction. The last station takes over the freed id, so the
+        buffers stay dense; it moves to the dropped station's place in the outputs.
+        :param station_name:
+        :return: high and low of the dropped station, None for an unknown station
+        """
+        station_id = self._ids.pop(station_name, None)
+        if station_id is None:
+            return None
+        names = self._names
+        highs = self._highs
+        lows = self._lows
+        removed = highs[station_id], lows[station_id]
+        last = len(names) - 1
+        moved = names[last]
+        indexed = self._sorted
+        if station_id < len(indexed):
+            # kept in step, a bisect and a list shift, so prefix queries stay proportional
+            # to their matches under eviction
+            moved_indexed = last < len(indexed)
+            del indexed[bisect_left(indexed, station_name)]
+            if not moved_indexed:
+                # the moved station lands in the indexed ids
+                insort(indexed, moved)
+        self._dirty.pop(station_id, None)
+        if station_id != last:
+            names[station_id] = moved
+            highs[station_id] = highs[last]
+            lows[station_id] = lows[last]
+            self._ids[moved] = station_id
+            if self._dirty.pop(last, False) is None:
+                self._dirty[station_id] = None
+            if self._hottest is not None:
+                self._rank(station_id, highs[station_id], lows[station_id])
+        names.pop()
+        highs.pop()
+        lows.pop()
+        self.version += 1
+        return removed
+
+    def pop_dirty(self) -> Dict[str, Dict[str, float]]:
+        """
+        Materialize the stations whose high or low changed since the last collection,
+        in order of change, and mark them clean
+        :return:
+        """
+        names = self._names
+        highs = self._highs
+        lows = self._lows
+        changes = {names[station_id]: {'high': highs[station_id], 'low': lows[station_id]}
+                   for station_id in self._dirty}
+        self._dirty.clear()
+        return changes
+
+    def clear_dirty(self) -> None:
+        self._dirty.clear()
+
+    def __add__(self, other: "StationMetaData") -> "StationsMonitor":
+        # Backwards compatible, a new monitor is returned and self is left unchanged;
+        # += updates in place without copying the stations.
+        added = StationsMonitor()
+        added.restore(self._names, self._highs, self._lows)
+        added.update(other.stationName, other.temperature)
+        return added
+
+    def __iadd__(self, other: "StationMetaData") -> "StationsMonitor":
+        self.update(other.stationName, other.temperature)
+        return self
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, StationsMonitor):
+            return NotImplemented
+        if len(self) != len(other):
+            return False
+        other_ids = other._ids
+        for name, high, low in self.items():
+            other_id = other_ids.get(name)
+            if (other_id is None
+                    or other._highs[other_id] != high or other._lows[other_id] != low):
+                return False
+        return True
+
+    def __repr__(self) -> str:
+        return f"StationsMonitor(stations={self.stations!r})"
+
     def reset(self) -> None:
-        self.stations.clear()
+        self._ids.clear()
+        self._names.clear()
+        del self._highs[:]
+        del self._lows[:]
+        self._dirty.clear()
+        self._sorted.clear()
+        if self._hottest is not None and self._coldest is not None:
+            self._hottest.clear()
+            self._coldest.clear()
+        self.version += 1
+
+    def restore(self,
+                names: Sequence[str],
+                highs: Iterable[float],
+                lows: Iterable[float],
+                dirty: bool = False) -> None:
+        """
+        Replace every station with the given aggregates in one pass, e.g. from a checkpoint.
+        :param names: unique station names
+        :param highs:
+        :param lows:
+        :param dirty: mark every restored station as changed, otherwise none is
+        :return:
+        """
+        self._names = list(names)
+        self._ids = dict(zip(self._names, range(len(self._names))))
+        self._highs = array("d", highs)
+        self._lows = array("d", lows)
+        if not len(self._highs) == len(self._lows) == len(self._names):
+            raise ValueError("one high and one low per station is required")
+        self._dirty.clear()
+        if dirty:
+            self._dirty.update(dict.fromkeys(range(len(self._names))))
+        self._sorted.clear()
+        self._rebuild_ranking()
+        self.version += 1
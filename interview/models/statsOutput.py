@@ -0,0 +1,9 @@
+from typing import Literal
+from pydantic import BaseModel, StrictInt
+
+
+class StatsOutput(BaseModel):
+    type: Literal["stats"]  # The output type ("stats" in this instance)
+    asOf: StrictInt  # The most recent weather sample timestamp received
+    metrics: dict  # Event counters, station count, throughput and latency histograms
+    # (validation, aggregation, generation, serialization, ingest to emit) of the engine.
@@ -0,0 +1,10 @@
+from typing import Literal
+from pydantic import Field, StrictInt
+
+from interview.models.baseEvent import BaseEvent
+
+
+class TopKEvent(BaseEvent):
+    type: Literal["control"]
+    command: Literal["topk"]
+    k: StrictInt = Field(default=10, gt=0)  # Number of hottest and of coldest stations
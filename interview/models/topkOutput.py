@@ -0,0 +1,12 @@
+from typing import List, Literal
+from pydantic import BaseModel, StrictInt
+
+from interview.models.stationMetaData import StationOutputMetaData
+
+
+class TopKOutput(BaseModel):
+    type: Literal["topk"]  # The output type ("topk" in this instance)
+    asOf: StrictInt  # The most recent weather sample timestamp received
+    hottest: List[StationOutputMetaData]  # The k stations with the highest high, hottest
+    # first; ties go to the station seen first
+    coldest: List[StationOutputMetaData]  # The k stations with the lowest low, coldest first
@@ -0,0 +1,11 @@
+from typing import Literal
+from pydantic import Field, StrictInt
+
+from interview.models.baseEvent import BaseEvent
+
+
+class WindowSnapshotEvent(BaseEvent):
+    type: Literal["control"]
+    command: Literal["snapshot_window"]
+    window: StrictInt = Field(gt=0)  # Window length in milliseconds, the snapshot covers
+    # the samples with a timestamp in (asOf - window, asOf]
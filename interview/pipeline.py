@@ -0,0 +1,156 @@
+import asyncio
+from typing import Any, BinaryIO, Callable, Dict, Generator, Iterable, List, Optional
+
+from interview.codec import JsonCodec
+from interview.streamio import CHUNK_SIZE, LineSkipper, LineSplitter
+
+
+Processor = Callable[[Iterable[Dict[str, Any]]], Generator[Dict[str, Any], None, None]]
+
+QUEUE_SIZE = 64  # chunks buffered between two stages
+
+_END = None  # end of stream marker passed down the stages
+
+
+class QueueStats:
+    """
+    Depth of a stage queue, sampled on every put
+    """
+    __slots__ = ("puts", "total_depth", "max_depth")
+
+    def __init__(self) -> None:
+        self.puts = 0
+        self.total_depth = 0
+        self.max_depth = 0
+
+    def record(self, depth: int) -> None:
+        self.puts += 1
+        self.total_depth += depth
+        if depth > self.max_depth:
+            self.max_depth = depth
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"puts": self.puts, "maxDepth": self.max_depth,
+                "meanDepth": self.total_depth / self.puts if self.puts else 0.0}
+
+
+class PipelinedRunner:  # pylint: disable=too-many-instance-attributes
+    """
+    Run the event processing as four asyncio stages connected by bounded queues:
+    reader (chunks of complete lines) -> decoder (JSON objects) -> aggregator (serialized
+    outputs) -> writer. Blocking reads and writes run in worker threads, so a slow consumer
+    does not stall ingestion until the queues fill up. Each stage is a single task consuming
+    its queue in order, so outputs keep the order process_events yields them in.
+    """
+
+    def __init__(self,  # pylint: disable=too-many-arguments
+                 process: Processor,
+                 queue_size: int = QUEUE_SIZE,
+                 chunk_size: int = CHUNK_SIZE,
+                 skip: int = 0,
+                 codec: Optional[JsonCodec] = None) -> None:
+        self._process = process
+        self._codec = codec or JsonCodec()
+        self._skip = skip  # input lines dropped before processing
+        self._queue_size = queue_size
+        self._chunk_size = chunk_size
+        self.stats: Dict[str, QueueStats] = {}
+        self._error: Optional[Exception] = None  # raised from run once the outputs are written
+        self._stopped = False  # no more input is read after an error
+
+    def run(self, input_stream: BinaryIO, output_stream: BinaryIO) -> None:
+        asyncio.run(self.run_async(input_stream, output_stream))
+
+    async def run_async(self, input_stream: BinaryIO, output_stream: BinaryIO) -> None:
+        """
+        Process input_stream into output_stream. A processing error is raised once the
+        outputs of the events before it are written, an I/O error cancels the other stages.
+        :param input_stream: binary input stream, e.g. sys.stdin.buffer
+        :param output_stream: binary output stream, e.g. sys.stdout.buffer
+        :return:
+        """
+        self._error = None
+        self._stopped = False
+        self.stats = {name: QueueStats() for name in ("lines", "events", "outputs")}
+        lines: asyncio.Queue = asyncio.Queue(self._queue_size)
+        events: asyncio.Queue = asyncio.Queue(self._queue_size)
+        outputs: asyncio.Queue = asyncio.Queue(self._queue_size)
+        async with asyncio.TaskGroup() as group:
+            group.create_task(self._reader(input_stream, lines))
+            group.create_task(self._decoder(lines, events))
+            group.create_task(self._aggregator(events, outputs))
+            group.create_task(self._writer(outputs, output_stream))
+        if self._error is not None:
+            raise self._error
+
+    def stats_dict(self) -> Dict[str, Dict[str, Any]]:
+        return {name: stats.as_dict() for name, stats in self.stats.items()}
+
+    async def _put(self, queue: asyncio.Queue, name: str, item: Any) -> None:
+        self.stats[name].record(queue.qsize())
+        await queue.put(item)
+
+    async def _reader(self, stream: BinaryIO, lines: asyncio.Queue) -> None:
+        read = getattr(stream, "read1", stream.read)
+        splitter = LineSplitter()
+        skipper = LineSkipper(self._skip)
+        # after an error downstream, stop once the pending read returns
+        while not self._stopped and (chunk := await asyncio.to_thread(read, self._chunk_size)):
+            for line in splitter.feed(chunk):
+                if kept := skipper(line):
+                    await self._put(lines, "lines", kept)
+        if not self._stopped:
+            for line in splitter.close():
+                if kept := skipper(line):
+                    await self._put(lines, "lines", kept)
+        await lines.put(_END)
+
+    async def _decoder(self, lines: asyncio.Queue, events: asyncio.Queue) -> None:
+        iter_lines = self._codec.iter_lines
+        failed = False
+        while (line := await lines.get()) is not _END:
+            if failed:
+                continue
+            batch: List[Any] = []
+            try:
+                batch.extend(iter_lines(line))
+            except ValueError as exc:
+                # objects before the malformed line are still processed, then the error
+                failed = self._stopped = True
+                if batch:
+                    await self._put(events, "events", batch)
+                await self._put(events, "events", exc)
+                continue
+            await self._put(events, "events", batch)
+        await events.put(_END)
+
+    async def _aggregator(self, events: asyncio.Queue, outputs: asyncio.Queue) -> None:
+        process = self._process
+        encode = self._codec.encode
+        while (batch := await events.get()) is not _END:
+            if self._error is not None:
+                continue
+            if isinstance(batch, Exception):
+                self._error = batch
+                continue
+            output = bytearray()
+            try:
+                for message in process(batch):
+                    output += encode(message)
+                    output += b"\n"
+            except Exception as exc:  # pylint: disable=broad-exception-caught
+                # the writer delivers the outputs so far, then the error is raised from run
+                self._error = exc
+                self._stopped = True
+            if output:
+                await self._put(outputs, "outputs", output)
+        await outputs.put(_END)
+
+    @staticmethod
+    async def _writer(outputs: asyncio.Queue, stream: BinaryIO) -> None:
+        def write(data: bytearray) -> None:
+            stream.write(data)
+            stream.flush()
+
+        while (data := await outputs.get()) is not _END:
+            await asyncio.to_thread(write, data)
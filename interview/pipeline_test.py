@@ -0,0 +1,40 @@
+import io
+import json
+import unittest
+
+from pydantic import ValidationError
+
+from .pipeline import PipelinedRunner
+from .sharding_test import generate_stream
+from .weather import WeatherEngine
+
+
+class TestPipelinedRunner(unittest.TestCase):
+
+    @staticmethod
+    def encode(events) -> bytes:
+        return "".join(json.dumps(event) + "\n" for event in events).encode()
+
+    def test_outputs_match_process_events(self):
+        events = list(generate_stream(3_000, 30, seed=7))
+        expected = self.encode(WeatherEngine().process_events(events))
+        for queue_size, chunk_size in ((1, 97), (4, 4096), (64, 1 << 16)):
+            output = io.BytesIO()
+            runner = PipelinedRunner(WeatherEngine().process_events, queue_size, chunk_size)
+            runner.run(io.BytesIO(self.encode(events)), output)
+            self.assertEqual(output.getvalue(), expected, msg=f"queue size {queue_size}")
+            stats = runner.stats_dict()
+            self.assertEqual(set(stats), {"lines", "events", "outputs"})
+            self.assertLessEqual(stats["lines"]["maxDepth"], queue_size)
+            self.assertGreater(stats["outputs"]["puts"], 0)
+
+    def test_errors_raise_after_preceding_outputs(self):
+        events = list(generate_stream(50, 3, seed=8))
+        for bad_line in (b'{"type": "unknown"}\n', b'not json\n'):
+            data = self.encode(events) + bad_line + self.encode(events)
+            output = io.BytesIO()
+            runner = PipelinedRunner(WeatherEngine().process_events, chunk_size=64)
+            with self.assertRaises((ValidationError, json.JSONDecodeError)):
+                runner.run(io.BytesIO(data), output)
+            self.assertEqual(output.getvalue(),
+                             self.encode(WeatherEngine().process_events(events)))
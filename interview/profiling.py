@@ -0,0 +1,86 @@
+import cProfile
+import os
+import tracemalloc
+from logging import getLogger
+from typing import Optional, Tuple
+
+
+logger = getLogger(__name__)
+
+TOP_ALLOCATIONS = 25  # allocation sites written per profile
+TRACEMALLOC_FRAMES = 1  # frames kept per allocation, the site only
+
+
+class Profiler:
+    """
+    On demand cProfile and tracemalloc session of a running process, e.g. toggled by control
+    messages or a signal. Nothing is hooked while stopped, so an idle profiler costs nothing.
+    Each session writes a pstats file and the top allocation sites into directory.
+    """
+    __slots__ = ("directory", "sessions", "_profile", "_owns_tracemalloc")
+
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+        self.sessions = 0  # sessions written so far
+        self._profile: Optional[cProfile.Profile] = None
+        self._owns_tracemalloc = False
+
+    @property
+    def running(self) -> bool:
+        return self._profile is not None
+
+    def start(self) -> bool:
+        """
+        Start profiling the current thread and tracing allocations
+        :return: False when a session is already running or another profiler is active
+        """
+        if self._profile is not None:
+            return False
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError as exc:
+            # another profiling tool holds the hook
+            logger.warning("profiling not started: %s", exc)
+            return False
+        self._profile = profile
+        # tracing started elsewhere, e.g. PYTHONTRACEMALLOC, is left running on stop
+        self._owns_tracemalloc = not tracemalloc.is_tracing()
+        if self._owns_tracemalloc:
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+        return True
+
+    def stop(self) -> Optional[Tuple[str, str]]:
+        """
+        Stop the session and write its profile and allocation sites
+        :return: paths of the pstats file and of the allocations report, None when not running
+        """
+        profile = self._profile
+        if profile is None:
+            return None
+        profile.disable()
+        self._profile = None
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        if self._owns_tracemalloc:
+            tracemalloc.stop()
+        self.sessions += 1
+        os.makedirs(self.directory, exist_ok=True)
+        stem = os.path.join(self.directory, f"profile-{os.getpid()}-{self.sessions}")
+        profile.dump_stats(f"{stem}.pstats")
+        with open(f"{stem}.allocations.txt", "w", encoding="utf-8") as file:
+            file.write(f"traced memory: {current} B current, {peak} B peak\n")
+            for stat in snapshot.statistics("lineno")[:TOP_ALLOCATIONS]:
+                file.write(f"{stat}\n")
+        return f"{stem}.pstats", f"{stem}.allocations.txt"
+
+    def toggle(self) -> None:
+        """
+        Start a session, or stop and write the running one, e.g. from a signal handler
+        :return:
+        """
+        if self.running:
+            paths = self.stop()
+            logger.warning("profile written to %s", paths)
+        else:
+            self.start()
@@ -0,0 +1,66 @@
+import os
+import pstats
+import tempfile
+import tracemalloc
+import unittest
+
+from interview.models.profileOutput import ProfileOutput
+from .profiling import Profiler
+from .weather import ECHO_NONE, WeatherEngine
+
+
+def samples(start: int, stop: int):
+    for i in range(start, stop):
+        yield {"type": "sample", "stationName": f"Station {i % 10}", "timestamp": i,
+               "temperature": float(i % 7)}
+
+
+PROFILE_START = {"type": "control", "command": "profile_start"}
+PROFILE_STOP = {"type": "control", "command": "profile_stop"}
+
+
+class TestProfiler(unittest.TestCase):
+
+    def test_control_messages_toggle_a_session(self):
+        with tempfile.TemporaryDirectory() as directory:
+            profiler = Profiler(directory)
+            engine = WeatherEngine(echo=ECHO_NONE, profiler=profiler)
+            events = [*samples(0, 100), PROFILE_START, *samples(100, 1_000), PROFILE_STOP,
+                      PROFILE_STOP]
+            outputs = list(engine.process_events(events))
+            # a stop without a running session is ignored
+            self.assertEqual(len(outputs), 1)
+            output = outputs[0]
+            self.assertEqual(output["type"], "profile")
+            self.assertEqual(output["asOf"], 999)
+            self.assertEqual(ProfileOutput.model_validate(output).model_dump(), output)
+            self.assertFalse(tracemalloc.is_tracing())
+            stats = pstats.Stats(output["profile"])
+            functions = {name for _, _, name in stats.stats}  # type: ignore[attr-defined]
+            self.assertIn("update", functions)
+            with open(output["allocations"], encoding="utf-8") as file:
+                self.assertTrue(file.readline().startswith("traced memory"))
+            self.assertEqual(sorted(os.listdir(directory)),
+                             sorted(os.path.basename(output[key])
+                                    for key in ("profile", "allocations")))
+
+            # sessions are numbered, a second start while running is a no op
+            self.assertTrue(profiler.start())
+            self.assertFalse(profiler.start())
+            profiler.toggle()
+            self.assertFalse(profiler.running)
+            self.assertEqual(profiler.sessions, 2)
+
+    def test_no_output_before_data(self):
+        with tempfile.TemporaryDirectory() as directory:
+            engine = WeatherEngine(echo=ECHO_NONE, profiler=Profiler(directory))
+            self.assertEqual(list(engine.process_events([PROFILE_START, PROFILE_STOP])), [])
+            # the session is still written
+            self.assertEqual(len(os.listdir(directory)), 2)
+            self.assertFalse(tracemalloc.is_tracing())
+
+    def test_commands_need_a_profiler(self):
+        engine = WeatherEngine(echo=ECHO_NONE)
+        self.assertEqual(list(engine.process_events([*samples(0, 10), PROFILE_START,
+                                                     PROFILE_STOP])), [])
+        self.assertFalse(tracemalloc.is_tracing())
@@ -0,0 +1,141 @@
+import asyncio
+import json
+from logging import getLogger
+from typing import Any, Dict, Iterable, List, Optional
+
+from interview.codec import JsonCodec
+from interview.streamio import CHUNK_SIZE, LineSplitter
+from interview.weather import WeatherEngine
+
+
+logger = getLogger(__name__)
+
+
+class StreamServer:
+    """
+    Serve many independent event streams from one process, one per connection.
+    Each connection gets its own WeatherEngine; events and outputs are newline delimited
+    JSON, as on STDIN/STDOUT. The outputs of a chunk are written before the next read,
+    so a producer that does not consume its outputs stops being read (backpressure).
+    """
+
+    def __init__(self, chunk_size: int = CHUNK_SIZE, codec: Optional[JsonCodec] = None) -> None:
+        self._chunk_size = chunk_size
+        self._codec = codec or JsonCodec()
+        self.connections = 0  # open connections
+
+    async def start(self,
+                    path: Optional[str] = None,
+                    host: Optional[str] = None,
+                    port: int = 0) -> asyncio.AbstractServer:
+        """
+        Listen on a Unix domain socket at path, or on a TCP host and port
+        :param path: Unix domain socket path
+        :param host: TCP host, when no path is given
+        :param port: TCP port, 0 picks a free one
+        :return: the listening server
+        """
+        if path is not None:
+            return await asyncio.start_unix_server(self.handle, path=path)
+        return await asyncio.start_server(self.handle, host=host, port=port)
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """
+        Process one connection's events until the producer closes its side of the stream.
+        A malformed event closes the connection, other streams are unaffected.
+        :param reader:
+        :param writer:
+        :return:
+        """
+        self.connections += 1
+        engine = WeatherEngine()
+        iter_lines = self._codec.iter_lines
+        encode = self._codec.encode
+        splitter = LineSplitter()
+        output = bytearray()
+        try:
+            while True:
+                chunk = await reader.read(self._chunk_size)
+                lines = splitter.feed(chunk) if chunk else splitter.close()
+                for line in lines:
+                    for message in engine.process_events(iter_lines(line)):
+                        output += encode(message)
+                        output += b"\n"
+                if output:
+                    writer.write(output)
+                    output.clear()
+                    await writer.drain()
+                if not chunk:
+                    break
+        except ValueError as exc:
+            # pydantic ValidationError and json decoding errors are ValueErrors,
+            # the outputs of the events before the malformed one are still delivered
+            logger.error("closing stream: %s", exc)
+            writer.write(output)
+        except ConnectionError as exc:
+            logger.error("stream lost: %s", exc)
+        finally:
+            self.connections -= 1
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+
+async def run_client(events: Iterable[Dict[str, Any]],
+                     path: Optional[str] = None,
+                     host: Optional[str] = None,
+                     port: int = 0) -> List[Dict[str, Any]]:
+    """
+    Local producer: send events to a StreamServer and collect the outputs of the stream
+    :param events: input dicts {str: Any} messages
+    :param path: Unix domain socket path
+    :param host: TCP host, when no path is given
+    :param port: TCP port
+    :return: Output messages json dicts {str, Any}
+    """
+    if path is not None:
+        reader, writer = await asyncio.open_unix_connection(path)
+    else:
+        reader, writer = await asyncio.open_connection(host, port)
+
+    async def produce() -> None:
+        try:
+            for event in events:
+                writer.write(json.dumps(event).encode() + b"\n")
+                await writer.drain()
+            writer.write_eof()
+        except ConnectionError:
+            # the server closed the stream on a malformed event
+            pass
+
+    producer = asyncio.create_task(produce())
+    outputs = []
+    # read concurrently with producing, the server stops reading until outputs are consumed
+    while line := await reader.readline():
+        outputs.append(json.loads(line))
+    await producer
+    writer.close()
+    await writer.wait_closed()
+    return outputs
+
+
+def serve(path: Optional[str] = None,
+          host: Optional[str] = None,
+          port: int = 0,
+          codec: Optional[JsonCodec] = None) -> None:
+    """
+    Run a StreamServer until interrupted
+    :param path: Unix domain socket path
+    :param host: TCP host, when no path is given
+    :param port: TCP port
+    :param codec: JSON codec of the streams, stdlib by default
+    :return:
+    """
+    async def main() -> None:
+        server = await StreamServer(codec=codec).start(path, host, port)
+        async with server:
+            await server.serve_forever()
+
+    asyncio.run(main())
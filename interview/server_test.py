@@ -0,0 +1,38 @@
+import asyncio
+import os
+import tempfile
+import unittest
+
+from .server import StreamServer, run_client
+from .sharding_test import generate_stream
+from .weather import WeatherEngine
+
+
+class TestStreamServer(unittest.IsolatedAsyncioTestCase):
+
+    @staticmethod
+    def expected(events):
+        return list(WeatherEngine().process_events(events))
+
+    async def test_independent_streams_over_unix_socket(self):
+        streams = [list(generate_stream(2_000, stations, seed)) for stations, seed in
+                   ((5, 1), (50, 2), (500, 3))]
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "weather.sock")
+            server = await StreamServer(chunk_size=512).start(path=path)
+            async with server:
+                outputs = await asyncio.gather(*(run_client(events, path=path)
+                                                  for events in streams))
+        for events, actual in zip(streams, outputs):
+            self.assertEqual(actual, self.expected(events))
+
+    async def test_tcp_and_malformed_stream(self):
+        server = await StreamServer().start(host="127.0.0.1", port=0)
+        port = server.sockets[0].getsockname()[1]
+        events = list(generate_stream(200, 3, seed=4))
+        async with server:
+            bad = [events[0], {"type": "unknown"}, events[1]]
+            self.assertEqual(await run_client(bad, host="127.0.0.1", port=port), [events[0]])
+            # other connections are unaffected
+            self.assertEqual(await run_client(events, host="127.0.0.1", port=port),
+                             self.expected(events))
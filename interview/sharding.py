@@ -0,0 +1,225 @@
+import multiprocessing
+from logging import getLogger
+from multiprocessing.connection import Connection
+from types import TracebackType
+from typing import Any, Dict, Generator, Iterable, Iterator, List, Optional, Tuple, Type
+
+from interview import weather
+from interview.decoding import decode_event, SAMPLE, CONTROL
+from interview.models.stations import StationsMonitor
+from interview.partials import Partial, dump_partial, load_partial, merge_partials
+
+
+logger = getLogger(__name__)
+
+BATCH_SIZE = 4096  # samples buffered per shard before they are sent to its worker
+
+# worker messages
+_SAMPLES = "samples"
+_PARTIAL = "partial"
+_RESET = "reset"
+_STOP = "stop"
+# partial state scopes
+_ALL = "all"  # every station, dirty stations stay dirty
+_SNAPSHOT = "snapshot"  # every station, dirty stations are delivered
+_DELTA = "delta"  # dirty stations only, which are delivered
+
+
+def _shard_worker(connection: Connection) -> None:
+    """
+    Worker process loop: fold routed sample batches into the shard's partial state,
+    answer partial state requests and resets
+    :param connection: pipe to the ShardedRunner
+    :return:
+    """
+    stations = StationsMonitor()
+    first_seen: Dict[str, int] = {}  # station -> position of its first sample in the stream
+    # dirty station -> position of its first change since the changes were last delivered
+    first_change: Dict[str, int] = {}
+    as_of: Optional[int] = None
+    update = stations.update
+    while True:
+        message = connection.recv()
+        kind = message[0]
+        if kind == _SAMPLES:
+            _, names, temperatures, positions, as_of = message
+            for name, temperature, position in zip(names, temperatures, positions):
+                first_seen.setdefault(name, position)
+                version = stations.version
+                update(name, temperature)
+                if stations.version != version:
+                    first_change.setdefault(name, position)
+        elif kind == _PARTIAL:
+            connection.send_bytes(_dump_shard(stations, first_seen, first_change, as_of,
+                                              scope=message[1]))
+        elif kind == _RESET:
+            stations.reset()
+            first_seen.clear()
+            first_change.clear()
+            as_of = None
+        else:
+            connection.close()
+            return
+
+
+def _dump_shard(stations: StationsMonitor,
+                first_seen: Dict[str, int],
+                first_change: Dict[str, int],
+                as_of: Optional[int],
+                scope: str) -> bytes:
+    if scope == _DELTA:
+        # ranked by first change, the order of the serial dirty set
+        changes = stations.pop_dirty()
+        names = sorted(changes, key=first_change.__getitem__)
+        delta = StationsMonitor({name: changes[name] for name in names})
+        ranks = [first_change[name] for name in names]
+        first_change.clear()
+        return dump_partial(delta, as_of, ranks)
+    if scope == _SNAPSHOT:
+        stations.clear_dirty()
+        first_change.clear()
+    return dump_partial(stations, as_of, list(first_seen.values()))
+
+
+class ShardedRunner:
+    """
+    Aggregate samples in N worker processes, routing each sample by the hash of its station name.
+    Events are decoded, echoed and batched in this process. Snapshot and reset control
+    messages flush the batches and merge the shards' partial states, so the outputs and
+    their order are the ones process_events produces.
+    """
+
+    def __init__(self, shards: int, batch_size: int = BATCH_SIZE) -> None:
+        if shards < 1:
+            raise ValueError("at least one shard is required")
+        context = multiprocessing.get_context()
+        self._connections: List[Connection] = []
+        self._processes: List[Any] = []
+        for _ in range(shards):
+            connection, child_connection = context.Pipe()
+            process = context.Process(target=_shard_worker, args=(child_connection,),
+                                      daemon=True)
+            process.start()
+            child_connection.close()
+            self._connections.append(connection)
+            self._processes.append(process)
+        self._batch_size = batch_size
+        self._batches: List[Tuple[List[str], List[float], List[int]]] = [
+            ([], [], []) for _ in range(shards)
+        ]
+        self._batch_as_of: List[Optional[int]] = [None] * shards
+        self._position = 0  # stream position of the next sample, ranks stations on merge
+        self.latest_timestamp: Optional[int] = None
+
+    def __enter__(self) -> "ShardedRunner":
+        return self
+
+    def __exit__(self,
+                 exc_type: Optional[Type[BaseException]],
+                 exc_value: Optional[BaseException],
+                 traceback: Optional[TracebackType]) -> None:
+        self.close()
+
+    def close(self) -> None:
+        for connection in self._connections:
+            connection.send((_STOP,))
+            connection.close()
+        for process in self._processes:
+            process.join()
+        self._connections.clear()
+        self._processes.clear()
+
+    def _send_batch(self, shard: int) -> None:
+        names, temperatures, positions = self._batches[shard]
+        if names:
+            self._connections[shard].send(
+                (_SAMPLES, names, temperatures, positions, self._batch_as_of[shard])
+            )
+            self._batches[shard] = ([], [], [])
+
+    def export_partials(self, scope: str = _ALL) -> List[bytes]:
+        """
+        Serialized partial state of each shard, see interview.partials
+        :param scope: all stations, all stations delivered as a snapshot, or the delta
+        :return:
+        """
+        for shard in range(len(self._connections)):
+            self._send_batch(shard)
+        for connection in self._connections:
+            connection.send((_PARTIAL, scope))
+        return [connection.recv_bytes() for connection in self._connections]
+
+    def partials(self, scope: str = _ALL) -> List[Partial]:
+        return [load_partial(data) for data in self.export_partials(scope)]
+
+    def reset(self) -> None:
+        # pending samples are dropped along with the shards' state
+        for shard, connection in enumerate(self._connections):
+            self._batches[shard] = ([], [], [])
+            self._batch_as_of[shard] = None
+            connection.send((_RESET,))
+        self.latest_timestamp = None
+
+    def _snapshot(self, event: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        selection = None
+        if isinstance(event, dict) and (event.get("stations") is not None
+                                        or event.get("prefix") is not None):
+            # pylint: disable-next=import-outside-toplevel
+            from interview.models.snapshotEvent import SnapshotEvent
+            selection = SnapshotEvent.model_validate(event)
+        if self.latest_timestamp is None:
+            return
+        if selection is None:
+            stations, _ = merge_partials(self.partials(_SNAPSHOT))
+            yield weather.snapshot_output(stations, self.latest_timestamp)
+            return
+        # a selection leaves the changes to the next snapshot_delta
+        stations, _ = merge_partials(self.partials(_ALL))
+        yield weather.selected_snapshot_output(
+            stations, weather.selected_station_names(stations, event=selection),
+            self.latest_timestamp
+        )
+
+    def process_events(self,
+                       events: Iterable[Dict[str, Any]]) -> Generator[Dict[str, Any], None, None]:
+        """
+        Sharded equivalent of weather.process_events
+        :param events: an Iterable of input dicts {str: Any} messages
+        :return: Output messages json dicts {str, Any}
+        """
+        shards = len(self._connections)
+        batches = self._batches
+        for line in events:
+            msg = decode_event(line)
+            msg_type = msg["type"]
+            if msg_type == SAMPLE:
+                # route by station name, a station's partial lives on a single shard
+                station_name = msg["stationName"]
+                shard = hash(station_name) % shards
+                names, temperatures, positions = batches[shard]
+                names.append(station_name)
+                temperatures.append(msg["temperature"])
+                positions.append(self._position)
+                self._position += 1
+                self._batch_as_of[shard] = self.latest_timestamp = msg["timestamp"]
+                if len(names) >= self._batch_size:
+                    self._send_batch(shard)
+                yield msg
+            elif msg_type == CONTROL:
+                command = msg["command"]
+                if command == weather.SNAPSHOT:
+                    yield from self._snapshot(line)
+                elif command == weather.SNAPSHOT_DELTA:
+                    if self.latest_timestamp is not None:
+                        # delta stations are ordered by first change across shards
+                        stations, _ = merge_partials(self.partials(_DELTA))
+                        yield weather.snapshot_delta_output(stations, self.latest_timestamp)
+                elif command == weather.RESET:
+                    if self.latest_timestamp is not None:
+                        asof_timestamp = self.latest_timestamp
+                        self.reset()
+                        yield weather.reset_output(asof_timestamp)
+                else:
+                    logger.info("Not implemented Command Type")
+            else:
+                logger.info("Not implemented Event Type")
@@ -0,0 +1,117 @@
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from interview.models.stations import StationsMonitor
+from . import weather
+from .partials import dump_partial, load_partial, merge_partials
+from .sharding import ShardedRunner
+
+
+def generate_stream(samples: int, stations: int, seed: int):
+    rng = random.Random(seed)
+    for i in range(samples):
+        if rng.random() < 0.01:
+            yield {"type": "control",
+                   "command": rng.choice(["snapshot", "snapshot_delta", "snapshot_delta", "reset"])}
+        yield {
+            "type"       : "sample",
+            "stationName": f"Station {rng.randrange(stations)}",
+            "timestamp"  : 1672531200000 + i // 3,
+            "temperature": round(rng.uniform(-30.0, 110.0), 1)
+        }
+    yield {"type": "control", "command": "snapshot"}
+
+
+class TestPartials(unittest.TestCase):
+
+    def test_dump_load_round_trip(self):
+        stations = StationsMonitor(stations={"Foster Weather Station": {"high": 37.1, "low": -2.5},
+                                             "Ünicode Station": {"high": 50.0, "low": 50.0}})
+        partial = load_partial(dump_partial(stations, 1672531200000))
+        self.assertEqual(partial.as_of, 1672531200000)
+        self.assertEqual(partial.names, ["Foster Weather Station", "Ünicode Station"])
+        self.assertEqual(list(partial.highs), [37.1, 50.0])
+        self.assertEqual(list(partial.lows), [-2.5, 50.0])
+        self.assertEqual(list(partial.ranks), [0, 1])
+        self.assertIsNone(load_partial(dump_partial(StationsMonitor(), None)).as_of)
+        with self.assertRaises(ValueError):
+            load_partial(b"garbage")
+
+    def test_merge_partials(self):
+        first = StationsMonitor(stations={"a": {"high": 10.0, "low": 1.0},
+                                          "b": {"high": 5.0, "low": 5.0}})
+        second = StationsMonitor(stations={"c": {"high": 7.0, "low": 7.0},
+                                           "a": {"high": 12.0, "low": 3.0}})
+        stations, as_of = merge_partials([
+            load_partial(dump_partial(first, 100, ranks=[0, 4])),
+            load_partial(dump_partial(second, 200, ranks=[2, 3])),
+        ])
+        self.assertEqual(as_of, 200)
+        self.assertEqual(list(stations.stations), ["a", "c", "b"], msg="ordered by rank")
+        self.assertEqual(stations.stations["a"], {"high": 12.0, "low": 1.0})
+        self.assertEqual(merge_partials([]), (StationsMonitor(), None))
+
+
+class TestShardedRunner(unittest.TestCase):
+
+    def test_sharded_outputs_match_process_events(self):
+        weather.stations_montior.reset()
+        weather.latest_timestamp = None
+        events = list(generate_stream(3_000, 40, seed=3))
+        events[1_500:1_500] = [{"type": "control", "command": "snapshot", "prefix": "Station 1"},
+                               {"type": "control", "command": "snapshot",
+                                "stations": ["Station 7", "Station 3"]},
+                               {"type": "control", "command": "snapshot", "stations": None}]
+        expected = list(weather.process_events(events))
+        weather.stations_montior.reset()
+        weather.latest_timestamp = None
+
+        for shards in (1, 3):
+            with ShardedRunner(shards, batch_size=64) as runner:
+                actual = list(runner.process_events(events))
+                self.assertEqual(actual, expected, msg=f"{shards} shards")
+                # byte identical, in the same order
+                self.assertEqual(json.dumps(actual), json.dumps(expected))
+                self.assertEqual(len(runner.export_partials()), shards)
+
+    @staticmethod
+    def merged_state(*parts):
+        # high/low per station of parts processed apart, then merged
+        state = {}
+        for part in parts:
+            list(weather.process_events(part))
+            for name, values in weather.stations_montior.stations.items():
+                known = state.setdefault(name, dict(values))
+                known["high"] = max(known["high"], values["high"])
+                known["low"] = min(known["low"], values["low"])
+            weather.stations_montior.reset()
+        weather.latest_timestamp = None
+        return state
+
+    def test_export_and_merge_command(self):
+        events = list(generate_stream(500, 10, seed=5))
+        first, second = events[:300], events[300:]
+        weather.stations_montior.reset()
+        weather.latest_timestamp = None
+        expected_state = self.merged_state(first, second)
+
+        with tempfile.TemporaryDirectory() as directory:
+            paths = []
+            for i, part in enumerate((first, second)):
+                path = os.path.join(directory, f"node{i}.partial")
+                data = "".join(json.dumps(event) + "\n" for event in part).encode()
+                subprocess.run([sys.executable, "-m", "interview", "--shards", "2",
+                                "--export-state", path], input=data, check=True,
+                               capture_output=True)
+                paths.append(path)
+            merged = subprocess.run([sys.executable, "-m", "interview", "merge", *paths],
+                                    check=True, capture_output=True).stdout
+        snapshot = json.loads(merged)
+        self.assertEqual(snapshot["type"], "snapshot")
+        self.assertEqual(snapshot["asOf"], second[-2]["timestamp"])
+        self.assertEqual(snapshot["stations"], expected_state)
@@ -0,0 +1,71 @@
+import json
+from typing import Any, Dict, Optional
+
+from interview.models.stations import StationsMonitor
+
+
+class EncodedOutput(Dict[str, Any]):
+    """
+    Output message carrying its JSON serialization, which writers emit as is.
+    The serialization is taken when the output is built, later changes to the dict are
+    not reflected in it.
+    """
+    __slots__ = ("encoded",)
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.encoded = b""
+
+
+class SnapshotCache:
+    """
+    Serialized stations of the last snapshot, valid until the station aggregates change
+    (a sample moving a high/low, a new station or a reset bumps StationsMonitor.version).
+    A repeated snapshot reuses the serialized stations, a bytes copy with the new asOf;
+    its stations dict is materialized afresh, so no two outputs share state.
+    """
+    __slots__ = ("_stations", "_version", "_stations_json", "hits", "misses")
+
+    def __init__(self) -> None:
+        self._stations: Optional[StationsMonitor] = None
+        self._version = -1
+        self._stations_json = b""
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, stations: StationsMonitor, timestamp: int) -> Optional[EncodedOutput]:
+        """
+        Snapshot output of the stations as of timestamp, from the cached serialization
+        :param stations:
+        :param timestamp:
+        :return: a new output, None on a miss
+        """
+        if stations is not self._stations or stations.version != self._version:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return self._encode(stations.stations, timestamp)
+
+    def store(self, stations: StationsMonitor, output: Dict[str, Any]) -> EncodedOutput:
+        """
+        Serialize and cache a freshly generated snapshot output
+        :param stations: the aggregates the output was generated from
+        :param output: snapshot output json dict
+        :return: the output with its serialization
+        """
+        self._stations = stations
+        self._version = stations.version
+        self._stations_json = json.dumps(output["stations"]).encode()
+        return self._encode(output["stations"], output["asOf"])
+
+    def _encode(self, stations: Dict[str, Any], timestamp: int) -> EncodedOutput:
+        # same bytes as json.dumps(output)
+        output = EncodedOutput(type="snapshot", asOf=timestamp, stations=stations)
+        output.encoded = b'{"type": "snapshot", "asOf": %d, "stations": %b}' % (
+            timestamp, self._stations_json
+        )
+        return output
+
+    def clear(self) -> None:
+        self._stations = None
+        self._stations_json = b""
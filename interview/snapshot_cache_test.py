@@ -0,0 +1,62 @@
+import json
+import unittest
+
+from . import weather
+from .snapshot_cache import EncodedOutput
+from .streamio import encode_output
+
+
+class TestSnapshotCache(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = weather.WeatherEngine()
+
+    @staticmethod
+    def sample(timestamp: int, temperature: float, station: str = "Foster Weather Station"):
+        return {"type": "sample", "stationName": station,
+                "timestamp": timestamp, "temperature": temperature}
+
+    def test_repeated_snapshots_hit_the_cache(self):
+        cache = self.engine.snapshot_cache
+        cmd_snapshot = {"type": "control", "command": "snapshot"}
+        events = [self.sample(1, 37.1), self.sample(2, 50.0, "Oak Street Weather Station"),
+                  cmd_snapshot, cmd_snapshot]
+        outputs = list(self.engine.process_events(events))
+        first, second = outputs[-2:]
+        self.assertEqual((cache.misses, cache.hits), (1, 1))
+        self.assertEqual(first, second)
+        self.assertIsInstance(second, EncodedOutput)
+        self.assertEqual(encode_output(second), json.dumps(second).encode())
+
+        # a sample within the high/low range keeps the serialized stations, asOf moves
+        outputs = list(self.engine.process_events([self.sample(3, 37.1), cmd_snapshot]))
+        self.assertEqual((cache.misses, cache.hits), (1, 2))
+        self.assertEqual(outputs[-1]["asOf"], 3)
+        self.assertEqual(encode_output(outputs[-1]), json.dumps(outputs[-1]).encode())
+
+        # a new high invalidates
+        outputs = list(self.engine.process_events([self.sample(4, 99.0), cmd_snapshot]))
+        self.assertEqual((cache.misses, cache.hits), (2, 2))
+        self.assertEqual(outputs[-1]["stations"]["Foster Weather Station"],
+                         {"high": 99.0, "low": 37.1})
+        self.assertEqual(encode_output(outputs[-1]), json.dumps(outputs[-1]).encode())
+
+    def test_outputs_do_not_share_state(self):
+        cmd_snapshot = {"type": "control", "command": "snapshot"}
+        first = list(self.engine.process_events([self.sample(1, 37.1), cmd_snapshot]))[-1]
+        first["stations"]["Foster Weather Station"]["high"] = 999.0
+        second = list(self.engine.process_events([cmd_snapshot]))[-1]
+        self.assertEqual(self.engine.snapshot_cache.hits, 1)
+        self.assertIsNot(second, first)
+        self.assertEqual(second["stations"]["Foster Weather Station"]["high"], 37.1)
+        self.assertEqual(encode_output(second), json.dumps(second).encode())
+
+    def test_reset_invalidates(self):
+        cmd_snapshot = {"type": "control", "command": "snapshot"}
+        cmd_reset = {"type": "control", "command": "reset"}
+        list(self.engine.process_events([self.sample(1, 37.1), cmd_snapshot]))
+        outputs = list(self.engine.process_events([cmd_reset, self.sample(2, 37.1), cmd_snapshot]))
+        self.assertEqual(self.engine.snapshot_cache.misses, 2)
+        self.assertEqual(outputs[-1], {"type": "snapshot", "asOf": 2,
+                                       "stations": {"Foster Weather Station": {"high": 37.1,
+                                                                               "low": 37.1}}})
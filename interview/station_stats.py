@@ -0,0 +1,143 @@
+import math
+from bisect import bisect_right
+from typing import Dict, List, Tuple
+
+
+QUANTILES = (0.05, 0.50, 0.95)
+# extended P-square markers: min, each quantile and the midpoints around them, max
+_MARKER_QUANTILES = (0.0, 0.025, 0.05, 0.275, 0.50, 0.725, 0.95, 0.975, 1.0)
+_MARKERS = len(_MARKER_QUANTILES)
+_QUANTILE_MARKERS = tuple(_MARKER_QUANTILES.index(q) for q in QUANTILES)
+
+
+class StationStats:
+    """
+    Constant memory statistics of one station's temperatures: count, Welford running mean and
+    variance, and an extended P-square sketch (Jain & Chlamtac, Raatikainen) of the 5th, 50th
+    and 95th percentiles, 9 markers whatever the stream length.
+    """
+    __slots__ = ("count", "mean", "m2", "heights", "positions")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0  # sum of squared differences from the mean
+        self.heights: List[float] = []  # marker heights, the first samples until all are set
+        self.positions: List[int] = list(range(1, _MARKERS + 1))
+
+    def add(self, temperature: float) -> None:
+        # Welford
+        self.count += 1
+        delta = temperature - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (temperature - self.mean)
+
+        heights = self.heights
+        if self.count <= _MARKERS:
+            heights.append(temperature)
+            heights.sort()
+            return
+        self._add_marker(temperature)
+
+    def _add_marker(self, temperature: float) -> None:
+        heights = self.heights
+        positions = self.positions
+        # cell of the new sample, extremes extend the outer markers
+        if temperature < heights[0]:
+            heights[0] = temperature
+            cell = 0
+        elif temperature >= heights[-1]:
+            heights[-1] = temperature
+            cell = _MARKERS - 2
+        else:
+            cell = bisect_right(heights, temperature) - 1
+        for marker in range(cell + 1, _MARKERS):
+            positions[marker] += 1
+
+        # move the inner markers towards their desired positions 1 + (count - 1) * quantile,
+        # piecewise parabolic
+        seen = self.count - 1
+        for marker in range(1, _MARKERS - 1):
+            position = positions[marker]
+            offset = 1 + seen * _MARKER_QUANTILES[marker] - position
+            if ((offset >= 1 and positions[marker + 1] - position > 1)
+                    or (offset <= -1 and positions[marker - 1] - position < -1)):
+                step = 1 if offset > 0 else -1
+                height = self._parabolic(marker, step)
+                if not heights[marker - 1] < height < heights[marker + 1]:
+                    height = heights[marker] + step * (
+                        (heights[marker + step] - heights[marker])
+                        / (positions[marker + step] - position)
+                    )
+                heights[marker] = height
+                positions[marker] = position + step
+
+    def _parabolic(self, marker: int, step: int) -> float:
+        heights = self.heights
+        positions = self.positions
+        below = positions[marker] - positions[marker - 1]
+        above = positions[marker + 1] - positions[marker]
+        span = positions[marker + 1] - positions[marker - 1]
+        return heights[marker] + step / span * (
+            (below + step) * (heights[marker + 1] - heights[marker]) / above
+            + (above - step) * (heights[marker] - heights[marker - 1]) / below
+        )
+
+    def quantiles(self) -> Tuple[float, ...]:
+        """
+        Estimated QUANTILES, exact (linear interpolation) until the sketch is full
+        :return:
+        """
+        heights = self.heights
+        if self.count > _MARKERS:
+            return tuple(heights[marker] for marker in _QUANTILE_MARKERS)
+        results = []
+        for quantile in QUANTILES:
+            rank = (len(heights) - 1) * quantile
+            below = math.floor(rank)
+            above = min(below + 1, len(heights) - 1)
+            results.append(heights[below] + (heights[above] - heights[below]) * (rank - below))
+        return tuple(results)
+
+    def as_dict(self) -> Dict[str, float]:
+        p5, p50, p95 = self.quantiles()
+        return {
+            "count" : self.count,
+            "mean"  : self.mean,
+            "stddev": math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else 0.0,
+            "p5"    : p5,
+            "p50"   : p50,
+            "p95"   : p95,
+        }
+
+
+class StationsStatistics:
+    """
+    Optional per-station statistics kept alongside the high/low aggregates.
+    NaN temperatures are left out, they would poison the mean and the sketch.
+    """
+    __slots__ = ("_stats",)
+
+    def __init__(self) -> None:
+        self._stats: Dict[str, StationStats] = {}
+
+    def update(self, station_name: str, temperature: float) -> None:
+        if temperature != temperature:  # pylint: disable=comparison-with-itself
+            return
+        stats = self._stats.get(station_name)
+        if stats is None:
+            stats = self._stats[station_name] = StationStats()
+        stats.add(temperature)
+
+    def get(self, station_name: str) -> Dict[str, float]:
+        stats = self._stats.get(station_name)
+        return {} if stats is None else stats.as_dict()
+
+    def discard(self, station_name: str) -> None:
+        self._stats.pop(station_name, None)
+
+    def __len__(self) -> int:
+        return len(self._stats)
+
+    def reset(self) -> None:
+        self._stats.clear()
@@ -0,0 +1,60 @@
+import math
+import random
+import statistics
+import sys
+import unittest
+
+from .station_stats import StationStats
+from .weather import WeatherEngine
+
+
+class TestStationStats(unittest.TestCase):
+
+    def test_exact_until_sketch_is_full(self):
+        stats = StationStats()
+        values = [3.0, 1.0, 2.0, 5.0]
+        for value in values:
+            stats.add(value)
+        summary = stats.as_dict()
+        self.assertEqual(summary["count"], 4)
+        self.assertAlmostEqual(summary["mean"], statistics.mean(values))
+        self.assertAlmostEqual(summary["stddev"], statistics.stdev(values))
+        self.assertAlmostEqual(summary["p50"], statistics.median(values))
+        self.assertAlmostEqual(summary["p5"], 1.15)
+
+    def test_sketch_accuracy_and_constant_memory(self):
+        rng = random.Random(15)
+        stats = StationStats()
+        values = []
+        for i in range(1, 20_001):
+            value = rng.gauss(50.0, 15.0)
+            values.append(value)
+            stats.add(value)
+            if i == 100:
+                size = sys.getsizeof(stats.heights) + sys.getsizeof(stats.positions)
+        self.assertEqual(sys.getsizeof(stats.heights) + sys.getsizeof(stats.positions), size)
+        values.sort()
+        for estimate, quantile in zip(stats.quantiles(), (0.05, 0.50, 0.95)):
+            self.assertLess(abs(estimate - values[int(quantile * len(values))]), 0.5)
+        self.assertAlmostEqual(stats.mean, statistics.fmean(values), places=6)
+        self.assertAlmostEqual(stats.as_dict()["stddev"], statistics.stdev(values), places=6)
+
+    def test_snapshot_fields(self):
+        engine = WeatherEngine(statistics=True)
+        events = [{"type": "sample", "stationName": "Foster Weather Station",
+                   "timestamp": 1672531200000 + i, "temperature": float(i)} for i in range(11)]
+        events.append({"type": "control", "command": "snapshot"})
+        snapshot = list(engine.process_events(events))[-1]
+        station = snapshot["stations"]["Foster Weather Station"]
+        self.assertEqual((station["high"], station["low"], station["count"]), (10.0, 0.0, 11))
+        self.assertAlmostEqual(station["mean"], 5.0)
+        self.assertTrue(math.isclose(station["stddev"], statistics.stdev(range(11))))
+        self.assertTrue(0.0 <= station["p5"] < station["p50"] < station["p95"] <= 10.0)
+
+        list(engine.process_events([{"type": "control", "command": "reset"}]))
+        self.assertEqual(len(engine.statistics), 0)
+
+    def test_batch_ingest_is_rejected(self):
+        engine = WeatherEngine(statistics=True)
+        with self.assertRaises(ValueError):
+            engine.process_batch(["a", "b"], [1, 2], [1.0, 2.0])
@@ -0,0 +1,207 @@
+import json
+import re
+import time
+from typing import Any, BinaryIO, Callable, Dict, Iterable, Iterator, Optional, Union
+
+from interview.decoding import SAMPLE
+from interview.metrics import Metrics
+from interview.snapshot_cache import EncodedOutput
+
+
+CHUNK_SIZE = 1 << 16  # bytes requested from the input per read
+FLUSH_SIZE = 1 << 16  # buffered output bytes that force a flush
+BACKFILL_CHUNK_SIZE = 4 << 20  # input bytes per backfill task, see backfill
+
+Chunk = Union[bytes, memoryview]
+
+_raw_decode = json.JSONDecoder().raw_decode
+_find_non_whitespace = re.compile(r'[^ \t\n\r]').search  # JSON insignificant whitespace
+
+
+def _next_token(text: str, pos: int) -> int:
+    match = _find_non_whitespace(text, pos)
+    return match.start() if match else len(text)
+
+
+class LineSplitter:
+    """
+    Split a byte stream arriving in arbitrary pieces into chunks of complete lines.
+    Only the line straddling two pieces is copied, the rest is sliced with a memoryview.
+    """
+
+    def __init__(self) -> None:
+        self._pending = b""
+
+    def feed(self, chunk: bytes) -> Iterator[Chunk]:
+        """
+        Complete lines ending within chunk
+        :param chunk: the next piece of the stream
+        :return: chunks of complete lines
+        """
+        cut = chunk.rfind(b"\n") + 1
+        if not cut:
+            self._pending += chunk
+            return
+        start = 0
+        if self._pending:
+            start = chunk.find(b"\n") + 1
+            yield self._pending + chunk[:start]
+        if start < cut:
+            yield chunk if start == 0 and cut == len(chunk) else memoryview(chunk)[start:cut]
+        self._pending = chunk[cut:]
+
+    def close(self) -> Iterator[Chunk]:
+        """
+        The last line of the stream, when it has no trailing newline
+        :return:
+        """
+        if self._pending:
+            yield self._pending
+            self._pending = b""
+
+
+class LineSkipper:
+    """
+    Drop the first lines of a stream of line chunks, e.g. the input a checkpoint consumed.
+    Lines are counted with bytes.count, they are not decoded.
+    """
+
+    def __init__(self, lines: int) -> None:
+        self.remaining = lines
+
+    def __call__(self, chunk: Chunk) -> Optional[Chunk]:
+        """
+        The part of chunk after the skipped lines
+        :param chunk: complete lines
+        :return: None when the whole chunk is skipped
+        """
+        if self.remaining <= 0:
+            return chunk
+        data = bytes(chunk)
+        # the last line of the stream may lack its newline
+        lines = data.count(b"\n") + (not data.endswith(b"\n"))
+        if lines <= self.remaining:
+            self.remaining -= lines
+            return None
+        end = -1
+        for _ in range(self.remaining):
+            end = data.index(b"\n", end + 1)
+        self.remaining = 0
+        return memoryview(data)[end + 1:]
+
+
+def skip_lines(chunks: Iterable[Chunk], lines: int) -> Iterator[Chunk]:
+    """
+    Chunks of complete lines without the first lines
+    :param chunks: chunks of complete lines
+    :param lines: number of lines to skip
+    :return:
+    """
+    skipper = LineSkipper(lines)
+    for chunk in chunks:
+        rest = skipper(chunk)
+        if rest:
+            yield rest
+
+
+def read_chunks(stream: BinaryIO,
+                chunk_size: int = CHUNK_SIZE,
+                before_read: Optional[Callable[[], None]] = None) -> Iterator[Chunk]:
+    """
+    Read a binary stream in large chunks, each yielded chunk ending on a line boundary.
+    Reads return as soon as data is available (read1), so interactive pipes are not delayed.
+    :param stream: binary input stream, e.g. sys.stdin.buffer
+    :param chunk_size: maximum bytes per read
+    :param before_read: called before blocking on the next read, e.g. to flush outputs
+    :return: chunks of complete lines
+    """
+    read = getattr(stream, "read1", stream.read)
+    splitter = LineSplitter()
+    while True:
+        if before_read is not None:
+            before_read()
+        chunk = read(chunk_size)
+        if not chunk:
+            break
+        yield from splitter.feed(chunk)
+    yield from splitter.close()
+
+
+def iter_json_lines(chunk: Chunk) -> Iterator[Any]:
+    """
+    Parse the JSON object on each line of a chunk.
+    The chunk is decoded to text once and parsed in place at each line offset; a malformed
+    line is re-parsed on its own so it raises the same error as json.loads(line).
+    :param chunk: complete lines of JSON
+    :return: one parsed object per line
+    """
+    text = str(chunk, "utf-8")
+    size = len(text)
+    pos = 0
+    while pos < size:
+        eol = text.find("\n", pos)
+        if eol == -1:
+            eol = size
+        start = _next_token(text, pos)
+        try:
+            if start >= eol:
+                raise ValueError("blank line")
+            obj, end = _raw_decode(text, start)
+            if end > eol or _next_token(text, end) < eol:
+                raise ValueError("not one object per line")
+        except ValueError:
+            obj = json.loads(text[pos:eol + 1])
+        yield obj
+        pos = eol + 1
+
+
+def encode_output(output: Dict[str, Any]) -> bytes:
+    """
+    JSON serialization of an output message, reusing the one an EncodedOutput carries
+    :param output:
+    :return:
+    """
+    if isinstance(output, EncodedOutput):
+        return output.encoded
+    return json.dumps(output).encode()
+
+
+class OutputBuffer:
+    """
+    Reusable output buffer of JSON lines, written to the stream in batches.
+    Sample echoes are batched, any other output (snapshot, reset, ...) is a reply
+    to a control message and flushes the buffer right away.
+    With metrics, one output in its sample_every is timed into its serialization histogram.
+    """
+
+    def __init__(self,
+                 stream: BinaryIO,
+                 flush_size: int = FLUSH_SIZE,
+                 encode: Callable[[Dict[str, Any]], bytes] = encode_output,
+                 metrics: Optional[Metrics] = None) -> None:
+        self._stream = stream
+        self._flush_size = flush_size
+        self._encode = encode
+        self._metrics = metrics
+        self._writes = 0
+        self._buffer = bytearray()
+
+    def write(self, output: Dict[str, Any]) -> None:
+        buffer = self._buffer
+        metrics = self._metrics
+        self._writes += 1
+        if metrics is None or self._writes & metrics.sample_mask:
+            buffer += self._encode(output)
+        else:
+            started = time.perf_counter_ns()
+            buffer += self._encode(output)
+            metrics.serialization.record(time.perf_counter_ns() - started)
+        buffer += b"\n"
+        if output.get("type") != SAMPLE or len(buffer) >= self._flush_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if self._buffer:
+            self._stream.write(self._buffer)
+            self._stream.flush()
+            self._buffer.clear()
@@ -0,0 +1,108 @@
+import io
+import json
+import subprocess
+import sys
+import unittest
+from typing import List
+
+from .metrics import Metrics
+from .streamio import OutputBuffer, iter_json_lines, read_chunks, skip_lines
+
+
+class RecordingStream(io.BytesIO):
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.writes: List[bytes] = []
+
+    def write(self, data) -> int:  # type: ignore[override]
+        self.writes.append(bytes(data))
+        return super().write(data)
+
+
+class TestStreamIO(unittest.TestCase):
+
+    lines = [
+        {"type": "sample", "stationName": "Foster Weather Station",
+         "timestamp": 1672531200000, "temperature": 37.1},
+        {"type": "sample", "stationName": "Ünicode Wéather Station",
+         "timestamp": 1672531200001, "temperature": -2.5},
+        {"type": "control", "command": "snapshot"},
+        {"type": "control", "command": "reset"},
+    ]
+
+    def encoded(self) -> bytes:
+        return "".join(json.dumps(line, ensure_ascii=False) + "\r\n"[i % 2:]
+                       for i, line in enumerate(self.lines)).encode()
+
+    def test_read_chunks_line_boundaries(self):
+        data = self.encoded()
+        for chunk_size in (1, 2, 7, 64, 1 << 16):
+            chunks = list(read_chunks(io.BytesIO(data), chunk_size=chunk_size))
+            self.assertEqual(b"".join(bytes(chunk) for chunk in chunks), data)
+            for chunk in chunks:
+                self.assertEqual(bytes(chunk)[-1:], b"\n")
+            parsed = [obj for chunk in chunks for obj in iter_json_lines(chunk)]
+            self.assertEqual(parsed, self.lines, msg=f"chunk_size={chunk_size}")
+
+    def test_read_chunks_without_trailing_newline(self):
+        data = b'{"a": 1}\n{"b": 2}'
+        chunks = list(read_chunks(io.BytesIO(data), chunk_size=3))
+        parsed = [obj for chunk in chunks for obj in iter_json_lines(chunk)]
+        self.assertEqual(parsed, [{"a": 1}, {"b": 2}])
+
+    def test_iter_json_lines_errors_match_json_loads(self):
+        for line in ('\n', '  \n', '{"a": 1} {"b": 2}\n', '{"a":\n1}\n', '{"a": 1\n', 'nope\n'):
+            with self.assertRaises(json.JSONDecodeError) as expected:
+                for part in line.splitlines(keepends=True):
+                    json.loads(part)
+            with self.assertRaises(json.JSONDecodeError) as actual:
+                list(iter_json_lines(line.encode()))
+            self.assertEqual(str(actual.exception), str(expected.exception), msg=repr(line))
+
+    def test_skip_lines(self):
+        data = self.encoded() + b'{"type": "control", "command": "snapshot"}'
+        lines = data.splitlines(keepends=True)
+        for chunk_size in (1, 7, 64, 1 << 16):
+            for skip in range(len(lines) + 2):
+                chunks = skip_lines(read_chunks(io.BytesIO(data), chunk_size=chunk_size), skip)
+                self.assertEqual(b"".join(map(bytes, chunks)), b"".join(lines[skip:]),
+                                 msg=f"chunk size {chunk_size}, skip {skip}")
+
+    def test_output_buffer_flush_policy(self):
+        stream = RecordingStream()
+        output = OutputBuffer(stream, flush_size=1 << 16)
+        output.write(self.lines[0])
+        output.write(self.lines[1])
+        self.assertEqual(stream.writes, [], msg="sample echoes are batched")
+
+        snapshot = {"type": "snapshot", "asOf": 1672531200001, "stations": {}}
+        output.write(snapshot)
+        self.assertEqual(len(stream.writes), 1, msg="control replies flush right away")
+        expected = "".join(json.dumps(line) + "\n" for line in self.lines[:2] + [snapshot])
+        self.assertEqual(stream.getvalue(), expected.encode())
+
+        output.flush()
+        self.assertEqual(len(stream.writes), 1, msg="nothing to flush")
+
+        small = OutputBuffer(stream, flush_size=1)
+        small.write(self.lines[0])
+        self.assertEqual(len(stream.writes), 2, msg="flush once the buffer is full")
+
+    def test_output_buffer_times_serialization(self):
+        metrics = Metrics(sample_every=2)
+        output = OutputBuffer(io.BytesIO(), metrics=metrics)
+        for line in self.lines:
+            output.write(line)
+        self.assertEqual(metrics.serialization.count, 2)
+
+    def test_entry_point_io_modes_match(self):
+        data = "".join(json.dumps(line) + "\n" for line in self.lines * 3).encode()
+        outputs = [
+            subprocess.run([sys.executable, "-m", "interview", "--io", io_mode],
+                           input=data, capture_output=True, check=True).stdout
+            for io_mode in ("line", "buffered", "pipelined")
+        ]
+        self.assertEqual(outputs[0], outputs[1])
+        self.assertEqual(outputs[0], outputs[2])
+        self.assertEqual(len(outputs[0].splitlines()), 12)
@@ -1,34 +1,60 @@
-from typing import Any, Dict, Iterable, Generator, Optional, Tuple
-from logging import getLogger
-from pydantic import ValidationError
+import math
+import time
+from typing import (TYPE_CHECKING, Any, Callable, Dict, Iterable, Iterator, Generator, List,
+                    Optional, Sequence, Tuple)
+from logging import INFO, getLogger
 
-from interview.models.sampleEvent import SampleEvent
-from interview.models.inputEvent import InputEvent
-from interview.models.resetOutput import ResetOutput
-from interview.models.snapshotOutput import SnapshotOutput
-from interview.models.eventTypes import EventTypes, CommandTypes
-from interview.models.stations import StationsMonitor, StationMetaData
+from interview.decoding import decode_event, decode_event_strict, SAMPLE, CONTROL
+from interview.models.eventTypes import CommandTypes
+from interview.models.stations import StationsMonitor
+from interview.metrics import Metrics
+from interview.checkpoint import Checkpoint, Checkpointer
+from interview.eviction import StationEviction
+from interview.snapshot_cache import SnapshotCache
+from interview.station_stats import StationsStatistics
+from interview.window import WindowedStations
+
+if TYPE_CHECKING:
+    import numpy as np
+    from numpy.typing import ArrayLike, NDArray
+    from interview.models.sampleEvent import SampleEvent
+    from interview.models.snapshotEvent import SnapshotEvent
+    from interview.profiling import Profiler
 
 
 logger = getLogger(__name__)
 
-# Initialize
-stations_montior: StationsMonitor = StationsMonitor()  # monitor high/low temp per station
-latest_timestamp: Optional[int] = None  # Monitor timestamp
+SNAPSHOT = CommandTypes.snapshot.name
+RESET = CommandTypes.reset.name
+SNAPSHOT_DELTA = CommandTypes.snapshot_delta.name
+STATS = CommandTypes.stats.name
+SNAPSHOT_WINDOW = CommandTypes.snapshot_window.name
+TOPK = CommandTypes.topk.name
+PROFILE_START = CommandTypes.profile_start.name
+PROFILE_STOP = CommandTypes.profile_stop.name
 
+# Sample echo modes
+ECHO = "echo"  # yield the decoded sample, default
+ECHO_NONE = "none"  # samples are not echoed
+ECHO_HEARTBEAT = "heartbeat"  # yield a sample count every heartbeat_every samples
+ECHO_PASSTHROUGH = "passthrough"  # yield the input object itself
+ECHO_MODES = (ECHO, ECHO_NONE, ECHO_HEARTBEAT, ECHO_PASSTHROUGH)
+HEARTBEAT_EVERY = 1000
 
-def _process_samples(sample_msg: SampleEvent,
+def _process_samples(sample_msg: "SampleEvent",
                      stations: StationsMonitor) -> Tuple[StationsMonitor, int]:
     """
-    process sample messages and Update stations tracker and the timestamp tracker
+    process sample messages and Update stations tracker (in place) and the timestamp tracker
     :param sample_msg:
     :param stations:
     :return:
     """
-    stations = stations + StationMetaData(**sample_msg.model_dump())
+    stations.update(sample_msg.stationName, sample_msg.temperature)
     return stations, sample_msg.timestamp
 
 
+# Outputs are built as the plain dicts their pydantic models in interview.models dump,
+# the models document the output shapes and pydantic is not imported to build them
 def _cmd_generate_snapshot_output(stations: StationsMonitor, timestamp: int) -> Dict[str, Any]:
     """
     Command to generate snapshot output
@@ -36,12 +62,176 @@ def _cmd_generate_snapshot_output(stations: StationsMonitor, timestamp: int) ->
     :param timestamp:
     :return:
     """
-    output = SnapshotOutput(
-        type="snapshot",
-        asOf=timestamp,
-        stations=stations.stations
-    )
-    return output.model_dump()
+    return {
+        "type"    : "snapshot",
+        "asOf"    : timestamp,
+        "stations": stations.stations
+    }
+
+
+def _cmd_generate_statistics_snapshot_output(stations: StationsMonitor,
+                                             statistics: StationsStatistics,
+                                             timestamp: int) -> Dict[str, Any]:
+    """
+    Command to generate snapshot output with the statistics of each station beside high/low
+    :param stations:
+    :param statistics:
+    :param timestamp:
+    :return:
+    """
+    return {
+        "type"    : "snapshot",
+        "asOf"    : timestamp,
+        "stations": {name: {"high": high, "low": low, **statistics.get(name)}
+                     for name, high, low in stations.items()}
+    }
+
+
+def _selected_station_names(stations: StationsMonitor, event: "SnapshotEvent") -> Iterable[str]:
+    """
+    Station names a snapshot selects: its station list, the names starting with its prefix,
+    or the listed names starting with the prefix when both are given
+    :param stations:
+    :param event:
+    :return:
+    """
+    if event.prefix is None:
+        return event.stations or ()
+    if event.stations is None:
+        return stations.with_prefix(event.prefix)
+    return [name for name in event.stations if name.startswith(event.prefix)]
+
+
+def _cmd_generate_selected_snapshot_output(stations: StationsMonitor,
+                                           names: Iterable[str],
+                                           timestamp: int,
+                                           statistics: Optional[StationsStatistics] = None,
+                                           ) -> Dict[str, Any]:
+    """
+    Command to generate snapshot output of the given stations only
+    :param stations:
+    :param names: station names, unknown ones are left out
+    :param timestamp:
+    :param statistics: statistics to add to each station, if any
+    :return:
+    """
+    selected = stations.select(names)
+    if statistics is not None:
+        for name, values in selected.items():
+            values.update(statistics.get(name))
+    return {
+        "type"    : "snapshot",
+        "asOf"    : timestamp,
+        "stations": selected
+    }
+
+
+def _cmd_generate_window_snapshot_output(stations: Dict[str, Dict[str, float]],
+                                         timestamp: int) -> Dict[str, Any]:
+    """
+    Command to generate a snapshot output of the stations' rolling window high/low
+    :param stations:
+    :param timestamp:
+    :return:
+    """
+    return {
+        "type"    : "snapshot",
+        "asOf"    : timestamp,
+        "stations": stations
+    }
+
+
+def _cmd_generate_snapshot_delta_output(stations: StationsMonitor,
+                                        timestamp: int) -> Dict[str, Any]:
+    """
+    Command to generate delta snapshot output, the stations changed since the previous snapshot
+    :param stations:
+    :param timestamp:
+    :return:
+    """
+    return {
+        "type"    : "snapshot_delta",
+        "asOf"    : timestamp,
+        "stations": stations.pop_dirty()
+    }
+
+
+def _cmd_generate_heartbeat_output(samples: int) -> Dict[str, Any]:
+    """
+    Command to generate heartbeat output
+    :param samples:
+    :return:
+    """
+    return {
+        "type"   : "heartbeat",
+        "samples": samples
+    }
+
+
+def _cmd_generate_stats_output(metrics: Dict[str, Any], timestamp: int) -> Dict[str, Any]:
+    """
+    Command to generate stats output
+    :param metrics:
+    :param timestamp:
+    :return:
+    """
+    return {
+        "type"   : "stats",
+        "asOf"   : timestamp,
+        "metrics": metrics
+    }
+
+
+def _cmd_generate_topk_output(stations: StationsMonitor, k: int, timestamp: int) -> Dict[str, Any]:
+    """
+    Command to generate the top k hottest and coldest stations output
+    :param stations: monitor tracking its ranking
+    :param k:
+    :param timestamp:
+    :return:
+    """
+    hottest, coldest = stations.top(k)
+    return {
+        "type"   : "topk",
+        "asOf"   : timestamp,
+        "hottest": [{"stationName": name, "high": high, "low": low}
+                    for name, high, low in hottest],
+        "coldest": [{"stationName": name, "high": high, "low": low}
+                    for name, high, low in coldest]
+    }
+
+
+def _cmd_generate_eviction_output(evicted: Iterable[Tuple[str, float, float]],
+                                   timestamp: int) -> Dict[str, Any]:
+    """
+    Command to generate eviction output
+    :param evicted: (stationName, high, low) of the evicted stations
+    :param timestamp: timestamp of the sample evicting them
+    :return:
+    """
+    return {
+        "type"    : "eviction",
+        "asOf"    : timestamp,
+        "stations": {name: {"high": high, "low": low} for name, high, low in evicted}
+    }
+
+
+def _cmd_generate_profile_output(profile: str,
+                                  allocations: str,
+                                  timestamp: int) -> Dict[str, Any]:
+    """
+    Command to generate profile output
+    :param profile: path of the pstats file
+    :param allocations: path of the top allocation sites report
+    :param timestamp:
+    :return:
+    """
+    return {
+        "type"       : "profile",
+        "asOf"       : timestamp,
+        "profile"    : profile,
+        "allocations": allocations
+    }
 
 
 def _cmd_generate_reset_output(timestamp: int) -> Dict[str, Any]:
@@ -50,67 +240,434 @@ def _cmd_generate_reset_output(timestamp: int) -> Dict[str, Any]:
     :param timestamp:
     :return:
     """
-    output = ResetOutput(
-        type="reset",
-        asOf=timestamp
-    )
-    return output.model_dump()
+    return {
+        "type": "reset",
+        "asOf": timestamp
+    }
 
 
-def process_events(events: Iterable[dict[str, Any]]) -> Generator[dict[str, Any], None, None]:
+# Output builders shared with the sharded, backfill and merge modes
+snapshot_output = _cmd_generate_snapshot_output
+selected_station_names = _selected_station_names
+selected_snapshot_output = _cmd_generate_selected_snapshot_output
+snapshot_delta_output = _cmd_generate_snapshot_delta_output
+heartbeat_output = _cmd_generate_heartbeat_output
+reset_output = _cmd_generate_reset_output
+
+
+class WeatherEngine:  # pylint: disable=too-many-instance-attributes
     """
-    Process a stream of samples from weather stations on Chicago city beaches into messages
-    that provide snapshots of the aggregated state of the weather
-    :param events: an Iterable of input dicts {str: Any} messages
-    :return: Output messages json dicts {str, Any}
+    Aggregation state of one stream of weather events: the high/low per station, the most
+    recent sample timestamp and the snapshot cache. Independent streams use separate engines.
+    The echo mode selects the output of sample events, see ECHO_MODES.
     """
-    for line in events:
-        global stations_montior
-        global latest_timestamp
-        data = {"event": line}
-        
-        try:
-            # Validate Model
-            line_event = InputEvent.model_validate(data)
-        except ValidationError as ve:
-            err_msg = f"Validation Error: {ve}"
-            logger.critical(err_msg)
-            # Covers Unknown Event Types and Unknown Control Types w/ Literal reqs,
-            # Covers required missing values.
-            # Raise Error -- very informative as Pydantic Validation Error for all fields.
-            raise ve
-        
-        # Obtain the Standardized Event Object
-        msg = line_event.event
-        # Process Event
-        match msg.type:
-            case EventTypes.sample.name:
+
+    def __init__(self,  # pylint: disable=too-many-arguments
+                 stations: Optional[StationsMonitor] = None,
+                 echo: str = ECHO,
+                 heartbeat_every: int = HEARTBEAT_EVERY,
+                 metrics: Optional[Metrics] = None,
+                 checkpointer: Optional[Checkpointer] = None,
+                 window_retention: Optional[int] = None,
+                 statistics: bool = False,
+                 topk: bool = False,
+                 strict: bool = False,
+                 eviction: Optional[StationEviction] = None,
+                 emit_evictions: bool = False,
+                 profiler: Optional["Profiler"] = None) -> None:
+        if echo not in ECHO_MODES:
+            raise ValueError(f"unknown echo mode {echo!r}, expected one of {ECHO_MODES}")
+        if heartbeat_every < 1:
+            raise ValueError("heartbeat_every must be positive")
+        self.stations = StationsMonitor() if stations is None else stations
+        self.echo = echo
+        self.heartbeat_every = heartbeat_every
+        self.samples = 0  # sample events processed
+        self.metrics = Metrics() if metrics is None else metrics
+        self.checkpointer = checkpointer
+        self.input_offset = 0  # input lines consumed before this engine, from a checkpoint
+        self.latest_timestamp: Optional[int] = None
+        self.snapshot_cache = SnapshotCache()  # serialized snapshot until the stations change
+        # every input message through the pydantic models, not only the malformed ones
+        self.strict = strict
+        self._commands: Dict[str, Callable[[Dict[str, Any]], Optional[Dict[str, Any]]]] = {
+            SNAPSHOT      : self._cmd_snapshot,
+            SNAPSHOT_DELTA: self._cmd_snapshot_delta,
+            RESET         : self._cmd_reset,
+            STATS         : self._cmd_stats,
+        }
+        # count, mean, stddev and percentiles per station, in full snapshots
+        self.statistics = StationsStatistics() if statistics else None
+        # rolling window high/low, kept for the last window_retention milliseconds
+        self.windows: Optional[WindowedStations] = None
+        if window_retention is not None:
+            self.windows = WindowedStations(window_retention)
+            self._commands[SNAPSHOT_WINDOW] = self._cmd_snapshot_window
+        # hottest and coldest station heaps, maintained as highs rise and lows fall
+        if topk:
+            self.stations.track_ranking()
+            self._commands[TOPK] = self._cmd_topk
+        # station cap and/or idle TTL, evicted stations are reported when emit_evictions
+        self.eviction = eviction
+        self.emit_evictions = emit_evictions
+        # cProfile and tracemalloc sessions toggled by control messages, nothing hooked when off
+        self.profiler = profiler
+        if profiler is not None:
+            self._commands[PROFILE_START] = self._cmd_profile_start
+            self._commands[PROFILE_STOP] = self._cmd_profile_stop
+
+    def process_events(self,
+                       events: Iterable[Dict[str, Any]]) -> Generator[Dict[str, Any], None, None]:
+        """
+        Process a stream of weather events into output messages, see weather.process_events
+        :param events: an Iterable of input dicts {str: Any} messages
+        :return: Output messages json dicts {str, Any}
+        """
+        # the hot loop is kept inline, one function call per event is measurable
+        # pylint: disable=too-many-locals,too-many-branches,too-many-statements
+        stations = self.stations
+        statistics = self.statistics
+        windows = self.windows
+        eviction = self.eviction
+        commands = self._commands
+        decode = decode_event_strict if self.strict else decode_event
+        echo = self.echo
+        echo_decoded = echo == ECHO
+        metrics = self.metrics
+        sample_mask = metrics.sample_mask
+        clock = time.perf_counter_ns
+        # per event logging is skipped altogether unless enabled
+        log_events = logger.isEnabledFor(INFO)
+        for line in events:
+            # one event in sample_every is timed from receipt, other controls from decoding
+            metrics.events += 1
+            timed = not metrics.events & sample_mask
+            received = clock() if timed else 0
+            # Validate and obtain the Standardized Event dict
+            # -- raises the pydantic ValidationError for malformed messages
+            msg = decode(line)
+            # Process Event
+            # -- dispatch on precomputed names, Enum .name lookups are costly per event
+            msg_type = msg["type"]
+            if msg_type == SAMPLE:
                 # Process Sample Events
-                logger.info("Sample events")
-                stations_montior, latest_timestamp = _process_samples(msg, stations_montior)
-                yield msg.model_dump()
-            case EventTypes.control.name:
+                if log_events:
+                    logger.info("Sample events")
+                if timed:
+                    decoded = clock()
+                    metrics.validation.record(decoded - received)
+                stations.update(msg["stationName"], msg["temperature"])
+                self.latest_timestamp = msg["timestamp"]
+                self.samples += 1
+                if statistics is not None:
+                    statistics.update(msg["stationName"], msg["temperature"])
+                if windows is not None:
+                    windows.update(msg["stationName"], msg["timestamp"], msg["temperature"])
+                if eviction is not None:
+                    evicted = eviction.update(stations, msg["stationName"], msg["timestamp"])
+                    if evicted:
+                        # reported right before the echo of the sample evicting them
+                        yield from self._evicted(evicted, msg["timestamp"])
+                if timed:
+                    aggregated = clock()
+                    metrics.aggregation.record(aggregated - decoded)
+                    metrics.ingest_to_emit.record(aggregated - received)
+                    metrics.maybe_dump(aggregated, self.samples, len(stations))
+                    if self.checkpointer is not None and aggregated >= self.checkpointer.next_due:
+                        self.write_checkpoint()
+                if echo_decoded:
+                    yield msg
+                elif echo == ECHO_PASSTHROUGH:
+                    yield line
+                elif echo == ECHO_HEARTBEAT and self.samples % self.heartbeat_every == 0:
+                    yield _cmd_generate_heartbeat_output(self.samples)
+            elif msg_type == CONTROL:
                 # Process Control Events
-                logger.info("Control events")
-                match msg.command:
-                    case CommandTypes.snapshot.name:
-                        # Process Snapshot Commands
-                        logger.info("snapshot")
-                        if stations_montior and latest_timestamp is not None:
-                            yield _cmd_generate_snapshot_output(stations_montior, latest_timestamp)
-                    case CommandTypes.reset.name:
-                        # Process Reset Commands
-                        logger.info("reset")
-                        if stations_montior and latest_timestamp is not None:
-                            stations_montior.reset()
-                            asof_timestamp = latest_timestamp
-                            latest_timestamp = None
-                            yield _cmd_generate_reset_output(asof_timestamp)
-                    case _:
-                        # Can't process the Command type
-                        # -- Type is added to InputEvent, but no logic handle implemented
-                        logger.info("Not implemented Command Type")
-            case _:
+                if log_events:
+                    logger.info("Control events")
+                decoded = clock()
+                if timed:
+                    metrics.validation.record(decoded - received)
+                else:
+                    received = decoded
+                metrics.controls += 1
+                command = commands.get(msg["command"])
+                if command is None:
+                    # Can't process the Command type
+                    # -- Type is added to InputEvent, but no logic handle implemented
+                    logger.info("Not implemented Command Type")
+                    continue
+                # handlers get the input message, for their parameters
+                output = command(line)
+                if output is not None:
+                    emitted = clock()
+                    metrics.generation.record(emitted - decoded)
+                    metrics.ingest_to_emit.record(emitted - received)
+                    yield output
+            else:
                 # Can't process the Event type
                 # - Type added to InputEvent, but no logic handle implemented
                 logger.info("Not implemented Event Type")
+
+    @property
+    def lines_consumed(self) -> int:
+        """
+        Input lines folded into the aggregates, including the ones of a restored checkpoint
+        :return:
+        """
+        return self.input_offset + self.metrics.events
+
+    def write_checkpoint(self) -> None:
+        """
+        Checkpoint the aggregates, latest timestamp and input lines consumed.
+        The outputs of the checkpointed events may still be buffered by the writer.
+        :return:
+        """
+        if self.checkpointer is None:
+            raise ValueError("no checkpointer configured")
+        self.checkpointer.write(self.stations, self.latest_timestamp, self.lines_consumed)
+
+    def restore(self, checkpoint: Checkpoint) -> None:
+        """
+        Resume from a checkpoint; the input lines it consumed must be skipped by the caller
+        :param checkpoint:
+        :return:
+        """
+        partial = checkpoint.partial
+        # the changes since the last snapshot_delta are not checkpointed, the first delta
+        # after a restart reports every station so delta consumers stay in sync
+        self.stations.restore(partial.names, partial.highs, partial.lows, dirty=True)
+        self.latest_timestamp = partial.as_of
+        if self.eviction is not None:
+            self.eviction.restore(partial.names, partial.as_of)
+        self.input_offset = checkpoint.lines - self.metrics.events
+
+    def _evicted(self, evicted: List[Tuple[str, float, float]],
+                 timestamp: int) -> Iterator[Dict[str, Any]]:
+        for name, _, _ in evicted:
+            if self.statistics is not None:
+                self.statistics.discard(name)
+            if self.windows is not None:
+                self.windows.discard(name)
+        if self.emit_evictions:
+            yield _cmd_generate_eviction_output(evicted, timestamp)
+
+    def _cmd_snapshot(self, event: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        # Process Snapshot Commands
+        logger.info("snapshot")
+        if isinstance(event, dict) and (event.get("stations") is not None
+                                        or event.get("prefix") is not None):
+            # pylint: disable-next=import-outside-toplevel
+            from interview.models.snapshotEvent import SnapshotEvent
+            return self._cmd_selected_snapshot(SnapshotEvent.model_validate(event))
+        if self.latest_timestamp is None:
+            return None
+        # a full snapshot delivers every change so far
+        self.stations.clear_dirty()
+        if self.statistics is not None:
+            # every sample moves the statistics, nothing to cache
+            return _cmd_generate_statistics_snapshot_output(self.stations, self.statistics,
+                                                            self.latest_timestamp)
+        output = self.snapshot_cache.lookup(self.stations, self.latest_timestamp)
+        if output is None:
+            output = self.snapshot_cache.store(
+                self.stations, _cmd_generate_snapshot_output(self.stations, self.latest_timestamp)
+            )
+        return output
+
+    def _cmd_selected_snapshot(self, event: "SnapshotEvent") -> Optional[Dict[str, Any]]:
+        # Snapshot of a station list and/or name prefix, proportional to the stations selected;
+        # it is not cached and leaves the changes to the next snapshot_delta
+        if self.latest_timestamp is None:
+            return None
+        return _cmd_generate_selected_snapshot_output(
+            self.stations, _selected_station_names(self.stations, event),
+            self.latest_timestamp, self.statistics
+        )
+
+    def _cmd_snapshot_delta(self, _msg: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        # Process Delta Snapshot Commands
+        logger.info("snapshot_delta")
+        if self.latest_timestamp is None:
+            return None
+        return _cmd_generate_snapshot_delta_output(self.stations, self.latest_timestamp)
+
+    def _cmd_snapshot_window(self, event: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        # Process Window Snapshot Commands
+        logger.info("snapshot_window")
+        # pylint: disable-next=import-outside-toplevel
+        from interview.models.windowSnapshotEvent import WindowSnapshotEvent
+        window = WindowSnapshotEvent.model_validate(event).window
+        if self.latest_timestamp is None or self.windows is None:
+            return None
+        return _cmd_generate_window_snapshot_output(
+            self.windows.snapshot(self.latest_timestamp, window), self.latest_timestamp
+        )
+
+    def _cmd_topk(self, event: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        # Process Top K Commands
+        logger.info("topk")
+        from interview.models.topkEvent import TopKEvent  # pylint: disable=import-outside-toplevel
+        k = TopKEvent.model_validate(event).k
+        if self.latest_timestamp is None:
+            return None
+        return _cmd_generate_topk_output(self.stations, k, self.latest_timestamp)
+
+    def _cmd_profile_start(self, _msg: Dict[str, Any]) -> None:
+        # Process Profile Start Commands, profiling covers the following events
+        logger.info("profile_start")
+        if self.profiler is not None:
+            self.profiler.start()
+
+    def _cmd_profile_stop(self, _msg: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        # Process Profile Stop Commands, the profile is written with or without data
+        logger.info("profile_stop")
+        paths = None if self.profiler is None else self.profiler.stop()
+        if paths is None or self.latest_timestamp is None:
+            return None
+        return _cmd_generate_profile_output(*paths, self.latest_timestamp)
+
+    def _cmd_stats(self, _msg: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        # Process Stats Commands
+        logger.info("stats")
+        if self.latest_timestamp is None:
+            return None
+        metrics = self.metrics.as_dict(self.samples, len(self.stations))
+        if self.eviction is not None:
+            metrics["evictions"] = self.eviction.evictions
+        return _cmd_generate_stats_output(metrics, self.latest_timestamp)
+
+    def _cmd_reset(self, _msg: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        # Process Reset Commands
+        logger.info("reset")
+        if self.latest_timestamp is None:
+            return None
+        self.stations.reset()
+        if self.statistics is not None:
+            self.statistics.reset()
+        if self.windows is not None:
+            self.windows.reset()
+        if self.eviction is not None:
+            self.eviction.reset()
+        asof_timestamp = self.latest_timestamp
+        self.latest_timestamp = None
+        return _cmd_generate_reset_output(asof_timestamp)
+
+    def process_batch(self,  # pylint: disable=too-many-arguments
+                      stations: "ArrayLike",
+                      timestamps: "ArrayLike",
+                      temperatures: "ArrayLike",
+                      controls: Iterable[Tuple[int, str]] = (),
+                      names: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Ingest columnar sample arrays, see weather.process_batch
+        :param stations: array of station names, or of integer ids into names
+        :param timestamps: array of int64 UTC millisecond timestamps
+        :param temperatures: array of float64 Fahrenheit temperatures
+        :param controls: (position, command) pairs, position in [0, len(stations)]
+        :param names: station names indexed by station id, when stations holds ids
+        :return: Output messages of the control commands, samples are not echoed
+        """
+        if self.statistics is not None or self.windows is not None:
+            raise ValueError("process_batch does not support statistics or rolling windows")
+        if self.eviction is not None:
+            raise ValueError("process_batch does not support station eviction")
+        # numpy is only required by the batch path
+        from interview.batch import as_columns  # pylint: disable=import-outside-toplevel
+        station_column, timestamp_column, temperature_column = as_columns(
+            stations, timestamps, temperatures
+        )
+
+        size = len(station_column)
+        outputs: List[Dict[str, Any]] = []
+        start = 0
+        for position, command in sorted(controls, key=lambda control: control[0]):
+            if not 0 <= position <= size:
+                raise ValueError(f"control position {position} outside of [0, {size}]")
+            self._ingest_columns(station_column[start:position], timestamp_column[start:position],
+                                 temperature_column[start:position], names)
+            start = position
+            outputs.extend(self.process_events([{"type": CONTROL, "command": command}]))
+        self._ingest_columns(station_column[start:], timestamp_column[start:],
+                             temperature_column[start:], names)
+        return outputs
+
+    def _ingest_columns(self,
+                        stations: "NDArray[Any]",
+                        timestamps: "NDArray[np.int64]",
+                        temperatures: "NDArray[np.float64]",
+                        names: Optional[Sequence[str]]) -> None:
+        """
+        Fold a run of columnar samples, without control messages, into the stations tracker
+        :param stations:
+        :param timestamps:
+        :param temperatures:
+        :param names:
+        :return:
+        """
+        # pylint: disable-next=import-outside-toplevel
+        from interview.batch import group_high_low_nan_first
+        if len(stations) == 0:
+            return
+        keys, highs, lows, nan_first = group_high_low_nan_first(stations, temperatures)
+        self.samples += len(stations)
+        for key, high, low, first_nan in zip(keys, highs, lows, nan_first):
+            name = key if names is None else names[key]
+            if first_nan and self.stations.get(name) is None:
+                # a NaN first sample sticks, as in StationsMonitor.update
+                self.stations.merge(name, math.nan, math.nan)
+            else:
+                self.stations.merge(name, high, low)
+        self.latest_timestamp = int(timestamps[-1])
+
+
+# Initialize
+# -- module level state of process_events, kept for backwards compatibility
+_engine = WeatherEngine()
+stations_montior: StationsMonitor = _engine.stations  # monitor high/low temp per station
+latest_timestamp: Optional[int] = None  # Monitor timestamp
+
+
+def process_events(events: Iterable[dict[str, Any]]) -> Generator[dict[str, Any], None, None]:
+    """
+    Process a stream of samples from weather stations on Chicago city beaches into messages
+    that provide snapshots of the aggregated state of the weather.
+    Delegates to the module level WeatherEngine, whose state is mirrored by the
+    stations_montior and latest_timestamp module globals.
+    :param events: an Iterable of input dicts {str: Any} messages
+    :return: Output messages json dicts {str, Any}
+    """
+    global latest_timestamp
+    _engine.stations = stations_montior
+    _engine.latest_timestamp = latest_timestamp
+    try:
+        for output in _engine.process_events(events):
+            latest_timestamp = _engine.latest_timestamp
+            yield output
+    finally:
+        latest_timestamp = _engine.latest_timestamp
+
+
+def process_batch(stations: "ArrayLike",
+                  timestamps: "ArrayLike",
+                  temperatures: "ArrayLike",
+                  controls: Iterable[Tuple[int, str]] = (),
+                  names: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+    """
+    Ingest columnar sample arrays into the same state as process_events, with vectorized
+    group-by high/low per station. A control command (i, command) is applied right before
+    sample i, so a snapshot after a batch load matches the one process_events would produce.
+    :param stations: array of station names, or of integer ids into names
+    :param timestamps: array of int64 UTC millisecond timestamps
+    :param temperatures: array of float64 Fahrenheit temperatures
+    :param controls: (position, command) pairs, position in [0, len(stations)]
+    :param names: station names indexed by station id, when stations holds ids
+    :return: Output messages of the control commands, samples are not echoed
+    """
+    global latest_timestamp
+    _engine.stations = stations_montior
+    _engine.latest_timestamp = latest_timestamp
+    try:
+        return _engine.process_batch(stations, timestamps, temperatures, controls, names)
+    finally:
+        latest_timestamp = _engine.latest_timestamp
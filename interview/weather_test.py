@@ -1,17 +1,21 @@
-import time
+import random
 import unittest
 from pydantic import ValidationError
 
 from interview.models.sampleEvent import SampleEvent
 from interview.models.controlEvent import ControlEvent
+from interview.models.heartbeatOutput import HeartbeatOutput
 from interview.models.inputEvent import InputEvent
 from interview.models.resetOutput import ResetOutput
+from interview.models.snapshotDeltaOutput import SnapshotDeltaOutput
 from interview.models.snapshotOutput import SnapshotOutput
-from interview.models.stations import StationsMonitor
+from interview.models.stations import StationsMonitor, StationMetaData
+from interview.models.statsOutput import StatsOutput
+from interview.models.topkOutput import TopKOutput
 from . import weather
 
 
-class TestWeather(unittest.TestCase):
+class TestWeather(unittest.TestCase):  # pylint: disable=too-many-public-methods
     
     @staticmethod
     def data():
@@ -67,6 +71,23 @@ class TestWeather(unittest.TestCase):
         expected = reset_data
         self.assertDictEqual(actual, expected)
     
+    def test_model_outputs_match_builders(self):
+        # the outputs are built as plain dicts, their models document the shapes
+        models = {"heartbeat": HeartbeatOutput, "snapshot_delta": SnapshotDeltaOutput,
+                  "stats": StatsOutput, "topk": TopKOutput}
+        engine = weather.WeatherEngine(echo=weather.ECHO_HEARTBEAT, heartbeat_every=2, topk=True)
+        samples = [{**self.data(), "stationName": f"Station {i % 3}",
+                    "timestamp": 1672531200000 + i, "temperature": float(i)} for i in range(4)]
+        commands = [{"type": "control", "command": command}
+                    for command in ("snapshot_delta", "stats")]
+        outputs = list(engine.process_events(samples + commands + [
+            {"type": "control", "command": "topk", "k": 2}
+        ]))
+        self.assertEqual({output["type"] for output in outputs}, set(models))
+        for output in outputs:
+            self.assertEqual(models[output["type"]].model_validate(output).model_dump(), output,
+                             msg=output["type"])
+    
     def test_model_input_errors(self):
         error_data = {
             "event": {
@@ -169,6 +190,33 @@ class TestWeather(unittest.TestCase):
         self.assertEqual(actual_timestamp, expected_timestamp, msg="high temp sample timestamp")
         self.assertEqual(actual_stations, expected_stations, msg="high temp sample stations")
     
+    def test_stations_monitor_in_place(self):
+        stations = StationsMonitor()
+        stations.update("Foster Weather Station", 37.1)
+        stations.update("Foster Weather Station", 40.0)
+        stations.update("Foster Weather Station", 30.0)
+        stations.update("Beckton Weather Station", 50.0)
+        expected = {'Foster Weather Station' : {'high': 40.0, 'low': 30.0},
+                    'Beckton Weather Station': {'high': 50.0, 'low': 50.0}}
+        self.assertEqual(stations.stations, expected)
+        self.assertEqual(stations, StationsMonitor(stations=expected))
+        self.assertEqual(stations.get("Foster Weather Station"), (40.0, 30.0))
+        self.assertIsNone(stations.get("Unknown Station"))
+        
+        # + returns an updated copy, += is the in place update
+        sample = StationMetaData(stationName="Beckton Weather Station",
+                                 timestamp=1672531200000, temperature=-1.0)
+        added = stations + sample
+        self.assertEqual(added.stations["Beckton Weather Station"], {'high': 50.0, 'low': -1.0})
+        self.assertEqual(stations.stations, expected)
+        same = stations
+        same += sample
+        self.assertIs(same, stations)
+        self.assertEqual(stations, added)
+        
+        stations.reset()
+        self.assertEqual(stations.stations, {})
+    
     def test__cmd_generate_snapshot_output(self):
         stations = StationsMonitor(
             stations={'Foster Weather Station' : {'high': 3700.1, 'low': -0.1},
@@ -239,15 +287,11 @@ class TestWeather(unittest.TestCase):
         expected = batch_events
         self.assertEqual(actual, expected, msg="multiple samples -- list")
     
-    def test_performance(self):
+    def test_process_events_many_stations(self):
+        # throughput is measured by benchmarks.suite
         weather.stations_montior.reset()
         weather.latest_timestamp = None
         
-        start_time = time.time()
-        
-        # 1M rows
-        # number_of_sample_messages = 1_000_000
-        number_of_sample_messages = 10_000
         number_of_sample_messages = 10
         sample_data = {
             "type"       : "sample",
@@ -262,7 +306,6 @@ class TestWeather(unittest.TestCase):
         self.assertEqual(len(output), number_of_sample_messages)
         
         # Deterministic multiple stations
-        # 1M rows
         events = [sample_data.copy() for _ in range(number_of_sample_messages)]
         for i in range(number_of_sample_messages):
             current_event = events[i].copy()
@@ -291,9 +334,6 @@ class TestWeather(unittest.TestCase):
             }
         }]
         self.assertEqual(actual, expected)
-        
-        end_time = time.time()
-        print(f"Time taken: {end_time - start_time}")
     
     def test_process_events_validation_error(self):
         # event type error
@@ -401,6 +441,147 @@ class TestWeather(unittest.TestCase):
         }]
         self.assertEqual(actual, expected)
     
+    def test_process_events_cmd_snapshot_delta(self):
+        weather.stations_montior.reset()
+        weather.latest_timestamp = None
+        
+        cmd_delta = {"type": "control", "command": "snapshot_delta"}
+        cmd_snapshot = {"type": "control", "command": "snapshot"}
+        sample_data = self.data()
+        
+        # no data yet, ignored
+        self.assertEqual(list(weather.process_events([cmd_delta])), [])
+        
+        # every new station is part of the first delta
+        other = {**sample_data, "stationName": "Oak Street Weather Station", "temperature": 50.0}
+        actual = list(weather.process_events([sample_data, other, cmd_delta]))[-1]
+        expected = {
+            'type'    : 'snapshot_delta',
+            'asOf'    : 1672531200000,
+            'stations': {'Foster Weather Station'    : {'high': 37.1, 'low': 37.1},
+                         'Oak Street Weather Station': {'high': 50.0, 'low': 50.0}}
+        }
+        self.assertEqual(actual, expected)
+        
+        # samples within the high/low range do not dirty a station
+        unchanged = {**sample_data, "timestamp": 1672531200001}
+        changed = {**other, "timestamp": 1672531200002, "temperature": 10.0}
+        actual = list(weather.process_events([unchanged, changed, cmd_delta]))[-1]
+        expected = {
+            'type'    : 'snapshot_delta',
+            'asOf'    : 1672531200002,
+            'stations': {'Oak Street Weather Station': {'high': 50.0, 'low': 10.0}}
+        }
+        self.assertEqual(actual, expected)
+        
+        # a full snapshot delivers every change, the next delta is empty
+        changed = {**sample_data, "timestamp": 1672531200003, "temperature": 99.0}
+        full = list(weather.process_events([changed, cmd_snapshot, cmd_delta]))
+        self.assertEqual(full[1]["stations"]["Foster Weather Station"],
+                         {'high': 99.0, 'low': 37.1})
+        self.assertEqual(full[2], {'type': 'snapshot_delta', 'asOf': 1672531200003,
+                                   'stations': {}})
+    
+    def test_process_events_cmd_snapshot_selected(self):
+        engine = weather.WeatherEngine()
+        names = ["Oak Street", "Foster", "Ohio Street", "Montrose", "Oak Woods", "O"]
+        samples = [{**self.data(), "stationName": name, "timestamp": 1672531200000 + i,
+                    "temperature": float(i)} for i, name in enumerate(names)]
+        list(engine.process_events(samples))
+        
+        def snapshot(**selection):
+            output = list(engine.process_events([{"type": "control", "command": "snapshot",
+                                                  **selection}]))
+            self.assertEqual(output[0]["asOf"], 1672531200005)
+            return output[0]["stations"]
+        
+        # prefix matches in name order, from the sorted index
+        self.assertEqual(list(snapshot(prefix="O")), ["O", "Oak Street", "Oak Woods",
+                                                      "Ohio Street"])
+        self.assertEqual(snapshot(prefix="Oak "), {"Oak Street": {"high": 0.0, "low": 0.0},
+                                                   "Oak Woods": {"high": 4.0, "low": 4.0}})
+        self.assertEqual(snapshot(prefix="Z"), {})
+        # listed stations in the order given, unknown ones left out
+        self.assertEqual(list(snapshot(stations=["Montrose", "Nope", "Foster"])),
+                         ["Montrose", "Foster"])
+        self.assertEqual(list(snapshot(stations=["Montrose", "Oak Woods"], prefix="Oak")),
+                         ["Oak Woods"])
+        # a null selection is a full snapshot
+        self.assertEqual(list(snapshot(stations=None, prefix=None)), names)
+        # the index catches up on new stations and starts over on reset
+        later = {**self.data(), "stationName": "Oak Beach", "timestamp": 1672531200005}
+        list(engine.process_events([later]))
+        self.assertEqual(list(snapshot(prefix="Oak")), ["Oak Beach", "Oak Street", "Oak Woods"])
+        list(engine.process_events([{"type": "control", "command": "reset"}, later]))
+        self.assertEqual(list(snapshot(prefix="O")), ["Oak Beach"])
+        # a selection does not consume the changes of the next delta
+        delta = list(engine.process_events([{"type": "control", "command": "snapshot_delta"}]))
+        self.assertEqual(list(delta[0]["stations"]), ["Oak Beach"])
+        
+        with self.assertRaises(ValidationError):
+            snapshot(prefix=1)
+    
+    def test_process_events_cmd_topk(self):
+        rng = random.Random(7)
+        engine = weather.WeatherEngine(echo=weather.ECHO_NONE, topk=True)
+        cmd_topk = {"type": "control", "command": "topk", "k": 5}
+        self.assertEqual(list(engine.process_events([cmd_topk])), [])
+        for rounds in range(3):
+            samples = [{**self.data(), "stationName": f"Station {rng.randrange(50)}",
+                        "timestamp": 1672531200000 + i,
+                        "temperature": round(rng.uniform(-30.0, 110.0), 1)}
+                       for i in range(2_000)]
+            for start in range(0, len(samples), 200):
+                list(engine.process_events(samples[start:start + 200]))
+                items = list(engine.stations.items())
+                # ties go to the station seen first, sorted is stable
+                hottest = sorted(items, key=lambda item: -item[1])[:5]
+                coldest = sorted(items, key=lambda item: item[2])[:5]
+                actual = list(engine.process_events([cmd_topk]))[0]
+                self.assertEqual(actual["asOf"], samples[start + 199]["timestamp"])
+                self.assertEqual([(s["stationName"], s["high"], s["low"])
+                                  for s in actual["hottest"]], hottest, msg=rounds)
+                self.assertEqual([(s["stationName"], s["high"], s["low"])
+                                  for s in actual["coldest"]], coldest, msg=rounds)
+            list(engine.process_events([{"type": "control", "command": "reset"}]))
+            self.assertEqual(engine.stations.top(5), ([], []))
+        
+        # pre-aggregated merges and restores keep the ranking
+        engine.stations.merge("A", 200.0, 100.0)
+        engine.stations.merge("B", 150.0, -50.0)
+        engine.stations.merge("A", 250.0, 90.0)
+        self.assertEqual(engine.stations.top(1), ([("A", 250.0, 90.0)], [("B", 150.0, -50.0)]))
+        # NaN aggregates are not ranked
+        engine.stations.restore(["C", "D", "E"], [1.0, float("nan"), 2.0], [0.0, float("nan"), 2.0])
+        self.assertEqual(engine.stations.top(3), ([("E", 2.0, 2.0), ("C", 1.0, 0.0)],
+                                                  [("C", 1.0, 0.0), ("E", 2.0, 2.0)]))
+        # topk is registered on request only
+        self.assertEqual(list(weather.WeatherEngine().process_events([self.data(), cmd_topk])),
+                         [self.data()])
+        with self.assertRaises(ValidationError):
+            list(engine.process_events([self.data(), {**cmd_topk, "k": 0}]))
+    
+    def test_engine_echo_modes(self):
+        samples = [{**self.data(), "timestamp": 1672531200000 + i, "temperature": float(i)}
+                   for i in range(5)]
+        events = samples + [{"type": "control", "command": "snapshot"}]
+        snapshot = list(weather.WeatherEngine().process_events(events))[-1]
+        
+        outputs = list(weather.WeatherEngine(echo=weather.ECHO_NONE).process_events(events))
+        self.assertEqual(outputs, [snapshot])
+        
+        engine = weather.WeatherEngine(echo=weather.ECHO_HEARTBEAT, heartbeat_every=2)
+        outputs = list(engine.process_events(events))
+        self.assertEqual(outputs, [{'type': 'heartbeat', 'samples': 2},
+                                   {'type': 'heartbeat', 'samples': 4}, snapshot])
+        
+        outputs = list(weather.WeatherEngine(echo=weather.ECHO_PASSTHROUGH).process_events(events))
+        self.assertTrue(all(output is sample for output, sample in zip(outputs, samples)))
+        self.assertEqual(outputs[-1], snapshot)
+        
+        with self.assertRaises(ValueError):
+            weather.WeatherEngine(echo="loud")
+    
     def test_process_events_cmd_reset(self):
         weather.stations_montior.reset()
         weather.latest_timestamp = None
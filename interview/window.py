@@ -0,0 +1,114 @@
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+
+
+class MonotonicWindow:
+    """
+    Samples of one station that can still be the high or the low of a time window.
+    highs keeps decreasing temperatures, lows increasing ones, both in timestamp order,
+    so the front of each deque is the high/low of every sample since its timestamp.
+    A push is amortized O(1): each sample enters and leaves a deque at most once.
+    """
+    __slots__ = ("highs", "lows")
+
+    def __init__(self) -> None:
+        self.highs: Deque[Tuple[int, float]] = deque()
+        self.lows: Deque[Tuple[int, float]] = deque()
+
+    def push(self, timestamp: int, temperature: float) -> None:
+        highs = self.highs
+        while highs and highs[-1][1] <= temperature:
+            highs.pop()
+        highs.append((timestamp, temperature))
+        lows = self.lows
+        while lows and lows[-1][1] >= temperature:
+            lows.pop()
+        lows.append((timestamp, temperature))
+
+    def expire(self, cutoff: int) -> None:
+        """
+        Drop the samples at or before cutoff
+        :param cutoff: timestamp
+        :return:
+        """
+        highs = self.highs
+        while highs and highs[0][0] <= cutoff:
+            highs.popleft()
+        lows = self.lows
+        while lows and lows[0][0] <= cutoff:
+            lows.popleft()
+
+    def high_low(self, cutoff: int) -> Optional[Tuple[float, float]]:
+        """
+        High and low of the samples after cutoff, the deques are left untouched
+        :param cutoff: timestamp
+        :return: None without samples after cutoff
+        """
+        high = next((temperature for timestamp, temperature in self.highs if timestamp > cutoff),
+                    None)
+        if high is None:
+            return None
+        low = next(temperature for timestamp, temperature in self.lows if timestamp > cutoff)
+        return high, low
+
+
+class WindowedStations:
+    """
+    High/low per station over the samples of the last `retention` milliseconds, keyed on
+    the sample timestamps, which are guaranteed to increase. Queries may use any window up
+    to the retention. Memory is bounded by the samples within the retention: a station's
+    expired samples are dropped on its next update, every station's on a query.
+    NaN temperatures are not comparable and are left out of the windows.
+    """
+    __slots__ = ("retention", "_windows")
+
+    def __init__(self, retention: int) -> None:
+        if retention < 1:
+            raise ValueError("window retention must be positive")
+        self.retention = retention
+        self._windows: Dict[str, MonotonicWindow] = {}
+
+    def update(self, station_name: str, timestamp: int, temperature: float) -> None:
+        if temperature != temperature:  # pylint: disable=comparison-with-itself
+            return
+        window = self._windows.get(station_name)
+        if window is None:
+            window = self._windows[station_name] = MonotonicWindow()
+        else:
+            window.expire(timestamp - self.retention)
+        window.push(timestamp, temperature)
+
+    def snapshot(self, as_of: int, window: int) -> Dict[str, Dict[str, float]]:
+        """
+        High/low per station over the samples with a timestamp in (as_of - window, as_of]
+        :param as_of: most recent sample timestamp
+        :param window: milliseconds, at most the retention
+        :return: {stationName: {"high": float, "low": float}}, stations without samples
+        in the window are left out
+        """
+        if window > self.retention:
+            raise ValueError(f"window {window} exceeds the retention of {self.retention} ms")
+        retained = as_of - self.retention
+        cutoff = as_of - window
+        stations = {}
+        expired = []
+        for name, station_window in self._windows.items():
+            station_window.expire(retained)
+            if not station_window.highs:
+                expired.append(name)
+                continue
+            high_low = station_window.high_low(cutoff)
+            if high_low is not None:
+                stations[name] = {"high": high_low[0], "low": high_low[1]}
+        for name in expired:
+            del self._windows[name]
+        return stations
+
+    def discard(self, station_name: str) -> None:
+        self._windows.pop(station_name, None)
+
+    def __len__(self) -> int:
+        return len(self._windows)
+
+    def reset(self) -> None:
+        self._windows.clear()
@@ -0,0 +1,88 @@
+import random
+import unittest
+
+from pydantic import ValidationError
+
+from .weather import WeatherEngine
+from .window import WindowedStations
+
+
+class TestWindowedStations(unittest.TestCase):
+
+    def test_matches_brute_force(self):
+        rng = random.Random(14)
+        retention = 1_000
+        windows = WindowedStations(retention)
+        samples = []
+        timestamp = 0
+        for _ in range(5_000):
+            timestamp += rng.randrange(1, 20)
+            sample = (f"Station {rng.randrange(8)}", timestamp, rng.uniform(-30.0, 110.0))
+            samples.append(sample)
+            windows.update(*sample)
+            if rng.random() < 0.02:
+                window = rng.choice([1, 50, 500, retention])
+                expected = {}
+                for name, sample_timestamp, temperature in samples:
+                    if sample_timestamp > timestamp - window:
+                        known = expected.setdefault(name, {"high": temperature,
+                                                           "low": temperature})
+                        known["high"] = max(known["high"], temperature)
+                        known["low"] = min(known["low"], temperature)
+                self.assertEqual(windows.snapshot(timestamp, window), expected)
+                # memory is bounded by the samples within the retention
+                retained = sum(1 for _, sample_timestamp, _ in samples
+                               if sample_timestamp > timestamp - retention)
+                self.assertLessEqual(sum(len(w.highs) + len(w.lows)
+                                         for w in windows._windows.values()), 2 * retained)
+
+    def test_expired_stations_are_dropped(self):
+        windows = WindowedStations(100)
+        windows.update("a", 1, 10.0)
+        windows.update("b", 150, 20.0)
+        windows.update("b", 151, float("nan"))
+        self.assertEqual(windows.snapshot(151, 100), {"b": {"high": 20.0, "low": 20.0}})
+        self.assertEqual(len(windows), 1)
+        with self.assertRaises(ValueError):
+            windows.snapshot(151, 101)
+
+
+class TestSnapshotWindowCommand(unittest.TestCase):
+
+    @staticmethod
+    def sample(timestamp, temperature, station="Foster Weather Station"):
+        return {"type": "sample", "stationName": station, "timestamp": timestamp,
+                "temperature": temperature}
+
+    def test_snapshot_window(self):
+        engine = WeatherEngine(echo="none", window_retention=60_000)
+        command = {"type": "control", "command": "snapshot_window", "window": 20_000}
+        self.assertEqual(list(engine.process_events([command])), [], msg="no data yet")
+        events = [self.sample(0, 90.0), self.sample(20_000, 40.0, "Oak Street Weather Station"),
+                  self.sample(40_000, 50.0), self.sample(45_000, 60.0), command,
+                  {**command, "window": 60_000}, {"type": "control", "command": "snapshot"}]
+        windowed, retained, full = engine.process_events(events)
+        self.assertEqual(windowed, {"type": "snapshot", "asOf": 45_000, "stations": {
+            "Foster Weather Station": {"high": 60.0, "low": 50.0}}})
+        self.assertEqual(retained["stations"], {
+            "Foster Weather Station"    : {"high": 90.0, "low": 50.0},
+            "Oak Street Weather Station": {"high": 40.0, "low": 40.0}})
+        self.assertEqual(full["stations"], retained["stations"])
+
+        for invalid in ({**command, "window": 0}, {**command, "window": "60"},
+                        {"type": "control", "command": "snapshot_window"}):
+            with self.assertRaises(ValidationError):
+                list(engine.process_events([invalid]))
+        with self.assertRaises(ValueError):
+            list(engine.process_events([{**command, "window": 60_001}]))
+
+        list(engine.process_events([{"type": "control", "command": "reset"}]))
+        self.assertEqual(len(engine.windows), 0)
+        # without a retention, the command is not handled
+        self.assertEqual(list(WeatherEngine().process_events([self.sample(0, 1.0), command]))[1:],
+                         [])
+
+    def test_batch_ingest_is_rejected(self):
+        engine = WeatherEngine(window_retention=60_000)
+        with self.assertRaises(ValueError):
+            engine.process_batch(["a", "b"], [1, 2], [1.0, 2.0])